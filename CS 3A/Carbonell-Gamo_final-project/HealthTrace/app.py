@@ -1,9 +1,11 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, abort
+import hmac
 import os
 import sys
+import threading
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import timedelta
 import json
 
 # Add current directory to path
@@ -11,6 +13,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.data_utils import DataProcessor
 from app.model import DiseaseOutbreakModel
+from app.http_cache import cached_json, columnar_payload, data_version
+from app.ingest import ingest_rows, load_stats, correlations_from_stats
 from config import Config
 
 app = Flask(__name__, 
@@ -22,64 +26,109 @@ app.config.from_object(Config)
 models_lstm = {}
 models_gru = {}
 data_processors = {}
+model_lock = threading.Lock()
 
-def initialize_models():
-    """Initialize both LSTM and GRU models for all diseases"""
-    print("Initializing models...")
+# Climate series exposed by /api/climate_data:
+# (response key, candidate source columns in priority order, decimals)
+CLIMATE_SERIES = [
+    ('temperature', ['tave', 'temperature'], 1),
+    ('humidity', ['humidity'], 1),
+    ('rainfall', ['precipitation', 'pr', 'rainfall'], 1),
+    ('precipitation', ['precipitation'], 2),
+    ('precipitation_7day', ['precipitation_7day'], 2),
+    ('precipitation_30day', ['precipitation_30day'], 2),
+    ('spi3', ['spi3'], 2),
+    ('precip_anomaly', ['precip_anomaly'], 2),
+]
+CLIMATE_COLUMNS = {'date'} | {col for _, sources, _ in CLIMATE_SERIES for col in sources}
+
+def data_file_for(disease):
+    """Historical data CSV for a disease"""
+    return os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+
+def model_file_for(disease, model_type):
+    """Trained model file for a disease ('lstm' or 'gru')"""
+    return os.path.join('app', 'models', f'{disease.lower()}_forecast_{model_type.lower()}.h5')
+
+def disease_files(disease):
+    """Files a disease's responses depend on (data plus both models)"""
+    return [data_file_for(disease), model_file_for(disease, 'lstm'), model_file_for(disease, 'gru')]
+
+def all_disease_files():
+    return [path for disease in Config.DISEASES for path in disease_files(disease)]
+
+def data_timestamp(paths):
+    """Last-modified time of the underlying files, reported as 'last_updated'"""
+    _, last_modified = data_version(paths)
+    if last_modified is None:
+        return None
+    return last_modified.astimezone().strftime('%Y-%m-%d %H:%M:%S')
+
+def get_data_processor(disease):
+    """Data processor for a disease, created on first use"""
+    if disease not in data_processors:
+        data_processors[disease] = DataProcessor(sequence_length=Config.SEQUENCE_LENGTH)
+    return data_processors[disease]
+
+def get_model(disease, model_type='lstm'):
+    """Load a disease's LSTM or GRU model on first use (None if unavailable)
+
+    TensorFlow is only imported by the first call that actually loads a model,
+    so endpoints that never run inference start serving immediately.
+    """
+    model_type = model_type.lower()
+    models = models_gru if model_type == 'gru' else models_lstm
+    if disease in models:
+        return models[disease]
     
-    for disease in Config.DISEASES:
+    with model_lock:
+        # Another request may have loaded it while we waited
+        if disease in models:
+            return models[disease]
+        
+        data_file = data_file_for(disease)
+        if not os.path.exists(data_file):
+            print(f"✗ {disease} data file not found at {data_file}")
+            return None
+        
+        model_path = model_file_for(disease, model_type)
+        if not os.path.exists(model_path):
+            print(f"✗ {disease} {model_type.upper()} model not found at {model_path}")
+            return None
+        
         try:
-            # Initialize data processor
-            data_processors[disease] = DataProcessor(sequence_length=Config.SEQUENCE_LENGTH)
-            
-            # Load sample data to determine feature count
-            data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
-            if not os.path.exists(data_file):
-                print(f"✗ {disease} data file not found at {data_file}")
-                continue
-            
-            # Read data to get feature count
-            df = pd.read_csv(data_file)
+            # Read only the header to get feature count
+            columns = pd.read_csv(data_file, nrows=0).columns
             # Determine feature columns (all except 'date' and including disease_cases for target)
-            # The model expects all columns as input features during prediction
-            feature_cols = [col for col in df.columns if col != 'date']
+            feature_cols = [col for col in columns if col != 'date']
             # n_features is the number of input columns (which includes disease_cases as last column)
             n_features = len(feature_cols) - 1  # Subtract 1 because disease_cases is target, not input
             
-            # Initialize and load LSTM model
-            lstm_model = DiseaseOutbreakModel(
-                sequence_length=Config.SEQUENCE_LENGTH,
-                n_features=n_features,
-                model_type='LSTM'
-            )
-            
-            lstm_path = os.path.join('app', 'models', f'{disease.lower()}_forecast_lstm.h5')
-            
-            if os.path.exists(lstm_path):
-                lstm_model.load_model(lstm_path)
-                models_lstm[disease] = lstm_model
-                print(f"✓ {disease} LSTM model loaded ({n_features} features)")
-            else:
-                print(f"✗ {disease} LSTM model not found at {lstm_path}")
-            
-            # Initialize and load GRU model
-            gru_model = DiseaseOutbreakModel(
+            model = DiseaseOutbreakModel(
                 sequence_length=Config.SEQUENCE_LENGTH,
                 n_features=n_features,
-                model_type='GRU'
+                model_type=model_type.upper()
             )
-            
-            gru_path = os.path.join('app', 'models', f'{disease.lower()}_forecast_gru.h5')
-            
-            if os.path.exists(gru_path):
-                gru_model.load_model(gru_path)
-                models_gru[disease] = gru_model
-                print(f"✓ {disease} GRU model loaded ({n_features} features)")
-            else:
-                print(f"✗ {disease} GRU model not found at {gru_path}")
-                
+            model.load_model(model_path)
+            models[disease] = model
+            print(f"✓ {disease} {model_type.upper()} model loaded ({n_features} features)")
+            return model
         except Exception as e:
-            print(f"Error loading {disease} models: {e}")
+            print(f"Error loading {disease} {model_type.upper()} model: {e}")
+            return None
+
+def model_available(disease, model_type='lstm'):
+    """Whether a model can be served, without loading it"""
+    return os.path.exists(data_file_for(disease)) and os.path.exists(model_file_for(disease, model_type))
+
+def initialize_models():
+    """Load both LSTM and GRU models for all diseases ahead of the first forecast"""
+    print("Initializing models...")
+    
+    for disease in Config.DISEASES:
+        get_data_processor(disease)
+        get_model(disease, 'lstm')
+        get_model(disease, 'gru')
 
 @app.route('/')
 def index():
@@ -87,6 +136,7 @@ def index():
     return render_template('index.html', diseases=Config.DISEASES)
 
 @app.route('/api/forecast/<disease>')
+@cached_json(disease_files)
 def get_forecast(disease):
     """Get disease outbreak forecast (defaults to LSTM)"""
     model_type = request.args.get('model_type', 'lstm').lower()
@@ -94,27 +144,24 @@ def get_forecast(disease):
     if disease not in Config.DISEASES:
         return jsonify({'error': 'Disease not found'}), 404
     
-    # Select model based on type
-    if model_type == 'gru':
-        if disease not in models_gru:
-            return jsonify({'error': f'{disease} GRU model not loaded'}), 500
-        model = models_gru[disease]
-    else:
-        if disease not in models_lstm:
-            return jsonify({'error': f'{disease} LSTM model not loaded'}), 500
-        model = models_lstm[disease]
+    # Select model based on type (loaded on first request)
+    if model_type != 'gru':
+        model_type = 'lstm'
+    model = get_model(disease, model_type)
+    if model is None:
+        return jsonify({'error': f'{disease} {model_type.upper()} model not loaded'}), 500
     
     try:
         # Load historical data
-        data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+        data_file = data_file_for(disease)
         
         if not os.path.exists(data_file):
             return jsonify({'error': 'Historical data not found'}), 404
         
         # Process data
-        data_processor = data_processors[disease]
+        data_processor = get_data_processor(disease)
         df = data_processor.load_data(data_file)
-        scaled_data = data_processor.prepare_features(df)
+        scaled_data = data_processor.prepare_features(df, stats=load_stats(data_file))
         
         # Get last sequence for prediction
         last_sequence = scaled_data[-Config.SEQUENCE_LENGTH:]
@@ -159,7 +206,7 @@ def get_forecast(disease):
             'historical_cases': historical_cases,
             'alert_level': alert_level,
             'alert_message': alert_message,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'last_updated': data_timestamp(disease_files(disease))
         }
         
         return jsonify(response)
@@ -168,6 +215,7 @@ def get_forecast(disease):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/current_status')
+@cached_json(all_disease_files)
 def get_current_status():
     """Get current status for all diseases"""
     
@@ -175,11 +223,11 @@ def get_current_status():
     
     for disease in Config.DISEASES:
         try:
-            if disease not in models_lstm:
+            if not model_available(disease, 'lstm'):
                 continue
             
             # Load historical data
-            data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+            data_file = data_file_for(disease)
             
             if not os.path.exists(data_file):
                 continue
@@ -208,37 +256,38 @@ def get_current_status():
     return jsonify(status_data)
 
 @app.route('/api/compare_models/<disease>')
+@cached_json(disease_files)
 def compare_models(disease):
     """Compare LSTM vs GRU predictions for a disease"""
     
     if disease not in Config.DISEASES:
         return jsonify({'error': 'Disease not found'}), 404
     
-    if disease not in models_lstm or disease not in models_gru:
+    lstm_model = get_model(disease, 'lstm')
+    gru_model = get_model(disease, 'gru')
+    if lstm_model is None or gru_model is None:
         return jsonify({'error': f'Both models not loaded for {disease}'}), 500
     
     try:
         # Load historical data
-        data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+        data_file = data_file_for(disease)
         
         if not os.path.exists(data_file):
             return jsonify({'error': 'Historical data not found'}), 404
         
         # Process data
-        data_processor = data_processors[disease]
+        data_processor = get_data_processor(disease)
         df = data_processor.load_data(data_file)
-        scaled_data = data_processor.prepare_features(df)
+        scaled_data = data_processor.prepare_features(df, stats=load_stats(data_file))
         
         # Get last sequence for prediction
         last_sequence = scaled_data[-Config.SEQUENCE_LENGTH:]
         
         # Make LSTM forecast
-        lstm_model = models_lstm[disease]
         lstm_predictions = lstm_model.predict_future(last_sequence, n_days=Config.FORECAST_DAYS)
         lstm_cases = data_processor.inverse_transform_predictions(lstm_predictions)
         
         # Make GRU forecast
-        gru_model = models_gru[disease]
         gru_predictions = gru_model.predict_future(last_sequence, n_days=Config.FORECAST_DAYS)
         gru_cases = data_processor.inverse_transform_predictions(gru_predictions)
         
@@ -271,7 +320,7 @@ def compare_models(disease):
                 'lstm_avg': float(np.mean(lstm_cases)),
                 'gru_avg': float(np.mean(gru_cases))
             },
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'last_updated': data_timestamp(disease_files(disease))
         }
         
         return jsonify(response)
@@ -280,6 +329,7 @@ def compare_models(disease):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/climate_data/<disease>')
+@cached_json(lambda disease: [data_file_for(disease)])
 def get_climate_data(disease):
     """Get climate data for a disease"""
     
@@ -287,53 +337,45 @@ def get_climate_data(disease):
         return jsonify({'error': 'Disease not found'}), 404
     
     try:
-        data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+        data_file = data_file_for(disease)
         
         if not os.path.exists(data_file):
             return jsonify({'error': 'Data not found'}), 404
         
-        df = pd.read_csv(data_file, parse_dates=['date'])
+        # Only parse the columns this endpoint can return
+        df = pd.read_csv(data_file, parse_dates=['date'], usecols=lambda col: col in CLIMATE_COLUMNS)
         
         # Get last 30 days
         df_recent = df.tail(30)
-        
-        response = {
-            'dates': df_recent['date'].dt.strftime('%Y-%m-%d').tolist()
+        dates = df_recent['date'].dt.strftime('%Y-%m-%d').tolist()
+        
+        # Map CCHAIN format columns to expected format (tave -> temperature,
+        # precipitation -> rainfall), taking the first available source column
+        selected = []
+        for key, sources, decimals in CLIMATE_SERIES:
+            source = next((col for col in sources if col in df_recent.columns), None)
+            if source is not None:
+                selected.append((key, source, decimals))
+        
+        # Fill and convert all selected columns in one pass
+        source_cols = list(dict.fromkeys(source for _, source, _ in selected))
+        values = df_recent[source_cols].fillna(0).to_numpy(dtype=float)
+        col_index = {col: i for i, col in enumerate(source_cols)}
+        
+        series = {
+            key: np.round(values[:, col_index[source]], decimals).tolist()
+            for key, source, decimals in selected
         }
         
-        # Map CCHAIN format columns to expected format
-        # Temperature (use tave as temperature)
-        if 'tave' in df_recent.columns:
-            response['temperature'] = df_recent['tave'].fillna(0).round(1).tolist()
-        elif 'temperature' in df_recent.columns:
-            response['temperature'] = df_recent['temperature'].fillna(0).round(1).tolist()
+        # Humidity is not in the CCHAIN data: use a placeholder
+        if 'humidity' not in series:
+            series['humidity'] = [50.0] * len(df_recent)
         
-        # Humidity - calculate from available data or use default
-        if 'humidity' in df_recent.columns:
-            response['humidity'] = df_recent['humidity'].fillna(0).round(1).tolist()
-        else:
-            # Use a placeholder based on precipitation
-            response['humidity'] = [50.0] * len(df_recent)
-        
-        # Rainfall (use precipitation as rainfall)
-        if 'precipitation' in df_recent.columns:
-            response['rainfall'] = df_recent['precipitation'].fillna(0).round(1).tolist()
-        elif 'pr' in df_recent.columns:
-            response['rainfall'] = df_recent['pr'].fillna(0).round(1).tolist()
-        elif 'rainfall' in df_recent.columns:
-            response['rainfall'] = df_recent['rainfall'].fillna(0).round(1).tolist()
-        
-        # Add available climate features (CCHAIN format) - optional
-        if 'precipitation' in df_recent.columns:
-            response['precipitation'] = df_recent['precipitation'].fillna(0).round(2).tolist()
-        if 'precipitation_7day' in df_recent.columns:
-            response['precipitation_7day'] = df_recent['precipitation_7day'].fillna(0).round(2).tolist()
-        if 'precipitation_30day' in df_recent.columns:
-            response['precipitation_30day'] = df_recent['precipitation_30day'].fillna(0).round(2).tolist()
-        if 'spi3' in df_recent.columns:
-            response['spi3'] = df_recent['spi3'].fillna(0).round(2).tolist()
-        if 'precip_anomaly' in df_recent.columns:
-            response['precip_anomaly'] = df_recent['precip_anomaly'].fillna(0).round(2).tolist()
+        if request.args.get('format') == 'columnar':
+            return jsonify(columnar_payload(dates, series))
+        
+        response = {'dates': dates}
+        response.update(series)
         
         return jsonify(response)
         
@@ -341,6 +383,7 @@ def get_climate_data(disease):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/feature_factors/<disease>')
+@cached_json(lambda disease: [data_file_for(disease)])
 def get_feature_factors(disease):
     """Get feature importance/correlation data organized by category"""
     
@@ -348,29 +391,33 @@ def get_feature_factors(disease):
         return jsonify({'error': 'Disease not found'}), 404
     
     try:
-        data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+        data_file = data_file_for(disease)
         
         if not os.path.exists(data_file):
             return jsonify({'error': 'Data not found'}), 404
         
-        df = pd.read_csv(data_file, parse_dates=['date'])
-        
         # Calculate correlation with disease cases
         target_col = 'disease_cases'  # Column name is always 'disease_cases'
-        if target_col not in df.columns:
-            return jsonify({'error': 'Disease cases column not found'}), 404
-        
-        # Get correlations for all numeric features
+        stats = load_stats(data_file)
         correlations = {}
-        for col in df.columns:
-            if col not in ['date', target_col] and pd.api.types.is_numeric_dtype(df[col]):
-                # Calculate Pearson correlation
-                corr = df[col].corr(df[target_col])
-                if not pd.isna(corr):
-                    correlations[col] = abs(corr)  # Use absolute value to show strength regardless of direction
-        
-        # Get last 30 days for time-series display
-        df_recent = df.tail(30)
+        if stats is not None:
+            # Maintained incrementally by the ingestion endpoint
+            if target_col not in stats['columns']:
+                return jsonify({'error': 'Disease cases column not found'}), 404
+            for col, corr in correlations_from_stats(stats).items():
+                correlations[col] = abs(corr)
+        else:
+            df = pd.read_csv(data_file, parse_dates=['date'])
+            if target_col not in df.columns:
+                return jsonify({'error': 'Disease cases column not found'}), 404
+            
+            # Get correlations for all numeric features
+            for col in df.columns:
+                if col not in ['date', target_col] and pd.api.types.is_numeric_dtype(df[col]):
+                    # Calculate Pearson correlation
+                    corr = df[col].corr(df[target_col])
+                    if not pd.isna(corr):
+                        correlations[col] = abs(corr)  # Use absolute value to show strength regardless of direction
         
         # Organize features by category with time-series data
         feature_categories = {
@@ -491,9 +538,56 @@ def get_feature_factors(disease):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Without an ingest token, only requests from this machine may write data
+LOOPBACK_ADDRESSES = {'127.0.0.1', '::1'}
+
+def ingest_allowed():
+    """Whether the current request may append data (fails closed)"""
+    if Config.INGEST_TOKEN:
+        token = request.headers.get('X-Ingest-Token', '')
+        return hmac.compare_digest(token.encode(), Config.INGEST_TOKEN.encode())
+    return request.remote_addr in LOOPBACK_ADDRESSES
+
+@app.route('/api/ingest/<disease>', methods=['POST'])
+def ingest_data(disease):
+    """Append new daily observations for a disease
+    
+    Accepts a JSON list of rows, or {"rows": [...]}, each with a 'date',
+    'disease_cases' and any feature columns of the disease's data file.
+    Only this disease's data file changes, so only its forecasts and
+    charts get a new ETag.
+    """
+    if not ingest_allowed():
+        abort(403)
+    
+    if disease not in Config.DISEASES:
+        return jsonify({'error': 'Disease not found'}), 404
+    
+    payload = request.get_json(silent=True)
+    rows = payload.get('rows') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        return jsonify({'error': 'Expected a JSON list of rows'}), 400
+    
+    data_file = data_file_for(disease)
+    if not os.path.exists(data_file):
+        return jsonify({'error': 'Historical data not found'}), 404
+    
+    try:
+        summary = ingest_rows(data_file, rows)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    summary['disease'] = disease
+    summary['last_updated'] = data_timestamp([data_file])
+    return jsonify(summary)
+
 if __name__ == '__main__':
-    # Initialize models on startup
-    initialize_models()
+    # Models load lazily on the first forecast; optionally warm them in the
+    # background so the dashboard is served without waiting for TensorFlow
+    if Config.PRELOAD_MODELS:
+        threading.Thread(target=initialize_models, daemon=True).start()
     
     # Run Flask app
     print("\n" + "="*60)
@@ -1,12 +1,14 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
 import os
 
 class DataProcessor:
     """Process historical climate and health data for disease forecasting"""
     
     def __init__(self, sequence_length=30):
+        # Imported here to keep scikit-learn off the app's startup path
+        from sklearn.preprocessing import MinMaxScaler
+        
         self.sequence_length = sequence_length
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         
@@ -16,10 +18,10 @@ class DataProcessor:
         df = df.sort_values('date')
         return df
     
-    def prepare_features(self, df):
-        """Prepare features for model input - supports CCHAIN data format"""
+    def select_feature_columns(self, columns):
+        """Model input columns available in the data, disease_cases last"""
         # Check which feature columns are available
-        if 'temperature' in df.columns:
+        if 'temperature' in columns:
             # Original synthetic data format
             feature_columns = ['temperature', 'humidity', 'rainfall', 'disease_cases']
         else:
@@ -45,15 +47,26 @@ class DataProcessor:
                        'pharmacy_count', 'pharmacy_nearest',
                        'doctors_count', 'doctors_nearest',
                        'rwi_mean', 'rwi_median', 'rwi_std']:
-                if col in df.columns:
+                if col in columns:
                     available_features.append(col)
             
             # Always include disease_cases as the last feature
-            if 'disease_cases' in df.columns:
+            if 'disease_cases' in columns:
                 available_features.append('disease_cases')
             
             feature_columns = available_features
         
+        return feature_columns
+    
+    def prepare_features(self, df, stats=None):
+        """Prepare features for model input - supports CCHAIN data format
+        
+        stats are the ingestion statistics of the data file (app.ingest); when
+        given, the scaler is fitted from their stored min/max instead of a
+        pass over every row, which gives the same scaling.
+        """
+        feature_columns = self.select_feature_columns(df.columns)
+        
         # Handle missing values
         df_clean = df[feature_columns].copy()
         df_clean = df_clean.ffill().bfill().fillna(0)
@@ -61,7 +74,13 @@ class DataProcessor:
         features = df_clean.values
         
         # Normalize features
-        scaled_features = self.scaler.fit_transform(features)
+        ranges = [stats['minmax'].get(col) for col in feature_columns] if stats else None
+        if ranges and all(r is not None for r in ranges):
+            # Fitting on the [min, max] rows sets exactly the full-data range
+            self.scaler.fit(np.array(ranges, dtype=float).T)
+            scaled_features = self.scaler.transform(features)
+        else:
+            scaled_features = self.scaler.fit_transform(features)
         
         return scaled_features
     
@@ -0,0 +1,141 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, make_response
+
+try:
+    import brotli
+except ImportError:  # br is optional, gzip is always available
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+def data_version(paths):
+    """Version of a set of files derived from their size and modification time
+
+    Returns (version_hash, last_modified) where last_modified is the newest
+    mtime as an aware UTC datetime (None if no file exists).
+    """
+    digest = hashlib.sha1()
+    newest = None
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            digest.update(f'{path}:missing'.encode())
+            continue
+        digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size}'.encode())
+        if newest is None or stat.st_mtime > newest:
+            newest = stat.st_mtime
+
+    last_modified = None
+    if newest is not None:
+        # HTTP dates have one-second resolution
+        last_modified = datetime.fromtimestamp(int(newest), tz=timezone.utc)
+    return digest.hexdigest(), last_modified
+
+
+def _negotiate_encoding():
+    """Pick the best supported Content-Encoding from Accept-Encoding"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """Compress a response body in place with br or gzip if the client accepts it"""
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = _negotiate_encoding()
+    if encoding == 'br':
+        body = brotli.compress(body, quality=5)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=6)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def cached_json(version_paths):
+    """Make a JSON endpoint conditional on the files its payload is built from
+
+    version_paths is called with the view arguments and returns the data and
+    model files the response depends on. The ETag is derived from those files
+    plus the request path and query string, so an unchanged dataset answers
+    If-None-Match / If-Modified-Since with 304 before the view runs at all.
+    Successful responses are compressed with br or gzip when accepted.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, last_modified = data_version(version_paths(*args, **kwargs))
+            query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+            etag = hashlib.sha1(f'{version}|{request.path}|{query}'.encode()).hexdigest()[:20]
+
+            # Weak validator: the same entity may be sent with different encodings
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = (
+                    last_modified is not None
+                    and request.if_modified_since is not None
+                    and last_modified <= request.if_modified_since
+                )
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response = compress_response(response)
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Let browsers keep the body but revalidate on every poll
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
+
+
+def columnar_payload(dates, columns):
+    """Compact columnar encoding of aligned daily series
+
+    dates is a list of 'YYYY-MM-DD' strings and columns maps a series name to
+    a list of values of the same length. Consecutive daily dates collapse to
+    a start date and period count instead of one string per row.
+    """
+    names = list(columns)
+    payload = {
+        'format': 'columnar',
+        'columns': names,
+        'data': [columns[name] for name in names],
+    }
+
+    parsed = [datetime.strptime(d, '%Y-%m-%d').date() for d in dates]
+    is_daily = all((b - a).days == 1 for a, b in zip(parsed, parsed[1:]))
+    if parsed and is_daily:
+        payload['index'] = {'start': dates[0], 'periods': len(dates), 'freq': 'D'}
+    else:
+        payload['index'] = {'values': dates}
+    return payload
@@ -0,0 +1,339 @@
+"""
+Incremental ingestion of new daily observations
+
+New rows are appended to a disease's historical CSV without rewriting it, and
+the statistics the app derives from the full history are kept in a JSON
+sidecar next to the CSV (``<disease>_historical_data.stats.json``):
+
+- min/max of every numeric column after the app's ffill/bfill/fillna(0)
+  cleaning, which is exactly what the MinMaxScaler is fitted on
+- the last valid value of every column, so new rows can be forward-filled
+- the last values of the rolling-feature sources (precipitation, tave), so
+  precipitation_7day/30day and tave_7day/30day can be derived for new rows
+- per-column co-moments with disease_cases (n, means, M2, C) for the Pearson
+  correlations shown in the feature factors panel, merged with Chan's
+  parallel update
+
+Ingest cost is proportional to the new rows only. The sidecar records the
+size and mtime of the CSV it describes; if the CSV is changed by anything
+else it is considered stale and rebuilt with one full pass on next ingest.
+"""
+
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+TARGET_COLUMN = 'disease_cases'
+
+# Derived rolling means: (column, source column, window in days), computed
+# like the offline pipeline with rolling(window, min_periods=1).mean()
+ROLLING_FEATURES = [
+    ('precipitation_7day', 'precipitation', 7),
+    ('precipitation_30day', 'precipitation', 30),
+    ('tave_7day', 'tave', 7),
+    ('tave_30day', 'tave', 30),
+]
+TAIL_LENGTH = max(window for _, _, window in ROLLING_FEATURES) - 1
+
+STATS_VERSION = 2
+
+# Appends and sidecar updates must not interleave between request threads
+_ingest_lock = threading.Lock()
+
+
+def stats_file_for(data_file):
+    """Sidecar statistics file for a historical data CSV"""
+    root, _ = os.path.splitext(data_file)
+    return f'{root}.stats.json'
+
+
+def _file_signature(data_file):
+    stat = os.stat(data_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _to_json_value(value):
+    """float for JSON, with NaN stored as null"""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _to_array(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _moments(x, y):
+    """Co-moments of the pairwise non-NaN values of x and y"""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[mask], y[mask]
+    n = len(x)
+    if n == 0:
+        return {'n': 0, 'mean_x': 0.0, 'mean_y': 0.0, 'm2_x': 0.0, 'm2_y': 0.0, 'c_xy': 0.0}
+    mean_x, mean_y = x.mean(), y.mean()
+    dx, dy = x - mean_x, y - mean_y
+    return {
+        'n': int(n),
+        'mean_x': float(mean_x), 'mean_y': float(mean_y),
+        'm2_x': float(dx @ dx), 'm2_y': float(dy @ dy), 'c_xy': float(dx @ dy),
+    }
+
+
+def _merge_moments(a, b):
+    """Combine co-moments of two disjoint samples (Chan et al.)"""
+    if a['n'] == 0:
+        return b
+    if b['n'] == 0:
+        return a
+    n = a['n'] + b['n']
+    dx = b['mean_x'] - a['mean_x']
+    dy = b['mean_y'] - a['mean_y']
+    weight = a['n'] * b['n'] / n
+    return {
+        'n': n,
+        'mean_x': a['mean_x'] + dx * b['n'] / n,
+        'mean_y': a['mean_y'] + dy * b['n'] / n,
+        'm2_x': a['m2_x'] + b['m2_x'] + dx * dx * weight,
+        'm2_y': a['m2_y'] + b['m2_y'] + dy * dy * weight,
+        'c_xy': a['c_xy'] + b['c_xy'] + dx * dy * weight,
+    }
+
+
+def _clean(df):
+    """The cleaning DataProcessor.prepare_features applies before scaling"""
+    return df.ffill().bfill().fillna(0)
+
+
+def _numeric_columns(columns):
+    return [col for col in columns if col != 'date']
+
+
+def _write_stats(data_file, stats):
+    stats.update(_file_signature(data_file))
+    path = stats_file_for(data_file)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, path)
+
+
+def build_stats(data_file):
+    """Compute the sidecar statistics with one full pass over the CSV and save them"""
+    df = pd.read_csv(data_file)
+    columns = list(df.columns)
+    numeric = _numeric_columns(columns)
+    values = df[numeric].astype(float)
+    cleaned = _clean(values)
+
+    minmax = {}
+    for col in numeric:
+        if len(cleaned):
+            minmax[col] = [float(cleaned[col].min()), float(cleaned[col].max())]
+        else:
+            minmax[col] = None
+
+    last_valid = {}
+    for col in numeric:
+        valid = values[col].dropna()
+        last_valid[col] = float(valid.iloc[-1]) if len(valid) else None
+
+    sources = sorted({source for _, source, _ in ROLLING_FEATURES if source in numeric})
+    tail = {source: [_to_json_value(v) for v in values[source].tail(TAIL_LENGTH)] for source in sources}
+
+    correlation = {}
+    if TARGET_COLUMN in numeric:
+        y = values[TARGET_COLUMN].to_numpy()
+        for col in numeric:
+            if col != TARGET_COLUMN:
+                correlation[col] = _moments(values[col].to_numpy(), y)
+
+    stats = {
+        'version': STATS_VERSION,
+        'columns': columns,
+        # Columns the CSV stores as whole numbers, so appended rows are written the same way
+        'integer_columns': [col for col in numeric if pd.api.types.is_integer_dtype(df[col])],
+        'rows': len(df),
+        'last_date': str(df['date'].iloc[-1]) if len(df) else None,
+        'minmax': minmax,
+        'last_valid': last_valid,
+        'tail': tail,
+        'correlation': correlation,
+    }
+    _write_stats(data_file, stats)
+    return stats
+
+
+def load_stats(data_file):
+    """Sidecar statistics for a CSV, or None if missing or stale"""
+    try:
+        with open(stats_file_for(data_file)) as f:
+            stats = json.load(f)
+        signature = _file_signature(data_file)
+    except (OSError, ValueError):
+        return None
+    if stats.get('version') != STATS_VERSION:
+        return None
+    if stats.get('size') != signature['size'] or stats.get('mtime_ns') != signature['mtime_ns']:
+        return None
+    return stats
+
+
+def correlations_from_stats(stats):
+    """Pearson correlation of each column with disease_cases (NaN-pairwise, like pandas)"""
+    correlations = {}
+    for col, m in stats['correlation'].items():
+        if m['n'] < 2 or m['m2_x'] <= 0 or m['m2_y'] <= 0:
+            continue
+        correlations[col] = m['c_xy'] / math.sqrt(m['m2_x'] * m['m2_y'])
+    return correlations
+
+
+def _prepare_rows(rows, columns, last_date):
+    """Validate incoming rows and return them as a date-sorted DataFrame"""
+    if isinstance(rows, dict):
+        rows = [rows]
+    new = pd.DataFrame(rows)
+    if new.empty:
+        raise ValueError('No rows to ingest')
+    if 'date' not in new.columns:
+        raise ValueError("Every row needs a 'date'")
+    if TARGET_COLUMN not in new.columns or new[TARGET_COLUMN].isna().any():
+        raise ValueError(f"Every row needs '{TARGET_COLUMN}'")
+
+    unknown = sorted(set(new.columns) - set(columns))
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    try:
+        new['date'] = pd.to_datetime(new['date'], format='%Y-%m-%d')
+    except (ValueError, TypeError):
+        raise ValueError("Dates must be formatted as YYYY-MM-DD")
+    new = new.sort_values('date', kind='stable').reset_index(drop=True)
+    if new['date'].duplicated().any():
+        raise ValueError('Duplicate dates in ingested rows')
+    if last_date is not None and new['date'].iloc[0] <= pd.Timestamp(last_date):
+        raise ValueError(f'Rows must be newer than the last stored date ({last_date})')
+
+    numeric = _numeric_columns(columns)
+    try:
+        new[numeric] = new.reindex(columns=numeric).astype(float)
+    except (ValueError, TypeError):
+        raise ValueError('Feature values must be numeric')
+    return new[columns]
+
+
+def _rows_for_csv(new, stats):
+    """Copy of the new rows with whole-number columns written like the stored ones
+
+    A column that receives a fractional value is written as float and
+    dropped from stats['integer_columns'], like pandas would read it back.
+    """
+    out = new.copy()
+    integer_columns = []
+    for col in stats['integer_columns']:
+        values = new[col].dropna()
+        if (values == values.round()).all():
+            out[col] = new[col].astype('Int64')
+            integer_columns.append(col)
+    stats['integer_columns'] = integer_columns
+    return out
+
+
+def _derive_rolling(new, stats):
+    """Fill rolling features of new rows from the stored tail of their sources"""
+    derived = []
+    for col, source, window in ROLLING_FEATURES:
+        if col not in new.columns or source not in stats['tail']:
+            continue
+        history = _to_array(stats['tail'][source])[-(window - 1):]
+        series = pd.Series(np.concatenate([history, new[source].to_numpy()]))
+        rolled = series.rolling(window=window, min_periods=1).mean().to_numpy()[len(history):]
+        missing = new[col].isna().to_numpy()
+        if missing.any():
+            new.loc[missing, col] = rolled[missing]
+            derived.append(col)
+    return derived
+
+
+def _update_stats(stats, new):
+    numeric = _numeric_columns(stats['columns'])
+
+    # Scaler range over the cleaned values: new rows are forward-filled from
+    # the last stored value. A column with no valid value so far is all zeros
+    # in the history, unless new rows bring one, which the whole history is
+    # then back-filled with.
+    last_row = pd.DataFrame([{col: stats['last_valid'][col] for col in numeric}], dtype=float)
+    filled = pd.concat([last_row, new[numeric]], ignore_index=True).ffill().iloc[1:]
+    for col in numeric:
+        column = filled[col].bfill().fillna(0)
+        new_range = [float(column.min()), float(column.max())]
+        current = stats['minmax'][col]
+        history_backfilled = stats['last_valid'][col] is None and new[col].notna().any()
+        if current is None or history_backfilled:
+            stats['minmax'][col] = new_range
+        else:
+            stats['minmax'][col] = [min(current[0], new_range[0]), max(current[1], new_range[1])]
+
+        valid = new[col].dropna()
+        if len(valid):
+            stats['last_valid'][col] = float(valid.iloc[-1])
+
+    for source, tail in stats['tail'].items():
+        values = tail + [_to_json_value(v) for v in new[source]]
+        stats['tail'][source] = values[-TAIL_LENGTH:]
+
+    if stats['correlation']:
+        y = new[TARGET_COLUMN].to_numpy(dtype=float)
+        for col, m in stats['correlation'].items():
+            stats['correlation'][col] = _merge_moments(m, _moments(new[col].to_numpy(dtype=float), y))
+
+    stats['rows'] += len(new)
+    stats['last_date'] = new['date'].iloc[-1]
+
+
+def ingest_rows(data_file, rows):
+    """Append new daily rows to a historical data CSV and update its statistics
+
+    rows is a list of dicts (or a DataFrame's records) with a 'date'
+    (YYYY-MM-DD), 'disease_cases' and any of the CSV's feature columns.
+    Missing rolling features are derived from the stored history, other
+    missing features are left empty and forward-filled at prediction time.
+    Raises ValueError for invalid rows and FileNotFoundError if the CSV
+    does not exist.
+    """
+    if not os.path.exists(data_file):
+        raise FileNotFoundError(data_file)
+
+    with _ingest_lock:
+        stats = load_stats(data_file)
+        rebuilt = stats is None
+        if rebuilt:
+            stats = build_stats(data_file)
+
+        new = _prepare_rows(rows, stats['columns'], stats['last_date'])
+        derived = _derive_rolling(new, stats)
+        new['date'] = new['date'].dt.strftime('%Y-%m-%d')
+
+        with open(data_file, 'rb+') as f:
+            # Make sure the first new row starts on its own line
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        _rows_for_csv(new, stats).to_csv(data_file, mode='a', header=False, index=False)
+
+        _update_stats(stats, new)
+        _write_stats(data_file, stats)
+
+    return {
+        'rows_added': len(new),
+        'total_rows': stats['rows'],
+        'first_date': new['date'].iloc[0],
+        'last_date': stats['last_date'],
+        'derived_features': derived,
+        'stats_rebuilt': rebuilt,
+    }
@@ -1,10 +1,9 @@
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, GRU, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 import os
 
+# TensorFlow is imported inside the methods that need it so that importing
+# this module (e.g. from app.py) does not pay TensorFlow's startup cost.
+
 class DiseaseOutbreakModel:
     """LSTM/GRU model for disease outbreak forecasting"""
     
@@ -16,6 +15,9 @@ class DiseaseOutbreakModel:
         
     def build_model(self, units=64, dropout=0.3):
         """Build LSTM or GRU model architecture"""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, GRU, Dense, Dropout
+        
         model = Sequential()
         
         if self.model_type == 'LSTM':
@@ -51,6 +53,8 @@ class DiseaseOutbreakModel:
     
     def train(self, X_train, y_train, X_val, y_val, epochs=100, batch_size=32, model_path=None):
         """Train the model"""
+        from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+        
         if self.model is None:
             self.build_model()
         
@@ -103,6 +107,32 @@ class DiseaseOutbreakModel:
         
         return np.array(predictions)
     
+    def predict_future_batch(self, last_sequences, n_days=14):
+        """Predict multiple days into the future for a batch of sequences at once
+        
+        Same update rule as predict_future, but every step runs one forward
+        pass for the whole batch of shape (batch, sequence_length, n_features).
+        Returns predictions of shape (batch, n_days).
+        """
+        if self.model is None:
+            raise ValueError("Model not built or loaded")
+        
+        current_sequences = np.array(last_sequences, dtype=np.float32)
+        predictions = np.empty((len(current_sequences), n_days), dtype=np.float32)
+        
+        for day in range(n_days):
+            # Calling the model directly avoids predict()'s per-call setup cost
+            next_pred = np.asarray(self.model(current_sequences, training=False))[:, 0]
+            predictions[:, day] = next_pred
+            
+            # Shift every sequence by one day, repeating the last row with the prediction
+            new_rows = current_sequences[:, -1].copy()
+            new_rows[:, -1] = next_pred
+            current_sequences[:, :-1] = current_sequences[:, 1:]
+            current_sequences[:, -1] = new_rows
+        
+        return predictions
+    
     def save_model(self, filepath):
         """Save model to file"""
         if self.model is None:
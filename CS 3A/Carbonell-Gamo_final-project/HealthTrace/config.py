@@ -8,6 +8,12 @@ class Config:
     SEQUENCE_LENGTH = 30  # Use 30 days of historical data
     FORECAST_DAYS = 14    # Forecast 14 days ahead
     
+    # Load models in a background thread at startup instead of on the first forecast
+    PRELOAD_MODELS = os.environ.get('HEALTHTRACE_PRELOAD_MODELS', '0') == '1'
+    
+    # Shared secret for POST /api/ingest (sent as X-Ingest-Token); unset allows ingest from localhost only
+    INGEST_TOKEN = os.environ.get('HEALTHTRACE_INGEST_TOKEN')
+    
     # Model paths
     MODEL_PATH = os.path.join(os.path.dirname(__file__), 'app', 'models', 'disease_forecast_model.h5')
     DATA_PATH = os.path.join(os.path.dirname(__file__), 'app', 'data')
@@ -0,0 +1,99 @@
+"""
+Test incremental ingestion: appending rows must leave the data and its
+statistics exactly as if they had been recomputed from the full history
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from app.data_utils import DataProcessor
+from app.ingest import ROLLING_FEATURES, build_stats, correlations_from_stats, ingest_rows, load_stats
+
+SOURCE = os.path.join(PROJECT_ROOT, 'app', 'data', 'dengue_historical_data_full.csv')
+N_NEW = 45
+
+print("Testing incremental data ingestion")
+print("=" * 60)
+
+workdir = tempfile.mkdtemp()
+try:
+    full = pd.read_csv(SOURCE)
+    data_file = os.path.join(workdir, 'dengue_historical_data.csv')
+    full.iloc[:-N_NEW].to_csv(data_file, index=False)
+
+    # New rows arrive without their rolling features, in two batches
+    new_rows = full.iloc[-N_NEW:].drop(columns=[col for col, _, _ in ROLLING_FEATURES])
+    new_rows.loc[new_rows.index[3], 'tave'] = np.nan
+
+    print("\n1. Ingesting rows...")
+    first = ingest_rows(data_file, new_rows.iloc[:10].to_dict(orient='records'))
+    second = ingest_rows(data_file, new_rows.iloc[10:].to_dict(orient='records'))
+    assert first['stats_rebuilt'] and not second['stats_rebuilt']
+    assert second['total_rows'] == len(full)
+    print(f"   ✓ Appended {first['rows_added']} + {second['rows_added']} rows")
+
+    print("\n2. Checking derived rolling features...")
+    stored = pd.read_csv(data_file)
+    expected = full.copy()
+    expected.loc[expected.index[-N_NEW + 3], 'tave'] = np.nan
+    for col, source, window in ROLLING_FEATURES:
+        rolled = expected[source].rolling(window=window, min_periods=1).mean()
+        assert np.allclose(stored[col].tail(N_NEW), rolled.tail(N_NEW)), col
+    print(f"   ✓ {', '.join(col for col, _, _ in ROLLING_FEATURES)} match a full recompute")
+
+    print("\n3. Checking incremental statistics against a full rebuild...")
+    incremental = load_stats(data_file)
+    assert incremental is not None, "statistics should be fresh after ingest"
+    rebuilt = build_stats(data_file)
+    assert incremental['minmax'] == rebuilt['minmax']
+    assert incremental['tail'] == rebuilt['tail']
+    inc_corr, full_corr = correlations_from_stats(incremental), correlations_from_stats(rebuilt)
+    assert inc_corr.keys() == full_corr.keys()
+    assert all(abs(inc_corr[c] - full_corr[c]) < 1e-9 for c in inc_corr)
+    pandas_corr = stored.drop(columns='date').corr()['disease_cases']
+    assert all(abs(inc_corr[c] - pandas_corr[c]) < 1e-9 for c in inc_corr)
+    print(f"   ✓ Scaler ranges and {len(inc_corr)} correlations match")
+
+    print("\n4. Checking scaling from stored statistics...")
+    df = DataProcessor().load_data(data_file)
+    scaled_full = DataProcessor().prepare_features(df)
+    scaled_stats = DataProcessor().prepare_features(df, stats=incremental)
+    assert np.array_equal(scaled_full, scaled_stats)
+    print(f"   ✓ Identical scaled features {scaled_stats.shape}")
+
+    print("\n5. Checking invalid input is rejected...")
+    for rows in ([], [{'date': '2000-01-01', 'disease_cases': 1}], [{'date': '2099-01-01'}],
+                 [{'date': '2099-01-01', 'disease_cases': 1, 'unknown': 2}]):
+        try:
+            ingest_rows(data_file, rows)
+        except ValueError as e:
+            print(f"   ✓ Rejected: {e}")
+        else:
+            raise AssertionError(f"accepted invalid rows {rows}")
+    assert len(pd.read_csv(data_file)) == len(full)
+
+    print("\n6. Checking whole-number columns keep their format...")
+    counts_file = os.path.join(workdir, 'counts.csv')
+    pd.DataFrame({'date': ['2020-01-01', '2020-01-02'], 'disease_cases': [12, 15], 'tave': [27.5, 28.0]}).to_csv(
+        counts_file, index=False)
+    ingest_rows(counts_file, [{'date': '2020-01-03', 'disease_cases': 9, 'tave': 26.0},
+                              {'date': '2020-01-04', 'disease_cases': 11}])
+    with open(counts_file) as f:
+        lines = f.read().splitlines()
+    assert lines[-2:] == ['2020-01-03,9,26.0', '2020-01-04,11,'], lines
+    assert load_stats(counts_file)['integer_columns'] == build_stats(counts_file)['integer_columns'] == ['disease_cases']
+    ingest_rows(counts_file, [{'date': '2020-01-05', 'disease_cases': 2.5}])
+    assert load_stats(counts_file)['integer_columns'] == build_stats(counts_file)['integer_columns'] == []
+    print("   ✓ Integer columns are appended as integers until a fractional value arrives")
+finally:
+    shutil.rmtree(workdir)
+
+print("\n" + "=" * 60)
+print("All ingestion tests passed! ✓")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Startup regression test: the dashboard must not wait for TensorFlow
+
+Imports app.py in a fresh interpreter under `python -X importtime`, serves
+`/` and `/api/current_status` through the Flask test client, and checks that:
+
+1. TensorFlow/Keras (and scikit-learn) are not imported at startup
+2. the cumulative import time of app.py stays within budget
+3. the dashboard shell is served within budget of process start
+
+Budgets can be overridden with HEALTHTRACE_IMPORT_BUDGET_S and
+HEALTHTRACE_STARTUP_BUDGET_S for slower machines.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IMPORT_BUDGET_S = float(os.environ.get('HEALTHTRACE_IMPORT_BUDGET_S', '1.5'))
+STARTUP_BUDGET_S = float(os.environ.get('HEALTHTRACE_STARTUP_BUDGET_S', '2.0'))
+FORBIDDEN_PREFIXES = ('tensorflow', 'keras', 'sklearn')
+
+# app.py is shadowed by the app/ package, so load it by file path
+CHILD_CODE = """
+import time
+start = time.perf_counter()
+import importlib.util
+spec = importlib.util.spec_from_file_location('healthtrace_app', 'app.py')
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+client = module.app.test_client()
+index_status = client.get('/').status_code
+served = time.perf_counter()
+status_status = client.get('/api/current_status').status_code
+print(f'RESULT {imported - start:.4f} {served - start:.4f} {index_status} {status_status}')
+"""
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)')
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into (self_us, cumulative_us, depth, module) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # One leading space for top-level imports, two more per nesting level
+            rows.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, module))
+    return rows
+
+
+print("Testing HealthTrace startup time...")
+print("=" * 60)
+
+env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3', HEALTHTRACE_PRELOAD_MODELS='0')
+proc = subprocess.run(
+    [sys.executable, '-X', 'importtime', '-c', CHILD_CODE],
+    cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+)
+
+result_line = next((l for l in proc.stdout.splitlines() if l.startswith('RESULT')), None)
+if proc.returncode != 0 or result_line is None:
+    print("✗ Failed to start the app")
+    print(proc.stdout)
+    print(proc.stderr[-3000:])
+    sys.exit(1)
+
+_, import_s, served_s, index_status, status_status = result_line.split()
+import_s, served_s = float(import_s), float(served_s)
+rows = parse_importtime(proc.stderr)
+failures = []
+
+# Test 1: heavy ML libraries stay off the startup path
+print("\n1. Checking imported modules...")
+forbidden = sorted({m for _, _, _, m in rows if m.split('.')[0] in FORBIDDEN_PREFIXES})
+if forbidden:
+    print(f"✗ Imported at startup: {', '.join(forbidden[:10])}")
+    failures.append('forbidden imports')
+else:
+    print(f"✓ No {'/'.join(FORBIDDEN_PREFIXES)} imports at startup ({len(rows)} modules imported)")
+
+# Test 2: import time budget
+print("\n2. Checking import time...")
+if import_s > IMPORT_BUDGET_S:
+    print(f"✗ app.py import took {import_s:.2f}s (budget {IMPORT_BUDGET_S:.2f}s)")
+    failures.append('import time')
+else:
+    print(f"✓ app.py import took {import_s:.2f}s (budget {IMPORT_BUDGET_S:.2f}s)")
+
+# Test 3: time until the dashboard shell is served
+print("\n3. Checking time to first response...")
+if index_status != '200' or status_status != '200':
+    print(f"✗ Unexpected status codes: / -> {index_status}, /api/current_status -> {status_status}")
+    failures.append('status codes')
+elif served_s > STARTUP_BUDGET_S:
+    print(f"✗ '/' served after {served_s:.2f}s (budget {STARTUP_BUDGET_S:.2f}s)")
+    failures.append('startup time')
+else:
+    print(f"✓ '/' served after {served_s:.2f}s (budget {STARTUP_BUDGET_S:.2f}s)")
+
+# Startup profile: slowest top-level imports
+print("\nStartup profile (top-level imports by cumulative time):")
+print(f"{'─'*60}")
+top_level = sorted((r for r in rows if r[2] == 0), key=lambda r: r[1], reverse=True)
+for _, cumulative_us, _, module in top_level[:15]:
+    print(f"  {module:<40} {cumulative_us / 1000:>10.1f} ms")
+print(f"{'─'*60}")
+
+print("\n" + "=" * 60)
+if failures:
+    print(f"✗ Startup regression: {', '.join(failures)}")
+    sys.exit(1)
+print("All startup tests passed! ✓")
@@ -0,0 +1,76 @@
+"""
+Append new daily observations to a disease's historical data
+
+Command-line counterpart of POST /api/ingest/<disease>. Reads new rows from
+a CSV or JSON file (a list of row objects) and appends them to
+app/data/<disease>_historical_data.csv, updating the statistics sidecar
+incrementally instead of rerunning the offline preparation scripts.
+
+Usage:
+    python scripts/utilities/ingest_data.py --disease Dengue --input new_rows.csv
+    python scripts/utilities/ingest_data.py --disease Dengue --rebuild-stats
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Add project root to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from app.ingest import build_stats, ingest_rows, stats_file_for
+from config import Config
+
+
+def read_rows(path):
+    """Rows to ingest from a .csv or .json file"""
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            payload = json.load(f)
+        return payload.get('rows', []) if isinstance(payload, dict) else payload
+    # Keep dates as strings, they are validated by the ingester
+    df = pd.read_csv(path, dtype={'date': str})
+    return df.to_dict(orient='records')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append new daily observations for a disease')
+    parser.add_argument('--disease', required=True, choices=Config.DISEASES)
+    parser.add_argument('--input', help='CSV or JSON file with the new rows')
+    parser.add_argument('--rebuild-stats', action='store_true',
+                        help='Recompute the statistics sidecar with a full pass over the data')
+    args = parser.parse_args()
+
+    if not args.input and not args.rebuild_stats:
+        parser.error('nothing to do: pass --input and/or --rebuild-stats')
+
+    data_file = os.path.join(Config.DATA_PATH, f'{args.disease.lower()}_historical_data.csv')
+    if not os.path.exists(data_file):
+        print(f"✗ {args.disease} data file not found at {data_file}")
+        sys.exit(1)
+
+    if args.rebuild_stats:
+        stats = build_stats(data_file)
+        print(f"✓ Rebuilt {os.path.basename(stats_file_for(data_file))} ({stats['rows']} rows)")
+
+    if args.input:
+        try:
+            summary = ingest_rows(data_file, read_rows(args.input))
+        except ValueError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+
+        print(f"✓ Appended {summary['rows_added']} rows to {os.path.basename(data_file)} "
+              f"({summary['first_date']} to {summary['last_date']}, {summary['total_rows']} total)")
+        if summary['derived_features']:
+            print(f"  Derived: {', '.join(summary['derived_features'])}")
+        if summary['stats_rebuilt']:
+            print("  Statistics were missing or stale and have been rebuilt")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+"""
+Rolling-origin (walk-forward) backtest of the 14-day forecasts
+
+train_model.py and compare_models.py score next-day predictions on a single
+chronological holdout. This script evaluates the forecast the dashboard
+actually shows - the 14-day autoregressive rollout of predict_future - from
+every forecast origin in the evaluation period:
+
+- the scaled history is windowed with numpy's sliding_window_view, so the
+  thousands of 30-day input windows and 14-day target windows are views of
+  one array instead of copies
+- the evaluation period is split into contiguous folds of origins; all the
+  origins of a fold are rolled out together with predict_future_batch, one
+  forward pass per forecast day instead of one per origin and day
+- folds run in parallel worker processes, each loading the data and model
+  once
+- with --retrain, each fold trains a fresh model on the data before its
+  first origin (expanding window) instead of using the served model
+
+Errors are reported in cases per forecast horizon (day 1..14), per fold and
+over all folds, as JSON and CSV in backtest_results/. As in the app, the
+scaler is fitted on the whole history.
+
+Usage:
+    python scripts/verification/backtest_models.py
+    python scripts/verification/backtest_models.py --diseases Dengue --folds 20 --workers 4
+    python scripts/verification/backtest_models.py --retrain --epochs 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from app.data_utils import DataProcessor
+from app.model import DiseaseOutbreakModel
+from config import Config
+
+ARCHITECTURES = ['LSTM', 'GRU']
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'backtest_results')
+
+# Per-process state, set up once by the pool initializer
+_worker = {}
+
+
+def model_path_for(disease, architecture):
+    """Path of the trained .h5 file served by app.py"""
+    suffix = 'lstm' if architecture == 'LSTM' else 'gru'
+    return os.path.join(PROJECT_ROOT, 'app', 'models', f'{disease.lower()}_forecast_{suffix}.h5')
+
+
+def load_series(disease):
+    """Dates, scaled features and the fitted DataProcessor for a disease"""
+    data_processor = DataProcessor(sequence_length=Config.SEQUENCE_LENGTH)
+    data_file = os.path.join(Config.DATA_PATH, f'{disease.lower()}_historical_data.csv')
+    df = data_processor.load_data(data_file)
+    scaled = data_processor.prepare_features(df).astype(np.float32)
+    return df['date'].to_numpy(), scaled, data_processor
+
+
+def make_windows(scaled, sequence_length, horizon):
+    """Zero-copy input and target windows over the scaled history
+
+    inputs[i] is scaled[i:i + sequence_length] and targets[t] is the scaled
+    disease_cases of days t..t + horizon - 1, so the forecast made at origin t
+    (the first forecast day) reads inputs[t - sequence_length] and is scored
+    against targets[t].
+    """
+    inputs = sliding_window_view(scaled, (sequence_length, scaled.shape[1]))[:, 0]
+    targets = sliding_window_view(scaled[:, -1], horizon)
+    return inputs, targets
+
+
+def make_folds(n_rows, sequence_length, horizon, n_folds, initial_fraction, step):
+    """Split the forecast origins into contiguous folds
+
+    Origins run from the end of the initial period to the last day that still
+    has a full horizon of observed targets, every `step` days.
+    """
+    first = max(sequence_length, int(n_rows * initial_fraction))
+    last = n_rows - horizon
+    if first > last:
+        raise ValueError(f"Not enough data for a {horizon}-day backtest after {first} rows")
+    origins = np.arange(first, last + 1, step)
+    n_folds = min(n_folds, len(origins))
+    return [chunk for chunk in np.array_split(origins, n_folds) if len(chunk)]
+
+
+def _init_worker(disease, architecture, settings):
+    """Load the data (and the served model) once per worker process"""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(settings['threads'])
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    dates, scaled, data_processor = load_series(disease)
+    inputs, targets = make_windows(scaled, Config.SEQUENCE_LENGTH, settings['horizon'])
+    _worker.update(
+        disease=disease, architecture=architecture, settings=settings,
+        dates=dates, inputs=inputs, targets=targets, data_processor=data_processor,
+        n_features=scaled.shape[1], model=None,
+    )
+
+    if not settings['retrain']:
+        model = DiseaseOutbreakModel(
+            sequence_length=Config.SEQUENCE_LENGTH,
+            n_features=scaled.shape[1],
+            model_type=architecture
+        )
+        model.load_model(model_path_for(disease, architecture))
+        _worker['model'] = model
+
+
+def _train_fold_model(first_origin):
+    """Train a fresh model on every sequence whose target precedes first_origin"""
+    settings = _worker['settings']
+    inputs, targets = _worker['inputs'], _worker['targets']
+    n_train = first_origin - Config.SEQUENCE_LENGTH
+    X, y = inputs[:n_train], targets[Config.SEQUENCE_LENGTH:first_origin, 0]
+    n_val = max(1, int(len(X) * 0.1))
+
+    model = DiseaseOutbreakModel(
+        sequence_length=Config.SEQUENCE_LENGTH,
+        n_features=_worker['n_features'],
+        model_type=_worker['architecture']
+    )
+    model.build_model()
+    model.train(X[:-n_val], y[:-n_val], X[-n_val:], y[-n_val:],
+                epochs=settings['epochs'], batch_size=32)
+    return model
+
+
+def _to_cases(data_processor, values):
+    """Inverse-scale disease_cases of any shape"""
+    return data_processor.inverse_transform_predictions(values.reshape(-1)).reshape(values.shape)
+
+
+def horizon_errors(abs_errors, sq_errors):
+    """Per-horizon MAE and RMSE from summed absolute and squared errors"""
+    return {
+        'mae': abs_errors['sum'] / abs_errors['n'],
+        'rmse': np.sqrt(sq_errors['sum'] / sq_errors['n']),
+    }
+
+
+def run_fold(fold_id, origins):
+    """Roll out the forecast from every origin of a fold and sum its errors"""
+    settings = _worker['settings']
+    horizon = settings['horizon']
+    start = time.perf_counter()
+
+    model = _worker['model']
+    if model is None:
+        model = _train_fold_model(int(origins[0]))
+    train_s = time.perf_counter() - start
+
+    abs_sum = np.zeros(horizon)
+    sq_sum = np.zeros(horizon)
+    for i in range(0, len(origins), settings['batch_size']):
+        batch = origins[i:i + settings['batch_size']]
+        # Fancy indexing copies only this batch; the rollout updates it in place
+        predicted = model.predict_future_batch(
+            _worker['inputs'][batch - Config.SEQUENCE_LENGTH], n_days=horizon
+        )
+        errors = (_to_cases(_worker['data_processor'], predicted)
+                  - _to_cases(_worker['data_processor'], _worker['targets'][batch]))
+        abs_sum += np.abs(errors).sum(axis=0)
+        sq_sum += np.square(errors).sum(axis=0)
+
+    dates = _worker['dates']
+    return {
+        'fold': fold_id,
+        'first_origin': str(pd.Timestamp(dates[origins[0]]).date()),
+        'last_origin': str(pd.Timestamp(dates[origins[-1]]).date()),
+        'n_origins': len(origins),
+        'abs_error_sum': abs_sum.tolist(),
+        'sq_error_sum': sq_sum.tolist(),
+        'train_s': train_s,
+        'elapsed_s': time.perf_counter() - start,
+    }
+
+
+def backtest(disease, architecture, settings):
+    """Run every fold of one disease/architecture in a process pool"""
+    _, scaled, _ = load_series(disease)
+    folds = make_folds(len(scaled), Config.SEQUENCE_LENGTH, settings['horizon'],
+                       settings['folds'], settings['initial_fraction'], settings['step'])
+
+    workers = min(settings['workers'], len(folds))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(disease, architecture, settings)) as executor:
+        futures = [executor.submit(run_fold, i, origins) for i, origins in enumerate(folds)]
+        fold_results = [future.result() for future in futures]
+
+    horizon = settings['horizon']
+    total_abs, total_sq, total_n = np.zeros(horizon), np.zeros(horizon), 0
+    for fold in fold_results:
+        n = fold['n_origins']
+        fold.update({k: v.tolist() for k, v in horizon_errors(
+            {'sum': np.array(fold.pop('abs_error_sum')), 'n': n},
+            {'sum': np.array(fold.pop('sq_error_sum')), 'n': n}
+        ).items()})
+        total_abs += np.array(fold['mae']) * n
+        total_sq += np.square(fold['rmse']) * n
+        total_n += n
+
+    overall = horizon_errors({'sum': total_abs, 'n': total_n}, {'sum': total_sq, 'n': total_n})
+    return {
+        'disease': disease,
+        'architecture': architecture,
+        'n_origins': total_n,
+        'mae': overall['mae'].tolist(),
+        'rmse': overall['rmse'].tolist(),
+        'folds': fold_results,
+    }
+
+
+def to_rows(results):
+    """Long-format rows (one per scope and horizon) for the CSV report"""
+    rows = []
+    for result in results:
+        scopes = [('all', None, None, result['n_origins'], result)]
+        scopes += [(str(f['fold']), f['first_origin'], f['last_origin'], f['n_origins'], f)
+                   for f in result['folds']]
+        for fold, first, last, n, metrics in scopes:
+            for h, (mae, rmse) in enumerate(zip(metrics['mae'], metrics['rmse']), start=1):
+                rows.append({
+                    'disease': result['disease'], 'architecture': result['architecture'],
+                    'fold': fold, 'first_origin': first, 'last_origin': last,
+                    'n_origins': n, 'horizon': h, 'mae': mae, 'rmse': rmse,
+                })
+    return rows
+
+
+def print_summary(results, horizon):
+    marks = sorted({1, 7, horizon} & set(range(1, horizon + 1)))
+    print(f"\n{'─'*80}")
+    header = ' '.join(f"{'MAE d' + str(h):<10} {'RMSE d' + str(h):<10}" for h in marks)
+    print(f"{'Case':<22} {'Origins':<8} {header}")
+    print(f"{'─'*80}")
+    for r in results:
+        label = f"{r['disease']}/{r['architecture']}"
+        if 'error' in r:
+            print(f"{label:<22} ✗ {r['error']}")
+            continue
+        cells = ' '.join(f"{r['mae'][h-1]:<10.2f} {r['rmse'][h-1]:<10.2f}" for h in marks)
+        print(f"{label:<22} {r['n_origins']:<8} {cells}")
+    print(f"{'─'*80}\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Rolling-origin backtest of HealthTrace forecasts')
+    parser.add_argument('--diseases', nargs='+', default=Config.DISEASES)
+    parser.add_argument('--architectures', nargs='+', default=ARCHITECTURES, choices=ARCHITECTURES)
+    parser.add_argument('--folds', type=int, default=10)
+    parser.add_argument('--initial-fraction', type=float, default=0.5,
+                        help='Share of the history before the first forecast origin (default: 0.5)')
+    parser.add_argument('--step', type=int, default=1, help='Days between forecast origins')
+    parser.add_argument('--horizon', type=int, default=Config.FORECAST_DAYS)
+    parser.add_argument('--batch-size', type=int, default=512,
+                        help='Origins rolled out together in one batch')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--retrain', action='store_true',
+                        help='Train a fresh model per fold on the data before its first origin')
+    parser.add_argument('--epochs', type=int, default=20, help='Epochs per fold with --retrain')
+    parser.add_argument('--output', help='Output path without extension (default: backtest_results/backtest_<timestamp>)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = {
+        'folds': args.folds,
+        'initial_fraction': args.initial_fraction,
+        'step': args.step,
+        'horizon': args.horizon,
+        'batch_size': args.batch_size,
+        'workers': args.workers,
+        'threads': max(1, (os.cpu_count() or 1) // args.workers),
+        'retrain': args.retrain,
+        'epochs': args.epochs,
+    }
+
+    print("\n" + "="*80)
+    print("HEALTHTRACE ROLLING-ORIGIN BACKTEST")
+    print(f"Folds: {args.folds}, Horizon: {args.horizon} days, Workers: {args.workers}, "
+          f"Mode: {'retrain per fold' if args.retrain else 'served models'}")
+    print("="*80)
+
+    results = []
+    for disease in args.diseases:
+        for architecture in args.architectures:
+            if not args.retrain and not os.path.exists(model_path_for(disease, architecture)):
+                print(f"✗ {disease} {architecture} model not found, skipping")
+                continue
+            print(f"\nBacktesting {disease} {architecture}...")
+            start = time.perf_counter()
+            try:
+                result = backtest(disease, architecture, settings)
+                elapsed = time.perf_counter() - start
+                print(f"✓ {result['n_origins']} origins in {len(result['folds'])} folds, {elapsed:.1f}s "
+                      f"(day 1 MAE {result['mae'][0]:.2f}, day {args.horizon} MAE {result['mae'][-1]:.2f})")
+            except Exception as e:
+                result = {'disease': disease, 'architecture': architecture,
+                          'error': f"{type(e).__name__}: {e}"}
+                print(f"✗ {result['error']}")
+            results.append(result)
+
+    print_summary(results, args.horizon)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    with open(f'{output}.json', 'w') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'settings': settings,
+                   'results': results}, f, indent=2)
+    pd.DataFrame(to_rows([r for r in results if 'error' not in r])).to_csv(f'{output}.csv', index=False)
+    print(f"✓ Results saved to: {output}.json and {output}.csv")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+"""
+Reproducible inference benchmark for the HealthTrace forecasting models
+
+compare_models.py times a single predict() over the train and validation
+sets. This harness measures every disease x architecture x runtime
+combination (Keras, tf.function, TFLite) with warmup runs and repetitions:
+
+- cold load time (load + runtime build + first prediction)
+- single-request latency (one 30-day window)
+- batched throughput at several batch sizes
+- 14-day autoregressive rollout latency (same update rule as predict_future)
+- peak resident memory and model size
+
+Each combination runs in a fresh process so cold-load time and peak RSS are
+not polluted by earlier runs. Results are written as JSON to
+benchmark_results/ and compared against a stored baseline; any regression
+beyond the tolerance makes the script exit with status 1.
+
+Usage:
+    python scripts/verification/benchmark_models.py
+    python scripts/verification/benchmark_models.py --diseases Dengue --runtimes keras tflite
+    python scripts/verification/benchmark_models.py --save-baseline
+    python scripts/verification/benchmark_models.py --baseline benchmark_results/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from config import Config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ARCHITECTURES = ['LSTM', 'GRU']
+RUNTIMES = ['keras', 'tf_function', 'tflite']
+BATCH_SIZES = [1, 8, 32, 128]
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmark_results')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Metric paths where a larger value is a regression; throughput is checked separately
+LOWER_IS_BETTER = [
+    ('cold_load_s',),
+    ('single_latency_s', 'median'),
+    ('rollout_latency_s', 'median'),
+    ('peak_rss_mb',),
+]
+
+
+def summarize(samples):
+    """Median and tail percentiles of a list of timings (seconds)"""
+    ordered = sorted(samples)
+    return {
+        'median': statistics.median(ordered),
+        'p90': float(np.percentile(ordered, 90)),
+        'p99': float(np.percentile(ordered, 99)),
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'min': ordered[0],
+        'max': ordered[-1],
+        'repeats': len(ordered),
+    }
+
+
+def time_call(fn, warmup, repeats):
+    """Run fn warmup times untimed, then return repeats wall-clock timings"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux and bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def model_path_for(disease, architecture):
+    """Path of the trained .h5 file served by app.py"""
+    suffix = 'lstm' if architecture == 'LSTM' else 'gru'
+    return os.path.join(PROJECT_ROOT, 'app', 'models', f'{disease.lower()}_forecast_{suffix}.h5')
+
+
+def load_windows(disease, sequence_length, n_features, n_windows, seed):
+    """Scaled input windows for a disease, or seeded synthetic ones if the data is missing"""
+    try:
+        from compare_models import load_and_prepare_data
+        X_train, X_val, _, _, _ = load_and_prepare_data(disease)
+        X = np.concatenate([X_train, X_val]).astype(np.float32)
+        if X.shape[1:] == (sequence_length, n_features):
+            # Tile so the largest batch size always has enough windows
+            reps = int(np.ceil(n_windows / len(X)))
+            return np.tile(X, (reps, 1, 1))[:n_windows], 'historical_data'
+    except (FileNotFoundError, ImportError, ValueError):
+        pass
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_windows, sequence_length, n_features), dtype=np.float32)
+    return X, 'synthetic'
+
+
+def build_runtime(runtime, keras_model):
+    """Return (predict_fn, size_bytes) for a runtime wrapping a loaded Keras model"""
+    import tensorflow as tf
+
+    if runtime == 'keras':
+        return (lambda x: keras_model.predict(x, verbose=0)), None
+
+    if runtime == 'tf_function':
+        spec = tf.TensorSpec([None] + list(keras_model.input_shape[1:]), tf.float32)
+        fn = tf.function(lambda x: keras_model(x, training=False), input_signature=[spec])
+        return (lambda x: fn(tf.constant(x)).numpy()), None
+
+    if runtime == 'tflite':
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        # Recurrent layers need the TF fallback ops and un-lowered tensor lists
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS,
+        ]
+        converter._experimental_lower_tensor_list_ops = False
+        tflite_model = converter.convert()
+        interpreter = tf.lite.Interpreter(model_content=tflite_model)
+        input_index = interpreter.get_input_details()[0]['index']
+        output_index = interpreter.get_output_details()[0]['index']
+        state = {'shape': None}
+
+        def predict(x):
+            if state['shape'] != x.shape:
+                interpreter.resize_tensor_input(input_index, x.shape)
+                interpreter.allocate_tensors()
+                state['shape'] = x.shape
+            interpreter.set_tensor(input_index, x)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_index)
+
+        return predict, len(tflite_model)
+
+    raise ValueError(f"Unknown runtime: {runtime}")
+
+
+def rollout(predict_fn, last_sequence, n_days):
+    """Autoregressive forecast with the same update rule as DiseaseOutbreakModel.predict_future"""
+    predictions = []
+    current_sequence = last_sequence.copy()
+    for _ in range(n_days):
+        next_pred = predict_fn(current_sequence[np.newaxis])
+        predictions.append(next_pred[0, 0])
+        new_row = current_sequence[-1].copy()
+        new_row[-1] = next_pred[0, 0]
+        current_sequence = np.vstack([current_sequence[1:], new_row])
+    return np.array(predictions)
+
+
+def run_case(case, settings):
+    """Benchmark one disease/architecture/runtime combination (runs in a child process)"""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    result = dict(case)
+    path = model_path_for(case['disease'], case['architecture'])
+    result['model_path'] = os.path.relpath(path, PROJECT_ROOT)
+    result['model_size_bytes'] = os.path.getsize(path)
+
+    start = time.perf_counter()
+    import tensorflow as tf
+    result['tf_import_s'] = time.perf_counter() - start
+    result['tf_version'] = tf.__version__
+
+    start = time.perf_counter()
+    keras_model = tf.keras.models.load_model(path, compile=False)
+    predict_fn, runtime_size = build_runtime(case['runtime'], keras_model)
+    result['load_s'] = time.perf_counter() - start
+    if runtime_size is not None:
+        result['runtime_size_bytes'] = runtime_size
+
+    sequence_length, n_features = keras_model.input_shape[1:]
+    X, input_source = load_windows(
+        case['disease'], sequence_length, n_features, max(settings['batch_sizes']), settings['seed']
+    )
+    result['input_source'] = input_source
+    result['input_shape'] = [sequence_length, n_features]
+
+    start = time.perf_counter()
+    predict_fn(X[:1])
+    result['first_predict_s'] = time.perf_counter() - start
+    result['cold_load_s'] = result['load_s'] + result['first_predict_s']
+
+    warmup, repeats = settings['warmup'], settings['repeats']
+
+    single = X[:1]
+    result['single_latency_s'] = summarize(time_call(lambda: predict_fn(single), warmup, repeats))
+
+    result['throughput'] = {}
+    for batch_size in settings['batch_sizes']:
+        batch = X[:batch_size]
+        stats = summarize(time_call(lambda: predict_fn(batch), warmup, repeats))
+        result['throughput'][str(batch_size)] = {
+            'latency_s': stats,
+            'samples_per_s': batch_size / stats['median'],
+        }
+
+    last_sequence = X[-1]
+    # A rollout is FORECAST_DAYS predictions, so fewer repeats keep runtime bounded
+    rollout_repeats = max(3, repeats // 5)
+    result['rollout_days'] = settings['forecast_days']
+    result['rollout_latency_s'] = summarize(time_call(
+        lambda: rollout(predict_fn, last_sequence, settings['forecast_days']),
+        min(warmup, 2), rollout_repeats
+    ))
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_isolated(case, settings):
+    """Run a case in a fresh spawned process so cold start and RSS are isolated"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, case, settings).result()
+
+
+def case_key(result):
+    return (result['disease'], result['architecture'], result['runtime'])
+
+
+def lookup(result, path):
+    value = result
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_to_baseline(results, baseline, tolerance, requested=None):
+    """Return a list of human-readable regressions versus a baseline run
+
+    A case that errored in this run, or a baseline case of the requested
+    set (all cases if requested is None) that is missing from it, is a
+    regression too: a runtime that stops working must fail the run.
+    """
+    baseline_cases = {case_key(r): r for r in baseline['results'] if 'error' not in r}
+    current_keys = {case_key(r) for r in results}
+    regressions = []
+
+    for key in baseline_cases:
+        if key not in current_keys and (requested is None or key in requested):
+            regressions.append(f"{'/'.join(key)}: missing from this run (benchmarked in the baseline)")
+
+    for result in results:
+        label = '/'.join(case_key(result))
+        if 'error' in result:
+            was = 'passed' if case_key(result) in baseline_cases else 'not in baseline'
+            regressions.append(f"{label}: {result['error']} ({was})")
+            continue
+        if case_key(result) not in baseline_cases:
+            continue
+        base = baseline_cases[case_key(result)]
+
+        checks = [(path, 'lower') for path in LOWER_IS_BETTER]
+        checks += [(('throughput', bs, 'samples_per_s'), 'higher') for bs in result['throughput']]
+
+        for path, direction in checks:
+            current, previous = lookup(result, path), lookup(base, path)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            if (direction == 'lower' and change > tolerance) or \
+               (direction == 'higher' and -change > tolerance):
+                regressions.append(
+                    f"{label} {'.'.join(path)}: {previous:.4g} -> {current:.4g} ({change:+.1%})"
+                )
+    return regressions
+
+
+def print_summary(results):
+    print(f"\n{'─'*100}")
+    print(f"{'Case':<32} {'Cold (s)':<10} {'p50 1x (ms)':<12} {'p99 1x (ms)':<12} "
+          f"{'Max thru (/s)':<14} {'Rollout (ms)':<13} {'RSS (MB)':<8}")
+    print(f"{'─'*100}")
+    for r in results:
+        label = '/'.join(case_key(r))
+        if 'error' in r:
+            print(f"{label:<32} ✗ {r['error']}")
+            continue
+        best = max(t['samples_per_s'] for t in r['throughput'].values())
+        rss = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else 'n/a'
+        print(f"{label:<32} {r['cold_load_s']:<10.2f} "
+              f"{r['single_latency_s']['median']*1000:<12.2f} "
+              f"{r['single_latency_s']['p99']*1000:<12.2f} "
+              f"{best:<14,.0f} {r['rollout_latency_s']['median']*1000:<13.1f} {rss:<8}")
+    print(f"{'─'*100}\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark HealthTrace forecasting models')
+    parser.add_argument('--diseases', nargs='+', default=Config.DISEASES)
+    parser.add_argument('--architectures', nargs='+', default=ARCHITECTURES, choices=ARCHITECTURES)
+    parser.add_argument('--runtimes', nargs='+', default=RUNTIMES, choices=RUNTIMES)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=BATCH_SIZES)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON output path (default: benchmark_results/benchmark_<timestamp>.json)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Baseline JSON to compare against (skipped if missing)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative regression before failing (default: 0.25)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store this run as the new baseline')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = {
+        'warmup': args.warmup,
+        'repeats': args.repeats,
+        'batch_sizes': sorted(args.batch_sizes),
+        'seed': args.seed,
+        'forecast_days': Config.FORECAST_DAYS,
+    }
+
+    print("\n" + "="*80)
+    print("HEALTHTRACE MODEL BENCHMARK")
+    print(f"Warmup: {args.warmup}, Repeats: {args.repeats}, Batch sizes: {settings['batch_sizes']}")
+    print("="*80)
+
+    results = []
+    for disease in args.diseases:
+        for architecture in args.architectures:
+            model_found = os.path.exists(model_path_for(disease, architecture))
+            if not model_found:
+                print(f"✗ {disease} {architecture} model not found")
+            for runtime in args.runtimes:
+                case = {'disease': disease, 'architecture': architecture, 'runtime': runtime}
+                if not model_found:
+                    results.append(dict(case, error='Model not found'))
+                    continue
+                print(f"\nBenchmarking {disease} {architecture} ({runtime})...")
+                try:
+                    result = run_isolated(case, settings)
+                    print(f"✓ median {result['single_latency_s']['median']*1000:.2f} ms, "
+                          f"rollout {result['rollout_latency_s']['median']*1000:.1f} ms")
+                except Exception as e:
+                    result = dict(case, error=f"{type(e).__name__}: {e}")
+                    print(f"✗ {result['error']}")
+                results.append(result)
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': settings,
+        'results': results,
+    }
+
+    print_summary(results)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Results saved to: {output}")
+
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline updated: {DEFAULT_BASELINE}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    requested = {(disease, architecture, runtime) for disease in args.diseases
+                 for architecture in args.architectures for runtime in args.runtimes}
+    regressions = compare_to_baseline(results, baseline, args.tolerance, requested)
+
+    if regressions:
+        print("\n" + "!"*80)
+        print(f"✗ PERFORMANCE REGRESSION vs {args.baseline} (tolerance {args.tolerance:.0%})")
+        print("!"*80)
+        for line in regressions:
+            print(f"  ✗ {line}")
+        return 1
+
+    print(f"✓ No regressions vs baseline (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
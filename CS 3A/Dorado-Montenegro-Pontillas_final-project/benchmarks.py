@@ -0,0 +1,257 @@
+"""
+Benchmarks for the Hate Speech Detection Pipeline
+Measures throughput on the unified dataset and checks output parity
+
+Usage:
+    python benchmarks.py preprocess [--rows 80586] [--n-jobs 4]
+    python benchmarks.py encode [--rows 80586] [--batch-size 64]
+    python benchmarks.py bucketing [--rows 80586] [--max-batches 300]
+"""
+
+import argparse
+import itertools
+import os
+import re
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from bucket_sampler import BucketBatchSampler, sorted_collate_fn
+from load_unified_dataset import UnifiedDatasetLoader
+from rnn_model import BiLSTMHateSpeechClassifier
+from text_preprocessing import TextPreprocessor, Vocabulary
+
+
+# Size of the unified dataset used for training (model_summary.json)
+UNIFIED_DATASET_SIZE = 80586
+
+# Inputs that exercise the order of the substitutions
+EDGE_CASES = [
+    '', '   ', 'a@http://x', '@http://x.com hi', '#@user', '@#tag', '##double', '#a#b',
+    'www.site.com/@user', 'visit https://t.co/abc#frag now', 'HTTP://UPPER.COM',
+    'ñoño @José #Kapayapaan', 'emoji 😀 #😀 @😀', 'tab\tand\nnewline', 'end with #',
+    'punct!!! ... ?!', 'mixed@mid word#mid', ' nbsp space',
+]
+
+
+def reference_preprocess(text, lowercase=True, remove_urls=True, remove_mentions=True,
+                         remove_hashtags=False, remove_punctuation=False):
+    """The original uncompiled preprocessing, kept as the parity reference"""
+    if not isinstance(text, str):
+        text = str(text)
+    if lowercase:
+        text = text.lower()
+    if remove_urls:
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    if remove_mentions:
+        text = re.sub(r'@\w+', '', text)
+    if remove_hashtags:
+        text = re.sub(r'#\w+', '', text)
+    else:
+        text = re.sub(r'#(\w+)', r'\1', text)
+    if remove_punctuation:
+        text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def reference_encode(vocab, texts, max_length=100):
+    """The original per-word lookup and per-row padding loop, as used by the notebook"""
+    unk_idx = vocab.word2idx[vocab.UNK_TOKEN]
+    sequences = []
+    for text in texts:
+        sequence = [vocab.word2idx.get(word, unk_idx) for word in text.split()]
+        sequences.append(sequence[:max_length] or [unk_idx])
+    lengths = [len(seq) for seq in sequences]
+    padded = np.zeros((len(sequences), max(lengths)), dtype=np.int64)
+    for i, (seq, length) in enumerate(zip(sequences, lengths)):
+        padded[i, :length] = seq
+    return padded, np.array(lengths, dtype=np.int64)
+
+
+def reference_collate(batch):
+    """The notebook's collate_fn: unsorted batch padded to its longest text"""
+    ids, lengths, labels = zip(*batch)
+    lengths = torch.from_numpy(np.array(lengths))
+    padded_seqs = torch.from_numpy(np.stack(ids)[:, :int(lengths.max())]).long()
+    return padded_seqs, lengths, torch.FloatTensor(labels)
+
+
+def load_texts(rows=None):
+    """Texts of the unified dataset (the available sources), tiled to `rows` if given"""
+    loader = UnifiedDatasetLoader()
+    texts = []
+    for load in (loader.load_hatespeech_dataset, loader.load_tiktok_dataset,
+                 loader.load_english_cyberbullying_dataset):
+        try:
+            texts.extend(load()['text'].tolist())
+        except FileNotFoundError as e:
+            print(f"  - Skipping missing source: {os.path.basename(e.filename or str(e))}")
+    if rows:
+        texts = (texts * (rows // len(texts) + 1))[:rows]
+    return texts
+
+
+def timed(fn, repeats=3):
+    """Best wall-clock time of fn over a few runs, and its last result"""
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_preprocess(args):
+    print("=" * 60)
+    print("BENCHMARK: TEXT PREPROCESSING")
+    print("=" * 60)
+    texts = load_texts(args.rows)
+    print(f"Texts: {len(texts):,}")
+
+    # Parity for every flag combination on the dataset and edge cases
+    flag_names = ['lowercase', 'remove_urls', 'remove_mentions', 'remove_hashtags', 'remove_punctuation']
+    sample = texts[:5000] + EDGE_CASES + [None, 3.5]
+    for values in itertools.product([False, True], repeat=len(flag_names)):
+        flags = dict(zip(flag_names, values))
+        preprocessor = TextPreprocessor(**flags)
+        expected = [reference_preprocess(t, **flags) for t in sample]
+        assert preprocessor.preprocess_batch(sample) == expected, f"output differs for {flags}"
+    print("✓ Identical output for all 32 flag combinations")
+
+    preprocessor = TextPreprocessor()
+    reference_time, expected = timed(lambda: [reference_preprocess(t) for t in texts])
+    compiled_time, processed = timed(lambda: preprocessor.preprocess_batch(texts))
+    assert processed == expected
+
+    print(f"\n{'Implementation':<28} {'Time (s)':<10} {'Texts/s':<12} {'Speedup':<8}")
+    print("-" * 60)
+    print(f"{'reference (re.sub)':<28} {reference_time:<10.3f} {len(texts) / reference_time:<12,.0f} {'1.00x':<8}")
+    print(f"{'compiled':<28} {compiled_time:<10.3f} {len(texts) / compiled_time:<12,.0f} "
+          f"{reference_time / compiled_time:.2f}x")
+
+    if args.n_jobs != 1:
+        parallel_time, processed = timed(lambda: preprocessor.preprocess_batch(texts, n_jobs=args.n_jobs))
+        assert processed == expected
+        print(f"{f'compiled, n_jobs={args.n_jobs}':<28} {parallel_time:<10.3f} "
+              f"{len(texts) / parallel_time:<12,.0f} {reference_time / parallel_time:.2f}x")
+    print("=" * 60)
+
+
+def bench_encode(args):
+    print("=" * 60)
+    print("BENCHMARK: VOCABULARY ENCODING")
+    print("=" * 60)
+    vocab = Vocabulary.load(args.vocab)
+    texts = TextPreprocessor().preprocess_batch(load_texts(args.rows))
+    print(f"Texts: {len(texts):,}")
+
+    expected_ids, expected_lengths = reference_encode(vocab, texts)
+    ids, lengths = vocab.encode_batch(texts)
+    assert np.array_equal(ids, expected_ids) and np.array_equal(lengths, expected_lengths)
+    print("✓ Identical ids and lengths")
+
+    batches = [texts[i:i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+    cases = [
+        ('reference, corpus', lambda: reference_encode(vocab, texts)),
+        ('encode_batch, corpus', lambda: vocab.encode_batch(texts)),
+        (f'reference, batches of {args.batch_size}', lambda: [reference_encode(vocab, b) for b in batches]),
+        (f'encode_batch, batches of {args.batch_size}', lambda: [vocab.encode_batch(b) for b in batches]),
+        ('reference, single post', lambda: [reference_encode(vocab, [t]) for t in texts[:5000]]),
+        ('encode_batch, single post', lambda: [vocab.encode_batch([t]) for t in texts[:5000]]),
+    ]
+
+    print(f"\n{'Implementation':<34} {'Time (s)':<10} {'Texts/s':<12}")
+    print("-" * 60)
+    for name, fn in cases:
+        elapsed, _ = timed(fn)
+        n = 5000 if 'single' in name else len(texts)
+        print(f"{name:<34} {elapsed:<10.3f} {n / elapsed:<12,.0f}")
+    print("=" * 60)
+
+
+def bench_bucketing(args):
+    print("=" * 60)
+    print("BENCHMARK: LENGTH-BUCKETED TRAINING BATCHES")
+    print("=" * 60)
+    from torch.utils.data import DataLoader
+
+    torch.set_num_threads(args.threads or torch.get_num_threads())
+    vocab = Vocabulary.load(args.vocab)
+    texts = TextPreprocessor().preprocess_batch(load_texts(args.rows))
+    ids, lengths = vocab.encode_batch(texts, max_length=100, pad_to_max_length=True)
+    labels = np.random.default_rng(0).integers(0, 2, size=len(texts)).tolist()
+    dataset = list(zip(ids, lengths, labels))
+    print(f"Texts: {len(texts):,}, mean length {lengths.mean():.1f}")
+
+    loaders = [
+        ('shuffled (notebook)', DataLoader(dataset, batch_size=args.batch_size, shuffle=True,
+                                           collate_fn=reference_collate), False),
+        ('bucketed, sorted', DataLoader(dataset, collate_fn=sorted_collate_fn,
+                                        batch_sampler=BucketBatchSampler(lengths, args.batch_size)), True),
+    ]
+
+    print(f"\n{'Batching':<22} {'Padding eff.':<14} {'Batches':<9} {'Time (s)':<10} {'Epoch est. (s)':<15} {'Speedup':<8}")
+    print("-" * 70)
+    baseline = None
+    for name, loader, enforce_sorted in loaders:
+        torch.manual_seed(0)
+        model = BiLSTMHateSpeechClassifier(vocab_size=len(vocab), pad_idx=vocab.word2idx[vocab.PAD_TOKEN])
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+        criterion = nn.BCEWithLogitsLoss()
+        model.train()
+
+        real = padded = 0
+        n_batches = min(len(loader), args.max_batches or len(loader))
+        start = time.perf_counter()
+        for batch_idx, (batch_texts, batch_lengths, batch_labels) in enumerate(loader):
+            if batch_idx == n_batches:
+                break
+            real += int(batch_lengths.sum())
+            padded += batch_texts.numel()
+            optimizer.zero_grad()
+            loss = criterion(model(batch_texts, batch_lengths, enforce_sorted=enforce_sorted).squeeze(1),
+                             batch_labels)
+            loss.backward()
+            optimizer.step()
+        elapsed = time.perf_counter() - start
+
+        epoch = elapsed * len(loader) / n_batches
+        baseline = baseline or epoch
+        print(f"{name:<22} {real / padded:<14.1%} {n_batches:<9} {elapsed:<10.2f} {epoch:<15.1f} "
+              f"{baseline / epoch:.2f}x")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hate speech pipeline benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    preprocess = subparsers.add_parser('preprocess', help='TextPreprocessor throughput and parity')
+    preprocess.add_argument('--rows', type=int, default=UNIFIED_DATASET_SIZE,
+                            help='Tile the available texts to this many rows')
+    preprocess.add_argument('--n-jobs', type=int, default=-1)
+    preprocess.set_defaults(func=bench_preprocess)
+
+    encode = subparsers.add_parser('encode', help='Vocabulary.encode_batch throughput and parity')
+    encode.add_argument('--rows', type=int, default=UNIFIED_DATASET_SIZE)
+    encode.add_argument('--vocab', default='vocabulary.pkl')
+    encode.add_argument('--batch-size', type=int, default=64)
+    encode.set_defaults(func=bench_encode)
+
+    bucketing = subparsers.add_parser('bucketing', help='Training epoch time with length-bucketed batches')
+    bucketing.add_argument('--rows', type=int, default=UNIFIED_DATASET_SIZE)
+    bucketing.add_argument('--vocab', default='vocabulary.pkl')
+    bucketing.add_argument('--batch-size', type=int, default=64)
+    bucketing.add_argument('--max-batches', type=int, default=None,
+                           help='Time only this many batches and extrapolate to an epoch')
+    bucketing.add_argument('--threads', type=int, default=None, help='torch intra-op threads')
+    bucketing.set_defaults(func=bench_bucketing)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Bulk Hate Speech Scoring for Large Comment Dumps
+Streams a CSV or JSONL file through a pool of BiLSTM scorers
+
+The input is read in chunks. Each chunk is preprocessed, encoded and scored
+by one worker process; every worker loads the model once and uses its own
+share of the CPU threads. Scores are appended to the output in input order
+and a checkpoint is written after every chunk, so an interrupted run
+continues where it stopped.
+
+Usage:
+    python bulk_score.py comments.csv                          # -> comments_scores.csv
+    python bulk_score.py comments.jsonl --text-column body --id-column id --workers 4
+    python bulk_score.py comments.csv --resume                 # continue after an interruption
+"""
+
+import argparse
+import collections
+import csv
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import torch
+
+from moderation_cache import model_version
+from moderation_service import MODEL_PATH, THRESHOLD, VOCAB_PATH, HateSpeechScorer
+
+
+# Set in each worker process by _init_worker
+_scorer = None
+
+
+def _init_worker(model_path, vocab_path, threads, batch_size):
+    """Load the scorer once per worker and limit its torch threads"""
+    global _scorer
+    torch.set_num_threads(threads)
+    _scorer = HateSpeechScorer.from_files(model_path, vocab_path, max_batch_size=batch_size)
+
+
+def _score_chunk(texts):
+    return _scorer.score_batch(texts)
+
+
+def read_chunks(path, chunk_size, text_column, id_column=None, skip_rows=0):
+    """Yield (ids, texts) chunks of a CSV or JSONL file, after skipping skip_rows rows"""
+    columns = [text_column] + ([id_column] if id_column else [])
+
+    if path.endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            records = []
+            row = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                row += 1
+                if row <= skip_rows:
+                    continue
+                records.append(json.loads(line))
+                if len(records) == chunk_size:
+                    yield _split_chunk(pd.DataFrame.from_records(records), text_column, id_column, row - len(records))
+                    records = []
+            if records:
+                yield _split_chunk(pd.DataFrame.from_records(records), text_column, id_column, row - len(records))
+        return
+
+    reader = pd.read_csv(path, usecols=columns, chunksize=chunk_size, dtype={text_column: str},
+                         keep_default_na=False)
+    start = 0
+    for chunk in reader:
+        # Rows are skipped after parsing: quoted texts may span several lines
+        if start + len(chunk) <= skip_rows:
+            start += len(chunk)
+            continue
+        if start < skip_rows:
+            chunk = chunk.iloc[skip_rows - start:]
+            start = skip_rows
+        yield _split_chunk(chunk, text_column, id_column, start)
+        start += len(chunk)
+
+
+def _split_chunk(df, text_column, id_column, start):
+    texts = df[text_column].fillna('').astype(str).tolist()
+    ids = df[id_column].tolist() if id_column else list(range(start, start + len(df)))
+    return ids, texts
+
+
+class Checkpoint:
+    """Rows scored so far and the output size they correspond to"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, state):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def bulk_score(input_path, output_path, text_column='text', id_column=None, model_path=MODEL_PATH,
+               vocab_path=VOCAB_PATH, workers=None, threads_per_worker=None, chunk_size=10000,
+               batch_size=256, threshold=THRESHOLD, resume=False):
+    """
+    Score every row of input_path and write id, probability, is_hate to output_path
+
+    Returns (rows scored in this run, seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Load once here: a missing or broken model fails now instead of inside every worker
+    init_args = (model_path, vocab_path, threads_per_worker, batch_size)
+    _init_worker(*init_args)
+
+    # Everything that decides what is written: a resumed run must match it exactly
+    config = {
+        'input': os.path.abspath(input_path),
+        'text_column': text_column,
+        'id_column': id_column,
+        'model': os.path.abspath(model_path),
+        'model_version': model_version(model_path, vocab_path),
+        'threshold': threshold,
+    }
+    checkpoint = Checkpoint(output_path + '.checkpoint')
+    state = checkpoint.load() if resume else None
+    if state is not None:
+        changed = [key for key, value in config.items() if state.get(key) != value]
+        if changed:
+            raise ValueError(f"Checkpoint {checkpoint.path} was written with a different {', '.join(changed)}; "
+                             f"remove it or drop --resume")
+    elif resume and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        raise ValueError(f"{output_path} has no checkpoint, so it is already complete; drop --resume to score again")
+    if state is None:
+        state = {**config, 'rows': 0, 'output_bytes': 0}
+
+    # Drop anything written after the last checkpoint
+    with open(output_path, 'a+b') as f:
+        f.truncate(state['output_bytes'])
+
+    print(f"Scoring {input_path} -> {output_path}")
+    print(f"  Workers: {workers} x {threads_per_worker} torch thread(s), chunks of {chunk_size:,} rows")
+    if state['rows']:
+        print(f"  Resuming after {state['rows']:,} rows")
+
+    pool = None
+    if workers > 1:
+        # spawn: forking a process that already initialised torch's thread pools can hang.
+        # A worker that fails to start breaks the executor (BrokenProcessPool) instead of being respawned.
+        pool = ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn'),
+                                   initializer=_init_worker, initargs=init_args)
+
+    chunks = read_chunks(input_path, chunk_size, text_column, id_column, skip_rows=state['rows'])
+    # At most 2 chunks per worker are in flight, so memory stays bounded on huge inputs
+    pending = collections.deque()
+    rows_done = 0
+    start = time.perf_counter()
+
+    try:
+        with open(output_path, 'a', newline='', encoding='utf-8') as out:
+            writer = csv.writer(out)
+            if state['output_bytes'] == 0:
+                writer.writerow([id_column or 'row', 'probability', 'is_hate'])
+
+            def write_next():
+                nonlocal rows_done
+                ids, result = pending.popleft()
+                probabilities = result.result() if pool else result
+                writer.writerows((row_id, f'{p:.6f}', int(p > threshold)) for row_id, p in zip(ids, probabilities))
+                out.flush()
+                os.fsync(out.fileno())
+
+                rows_done += len(ids)
+                state['rows'] += len(ids)
+                state['output_bytes'] = out.tell()
+                checkpoint.save(state)
+
+                elapsed = time.perf_counter() - start
+                print(f"  {state['rows']:,} rows ({rows_done / elapsed:,.0f} rows/s)", flush=True)
+
+            for ids, texts in chunks:
+                result = pool.submit(_score_chunk, texts) if pool else _score_chunk(texts)
+                pending.append((ids, result))
+                if len(pending) >= 2 * workers:
+                    write_next()
+            while pending:
+                write_next()
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    checkpoint.remove()
+    return rows_done, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV/JSONL dump of comments for hate speech')
+    parser.add_argument('input', help='CSV or JSONL (.jsonl/.ndjson) file')
+    parser.add_argument('--output', default=None, help='Output CSV (default: <input>_scores.csv)')
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--id-column', default=None, help='Column to copy to the output (default: row number)')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--vocab', default=VOCAB_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help='torch intra-op threads per worker (default: CPUs / workers)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per worker task')
+    parser.add_argument('--batch-size', type=int, default=256, help='Posts per forward pass')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--resume', action='store_true', help='Continue from the last checkpoint')
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + '_scores.csv'
+    if os.path.exists(output) and not args.resume:
+        os.remove(output)
+
+    print("=" * 60)
+    print("BULK HATE SPEECH SCORING")
+    print("=" * 60)
+    try:
+        rows, elapsed = bulk_score(
+            args.input, output, text_column=args.text_column, id_column=args.id_column,
+            model_path=args.model, vocab_path=args.vocab, workers=args.workers,
+            threads_per_worker=args.threads_per_worker, chunk_size=args.chunk_size,
+            batch_size=args.batch_size, threshold=args.threshold, resume=args.resume
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    print(f"\n✓ Scored {rows:,} rows in {elapsed:.1f} s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"  Output: {output}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
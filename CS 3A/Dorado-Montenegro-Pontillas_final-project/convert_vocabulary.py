@@ -0,0 +1,77 @@
+"""
+Convert a pickled vocabulary to the compact memory-mappable .vocab format
+
+Usage:
+    python convert_vocabulary.py                          # vocabulary.pkl -> vocabulary.vocab
+    python convert_vocabulary.py old.pkl new.vocab
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from text_preprocessing import CompactVocabulary, Vocabulary
+
+
+# Measured in a fresh interpreter so the numbers are not skewed by this process
+MEASURE_CODE = """
+import sys, time, tracemalloc
+from text_preprocessing import Vocabulary
+tracemalloc.start()
+start = time.perf_counter()
+vocab = Vocabulary.load(sys.argv[1])
+vocab.encode_batch(['sample text'])
+elapsed = time.perf_counter() - start
+retained, peak = tracemalloc.get_traced_memory()
+print(f'RESULT {elapsed:.6f} {retained / 2**20:.2f} {peak / 2**20:.2f}')
+"""
+
+
+def measure_load(path):
+    """(seconds to load and encode one post, retained MB, peak MB) in a fresh process"""
+    proc = subprocess.run([sys.executable, '-c', MEASURE_CODE, path],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    line = next((l for l in proc.stdout.splitlines() if l.startswith('RESULT')), None)
+    if line is None:
+        return None, None, None
+    _, elapsed, retained, peak = line.split()
+    return float(elapsed), float(retained), float(peak)
+
+
+def convert(source, destination):
+    """Write source as a compact vocabulary and check that every id maps back"""
+    vocab = Vocabulary.load(source)
+    vocab.save_compact(destination)
+
+    compact = CompactVocabulary(destination)
+    if compact.word2idx != vocab.word2idx:
+        raise ValueError("Converted vocabulary does not match the source")
+    if (compact.max_vocab_size, compact.min_freq) != (vocab.max_vocab_size, vocab.min_freq):
+        raise ValueError("Converted vocabulary settings do not match the source")
+    print(f"✓ Verified {len(compact):,} words")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a pickled vocabulary to the compact .vocab format')
+    parser.add_argument('source', nargs='?', default='vocabulary.pkl')
+    parser.add_argument('destination', nargs='?', default=None,
+                        help='Output path (default: source with a .vocab extension)')
+    args = parser.parse_args()
+
+    destination = args.destination or os.path.splitext(args.source)[0] + CompactVocabulary.EXTENSION
+    convert(args.source, destination)
+
+    print(f"\n{'Format':<10} {'Size (KB)':<12} {'Load (ms)':<12} {'Heap (MB)':<12} {'Peak heap (MB)':<14}")
+    print("-" * 62)
+    for name, path in [('pickle', args.source), ('compact', destination)]:
+        elapsed, retained, peak = measure_load(path)
+        if elapsed is None:
+            print(f"{name:<10} ✗ measurement failed")
+            continue
+        print(f"{name:<10} {os.path.getsize(path) / 1024:<12.1f} {elapsed * 1000:<12.1f} "
+              f"{retained:<12.1f} {peak:<14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Export the BiLSTM classifier for CPU serving
+Writes a TorchScript model, optionally with int8 dynamic quantization of the
+LSTM and Linear layers, then checks accuracy parity on the notebook's test
+split and benchmarks latency against the eager float32 model
+
+Usage:
+    python export_model.py                      # best_bilstm_model.pt -> best_bilstm_model.ts
+    python export_model.py --quantize           # -> best_bilstm_model_int8.ts
+    python export_model.py --quantize --skip-parity --threads 1
+
+The app and moderation_service.py load the exports with rnn_model.load_classifier.
+"""
+
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+import torch
+import torch.nn as nn
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+
+from load_unified_dataset import UnifiedDatasetLoader
+from rnn_model import TORCHSCRIPT_EXTENSION, load_classifier
+from text_preprocessing import TextPreprocessor, Vocabulary
+
+
+MAX_LENGTH = 100
+THRESHOLD = 0.5
+
+# Largest allowed drop in test accuracy or F1 before the export is reported as failing
+MAX_METRIC_DROP = 0.005
+
+
+def export(model, output_path, quantize=False):
+    """Script the model (after int8 dynamic quantization if requested) and save it"""
+    if quantize:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        scripted = torch.jit.script(model)
+    torch.jit.save(scripted, output_path)
+    return load_classifier(output_path)
+
+
+def load_test_split(vocab):
+    """Encoded test split, built exactly as in the training notebook (80/20, stratified, seed 42)"""
+    combined_df = UnifiedDatasetLoader().load_all_datasets()
+    combined_df['processed_text'] = TextPreprocessor().preprocess_batch(combined_df['text'], n_jobs=-1)
+    combined_df = combined_df[combined_df['processed_text'].str.strip() != '']
+
+    _, test_texts, _, test_labels = train_test_split(
+        combined_df['processed_text'].tolist(),
+        combined_df['label'].tolist(),
+        test_size=0.2,
+        random_state=42,
+        stratify=combined_df['label']
+    )
+    ids, lengths = vocab.encode_batch(test_texts, max_length=MAX_LENGTH)
+    return ids, lengths, np.array(test_labels)
+
+
+def score(model, ids, lengths, batch_size=256):
+    """Hate speech probabilities for pre-encoded posts, batched in input order"""
+    probabilities = np.empty(len(lengths), dtype=np.float32)
+    with torch.inference_mode():
+        for start in range(0, len(lengths), batch_size):
+            batch_lengths = lengths[start:start + batch_size]
+            text_tensor = torch.from_numpy(ids[start:start + batch_size, :batch_lengths.max()])
+            probabilities[start:start + batch_size] = model.predict(
+                text_tensor, torch.from_numpy(batch_lengths)).numpy()
+    return probabilities
+
+
+def parity_report(models, ids, lengths, labels):
+    """Accuracy, F1 and agreement of each model with the first (reference) model"""
+    print(f"\n{'Model':<18} {'Accuracy':<10} {'F1':<10} {'Max |Δp|':<10} {'Agreement':<10}")
+    print("-" * 60)
+    reference = None
+    passed = True
+    for name, model in models:
+        probabilities = score(model, ids, lengths)
+        predictions = (probabilities > THRESHOLD).astype(int)
+        accuracy = accuracy_score(labels, predictions)
+        f1 = f1_score(labels, predictions)
+        if reference is None:
+            reference = (probabilities, predictions, accuracy, f1)
+        diff = np.abs(probabilities - reference[0]).max()
+        agreement = (predictions == reference[1]).mean()
+        print(f"{name:<18} {accuracy:<10.4f} {f1:<10.4f} {diff:<10.2e} {agreement:<10.2%}")
+        if reference[2] - accuracy > MAX_METRIC_DROP or reference[3] - f1 > MAX_METRIC_DROP:
+            passed = False
+    return passed
+
+
+def latency_report(models, ids, lengths, batch_sizes=(1, 64), repeats=200):
+    """p50/p95 latency per forward pass and posts/sec for each batch size"""
+    rng = np.random.default_rng(0)
+    print(f"\n{'Model':<18} {'Batch':<7} {'p50 (ms)':<10} {'p95 (ms)':<10} {'Posts/s':<10}")
+    print("-" * 60)
+    for batch_size in batch_sizes:
+        # Same sampled batches for every model, each padded to its own longest post
+        batches = []
+        for _ in range(repeats):
+            rows = rng.choice(len(lengths), size=batch_size)
+            batch_lengths = lengths[rows]
+            batches.append((torch.from_numpy(ids[rows, :batch_lengths.max()]),
+                            torch.from_numpy(batch_lengths)))
+        for name, model in models:
+            with torch.inference_mode():
+                for text_tensor, length_tensor in batches[:10]:
+                    model.predict(text_tensor, length_tensor)
+                times = []
+                for text_tensor, length_tensor in batches:
+                    start = time.perf_counter()
+                    model.predict(text_tensor, length_tensor)
+                    times.append(time.perf_counter() - start)
+            times = np.array(times) * 1000
+            print(f"{name:<18} {batch_size:<7} {np.percentile(times, 50):<10.2f} "
+                  f"{np.percentile(times, 95):<10.2f} {batch_size * 1000 / times.mean():<10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the BiLSTM classifier to TorchScript')
+    parser.add_argument('--model', default='best_bilstm_model.pt', help='Training checkpoint (state_dict)')
+    parser.add_argument('--vocab', default='vocabulary.pkl')
+    parser.add_argument('--output', default=None,
+                        help='Output path (default: best_bilstm_model[_int8].ts next to the checkpoint)')
+    parser.add_argument('--quantize', action='store_true', help='int8 dynamic quantization of LSTM and Linear')
+    parser.add_argument('--skip-parity', action='store_true', help='Benchmark on random posts instead')
+    parser.add_argument('--threads', type=int, default=None, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    suffix = '_int8' if args.quantize else ''
+    output = args.output or os.path.splitext(args.model)[0] + suffix + TORCHSCRIPT_EXTENSION
+
+    print("=" * 60)
+    print("EXPORTING BiLSTM CLASSIFIER")
+    print("=" * 60)
+    vocab = Vocabulary.load(args.vocab)
+    eager = load_classifier(args.model, pad_idx=vocab.word2idx[vocab.PAD_TOKEN])
+    exported = export(eager, output, quantize=args.quantize)
+    print(f"✓ Saved {output}")
+    print(f"  Checkpoint: {os.path.getsize(args.model) / 2**20:.2f} MB")
+    print(f"  Export:     {os.path.getsize(output) / 2**20:.2f} MB")
+
+    models = [('eager float32', eager), ('torchscript int8' if args.quantize else 'torchscript', exported)]
+
+    if args.skip_parity:
+        rng = np.random.default_rng(0)
+        lengths = rng.integers(1, MAX_LENGTH + 1, size=5000)
+        ids = rng.integers(4, len(vocab), size=(5000, MAX_LENGTH)).astype(np.int32)
+    else:
+        print("\nLoading test split...")
+        ids, lengths, labels = load_test_split(vocab)
+        print(f"✓ Test samples: {len(labels):,}")
+        passed = parity_report(models, ids, lengths, labels)
+        print(f"\n{'✓' if passed else '✗'} Accuracy and F1 within {MAX_METRIC_DROP} of the eager model")
+
+    latency_report(models, ids, lengths)
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
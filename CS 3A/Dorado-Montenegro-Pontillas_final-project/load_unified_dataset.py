@@ -6,11 +6,82 @@ Combines multiple Filipino hate speech datasets into a single strong dataset
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+import argparse
+import glob
+import hashlib
+import math
 import os
 
+# Optional: only needed to write/read Parquet shards
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+def text_digest(text):
+    """64-bit digest of a text, used for duplicate detection"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of text digests
+    
+    Uses far less memory than a set of digests, at the cost of treating a
+    small fraction (error_rate) of unseen texts as duplicates.
+    """
+    
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        Args:
+            capacity: Expected number of distinct texts
+            error_rate: False positive rate at capacity
+        """
+        self.n_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+    
+    def _positions(self, text):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+    
+    def add(self, text):
+        """Add text; returns True if it was (probably) already present"""
+        present = True
+        for position in self._positions(text):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+
+class DigestSet:
+    """Exact duplicate detection with a set of 64-bit text digests"""
+    
+    def __init__(self):
+        self.digests = set()
+    
+    def add(self, text):
+        """Add text; returns True if it was already present"""
+        digest = text_digest(text)
+        if digest in self.digests:
+            return True
+        self.digests.add(digest)
+        return False
+
+
 class UnifiedDatasetLoader:
     """Load and combine all Filipino hate speech datasets"""
     
+    # Sources in the order load_all_datasets combines them
+    SOURCES = ('twitter_election', 'tiktok', 'english_twitter')
+    
     def __init__(self, base_path='.'):
         self.base_path = base_path
         self.combined_data = None
@@ -129,6 +200,104 @@ class UnifiedDatasetLoader:
         
         return df
     
+    def _read_source_chunks(self, source, chunksize):
+        """Chunks of one source with the text, label and source columns of the full loaders"""
+        if source == 'twitter_election':
+            for split in ('train', 'valid', 'test'):
+                path = os.path.join(self.base_path, f'hatespeech/{split}.csv')
+                for chunk in pd.read_csv(path, lineterminator='\n', chunksize=chunksize):
+                    chunk['source'] = source
+                    yield chunk
+        elif source == 'tiktok':
+            for split in ('train', 'valid', 'test'):
+                path = os.path.join(self.base_path, f'filipino-tiktok-hatespeech-main/data/{split}.csv')
+                for chunk in pd.read_csv(path, chunksize=chunksize):
+                    chunk.columns = chunk.columns.str.strip()
+                    chunk['source'] = source
+                    yield chunk
+        elif source == 'english_twitter':
+            path = os.path.join(self.base_path, 'cyberbullying_tweets.csv')
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                chunk = chunk.rename(columns={'tweet_text': 'text', 'cyberbullying_type': 'original_label'})
+                chunk['label'] = (chunk['original_label'] != 'not_cyberbullying').astype(int)
+                chunk['source'] = source
+                yield chunk
+        else:
+            raise ValueError(f"Unknown source: {source}")
+    
+    def stream_all_datasets(self, chunksize=50000, sources=SOURCES, bloom_capacity=None, error_rate=0.001):
+        """
+        Yield the cleaned unified dataset chunk by chunk
+        
+        Produces the same rows as load_all_datasets() (first occurrence of
+        each text, no missing values, no empty texts) while holding only one
+        chunk and one digest per distinct text in memory. With bloom_capacity
+        set, duplicates are found with a Bloom filter of that capacity
+        instead, which uses a fixed amount of memory but drops about
+        error_rate of unique texts as false duplicates.
+        """
+        seen = DigestSet() if bloom_capacity is None else BloomFilter(bloom_capacity, error_rate)
+        
+        for source in sources:
+            for chunk in self._read_source_chunks(source, chunksize):
+                chunk = chunk[['text', 'label', 'source']]
+                
+                # Every text counts as seen, even rows dropped below, as with drop_duplicates
+                # (missing texts are dropped anyway)
+                duplicate = [False if pd.isna(text) else seen.add(text) for text in chunk['text']]
+                
+                chunk = chunk[~np.array(duplicate, dtype=bool)]
+                chunk = chunk.dropna(subset=['text', 'label'])
+                chunk = chunk[chunk['text'].str.strip() != '']
+                if len(chunk):
+                    yield chunk.astype({'label': 'int64'}).reset_index(drop=True)
+    
+    def save_unified_shards(self, output_dir='unified_shards', rows_per_shard=100000, **stream_kwargs):
+        """
+        Stream the cleaned unified dataset into Parquet shards (requires pyarrow)
+        
+        Returns the shard paths; read them back with load_unified_shards().
+        """
+        if pq is None:
+            raise ImportError("Writing Parquet shards requires pyarrow: pip install pyarrow")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        for old_shard in glob.glob(os.path.join(output_dir, 'part-*.parquet')):
+            os.remove(old_shard)
+        
+        paths = []
+        buffered = []
+        n_buffered = 0
+        total = 0
+        
+        def flush(frames):
+            path = os.path.join(output_dir, f'part-{len(paths):05d}.parquet')
+            pq.write_table(pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False), path)
+            paths.append(path)
+        
+        for chunk in self.stream_all_datasets(**stream_kwargs):
+            buffered.append(chunk)
+            n_buffered += len(chunk)
+            total += len(chunk)
+            while n_buffered >= rows_per_shard:
+                combined = pd.concat(buffered, ignore_index=True)
+                flush([combined.iloc[:rows_per_shard]])
+                buffered = [combined.iloc[rows_per_shard:]]
+                n_buffered -= rows_per_shard
+        if n_buffered:
+            flush(buffered)
+        
+        print(f"\n✓ Unified bilingual dataset saved to {len(paths)} shard(s) in {output_dir}/ ({total} samples)")
+        return paths
+    
+    @staticmethod
+    def load_unified_shards(output_dir='unified_shards', columns=None):
+        """Read Parquet shards written by save_unified_shards() into one DataFrame"""
+        if pq is None:
+            raise ImportError("Reading Parquet shards requires pyarrow: pip install pyarrow")
+        paths = sorted(glob.glob(os.path.join(output_dir, 'part-*.parquet')))
+        return pd.concat([pd.read_parquet(path, columns=columns) for path in paths], ignore_index=True)
+    
     def get_train_val_test_split(self, train_size=0.7, val_size=0.15, test_size=0.15, random_state=42):
         """Split the unified dataset into train, validation, and test sets"""
         if self.combined_data is None:
@@ -174,8 +343,22 @@ class UnifiedDatasetLoader:
 
 def main():
     """Demo: Load and display unified bilingual dataset statistics"""
+    parser = argparse.ArgumentParser(description='Load the unified bilingual hate speech dataset')
+    parser.add_argument('--shards', default=None, metavar='DIR',
+                        help='Stream the cleaned dataset into Parquet shards in DIR instead')
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--rows-per-shard', type=int, default=100000)
+    parser.add_argument('--bloom-capacity', type=int, default=None,
+                        help='Deduplicate with a Bloom filter sized for this many texts')
+    args = parser.parse_args()
+    
     loader = UnifiedDatasetLoader()
     
+    if args.shards:
+        loader.save_unified_shards(args.shards, rows_per_shard=args.rows_per_shard,
+                                   chunksize=args.chunksize, bloom_capacity=args.bloom_capacity)
+        return
+    
     # Load all datasets
     unified_data = loader.load_all_datasets()
     
@@ -0,0 +1,171 @@
+"""
+Moderation Score Cache for Bilingual Hate Speech Detection
+Content-addressed cache of hate speech probabilities
+
+Reposts and copy-pasted posts preprocess to the same text, so their score
+is looked up instead of re-running the BiLSTM. Keys are the SHA-256 of the
+model version and the preprocessed text, so scores from a retrained model
+never mix with old ones. A bounded in-memory LRU sits in front of an
+optional SQLite file that keeps scores across restarts.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def model_version(*paths):
+    """Short fingerprint of the model (and vocabulary) files; changes on retrain"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class ScoreCache:
+    """
+    Bounded LRU of probabilities keyed by model version and preprocessed text
+
+    Thread-safe: the scorer calls it from the moderation worker thread while
+    the service reports stats from request threads.
+    """
+
+    def __init__(self, model_version, max_size=10000, db_path=None):
+        """
+        Args:
+            model_version: Identifier of the model; part of every key
+            max_size: Maximum entries kept in memory
+            db_path: Optional SQLite file to persist scores across restarts
+        """
+        self.model_version = model_version
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute('CREATE TABLE IF NOT EXISTS scores '
+                            '(key TEXT PRIMARY KEY, model_version TEXT, probability REAL)')
+            # Scores of any other model version can never be hit again
+            self.db.execute('DELETE FROM scores WHERE model_version != ?', (model_version,))
+            self.db.commit()
+
+    def key(self, processed_text):
+        """Content address of a preprocessed text under this model version"""
+        return hashlib.sha256(f'{self.model_version}\0{processed_text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, processed_texts):
+        """
+        Cached probability for each text, or None where it has not been scored
+
+        Repeats of a missed text within the same call count as hits, since
+        the caller scores each distinct text once.
+        """
+        keys = [self.key(text) for text in processed_texts]
+        with self.lock:
+            results = []
+            missed = set()
+            for key in keys:
+                if key in missed:
+                    self.hits += 1
+                    results.append(None)
+                    continue
+                probability = self.entries.get(key)
+                if probability is None and self.db is not None:
+                    row = self.db.execute('SELECT probability FROM scores WHERE key = ?', (key,)).fetchone()
+                    if row is not None:
+                        probability = row[0]
+                        self._remember(key, probability)
+                if probability is None:
+                    missed.add(key)
+                    self.misses += 1
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                results.append(probability)
+            return results
+
+    def put_many(self, processed_texts, probabilities):
+        """Store probabilities for preprocessed texts"""
+        rows = [(self.key(text), self.model_version, float(p))
+                for text, p in zip(processed_texts, probabilities)]
+        with self.lock:
+            for key, _, probability in rows:
+                self._remember(key, probability)
+            if self.db is not None:
+                self.db.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?)', rows)
+                self.db.commit()
+
+    def _remember(self, key, probability):
+        self.entries[key] = probability
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        """Hit-rate metrics since the cache was created"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'cache_hits': self.hits,
+                'cache_misses': self.misses,
+                'cache_hit_rate': self.hits / lookups if lookups else 0.0,
+                'cache_size': len(self.entries)
+            }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def test_score_cache():
+    """Test LRU eviction, version isolation and SQLite persistence"""
+    import tempfile
+
+    print("=" * 60)
+    print("TESTING MODERATION SCORE CACHE")
+    print("=" * 60)
+
+    cache = ScoreCache('v1', max_size=2)
+    cache.put_many(['a', 'b'], [0.1, 0.2])
+    assert cache.get_many(['a']) == [0.1]
+    cache.put_many(['c'], [0.3])
+    # 'b' was least recently used
+    assert cache.get_many(['a', 'b', 'c']) == [0.1, None, 0.3]
+    assert cache.key('a') != ScoreCache('v2').key('a')
+    print(f"✓ LRU eviction: {cache.stats()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'scores.sqlite')
+        cache = ScoreCache('v1', db_path=db_path)
+        cache.put_many(['mga tanga kayo', 'hello'], [0.9, 0.1])
+        cache.close()
+
+        reopened = ScoreCache('v1', db_path=db_path)
+        assert reopened.get_many(['hello', 'mga tanga kayo', 'new']) == [0.1, 0.9, None]
+        reopened.close()
+
+        retrained = ScoreCache('v2', db_path=db_path)
+        assert retrained.get_many(['hello']) == [None]
+        count = retrained.db.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+        assert count == 0, "scores of the old model version were kept"
+        retrained.close()
+    print("✓ Persisted scores survive a restart and are dropped on a new model version")
+
+    print("\n✓ Score cache test passed!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_score_cache()
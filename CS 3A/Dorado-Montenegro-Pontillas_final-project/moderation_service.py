@@ -0,0 +1,405 @@
+"""
+Batched Moderation Service for Bilingual Hate Speech Detection
+Scores posts with BiLSTMHateSpeechClassifier using dynamic micro-batching
+
+Requests arriving within a few milliseconds of each other are collected into
+one micro-batch, sorted by length and scored with a single packed forward
+pass, instead of one forward pass per post.
+
+Usage:
+    python moderation_service.py --port 8000
+    curl -X POST localhost:8000/moderate -d '{"texts": ["hello", "ang pangit mo"]}'
+    python moderation_service.py --cache-db moderation_cache.sqlite
+    python moderation_service.py --self-test
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import torch
+
+from moderation_cache import ScoreCache, model_version
+from rnn_model import BiLSTMHateSpeechClassifier, find_model_file, load_classifier
+from text_preprocessing import TextPreprocessor, Vocabulary, pad_sequences
+
+
+# Exported TorchScript model if present, falling back to the checkpoint (see export_model.py)
+MODEL_PATH = find_model_file()
+# Compact memory-mapped vocabulary, falling back to the pickle (see convert_vocabulary.py)
+VOCAB_PATH = 'vocabulary.vocab' if os.path.exists('vocabulary.vocab') else 'vocabulary.pkl'
+MAX_LENGTH = 100
+THRESHOLD = 0.5
+
+
+class HateSpeechScorer:
+    """
+    Score batches of posts with a trained BiLSTM classifier
+
+    Uses the same preprocessing, vocabulary and threshold as the social
+    media app, so a batched score matches the single-post score.
+    """
+
+    def __init__(self, model, vocab, preprocessor=None, device='cpu',
+                 max_length=MAX_LENGTH, threshold=THRESHOLD, max_batch_size=64, cache=None):
+        """
+        Args:
+            model: BiLSTMHateSpeechClassifier with loaded weights
+            vocab: Vocabulary the model was trained with
+            preprocessor: TextPreprocessor (defaults to the app's settings)
+            device: Torch device to run on
+            max_length: Maximum tokens per post
+            threshold: Probability above which a post is hate speech
+            max_batch_size: Largest forward pass; bigger inputs are split
+            cache: Optional ScoreCache of probabilities by preprocessed text
+        """
+        self.device = torch.device(device)
+        self.model = model.to(self.device)
+        self.model.eval()
+        self.vocab = vocab
+        self.preprocessor = preprocessor or TextPreprocessor(
+            lowercase=True,
+            remove_urls=True,
+            remove_mentions=True,
+            remove_hashtags=False,
+            remove_punctuation=False
+        )
+        self.max_length = max_length
+        self.threshold = threshold
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self.unk_idx = vocab.word2idx[vocab.UNK_TOKEN]
+
+    @classmethod
+    def from_files(cls, model_path=MODEL_PATH, vocab_path=VOCAB_PATH, device='cpu', **kwargs):
+        """Load the vocabulary and a checkpoint or TorchScript export of the model"""
+        vocab = Vocabulary.load(vocab_path)
+        model = load_classifier(model_path, pad_idx=vocab.word2idx[vocab.PAD_TOKEN], device=device)
+        return cls(model, vocab, device=device, **kwargs)
+
+    def encode(self, texts):
+        """Preprocess texts into padded token ids and lengths (empty posts become <UNK>)"""
+        processed = self.preprocessor.preprocess_batch(texts)
+        return self.vocab.encode_batch(processed, max_length=self.max_length)
+
+    def score_batch(self, texts):
+        """
+        Probability of hate speech for each text
+
+        Sequences are sorted by length (longest first) and split into chunks
+        of max_batch_size, so each chunk is only padded to its own longest
+        post. Results are returned in input order.
+
+        With a cache, only texts whose preprocessed form has not been scored
+        yet (and only one copy of each) go through the model.
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._score_processed(self.preprocessor.preprocess_batch(texts))
+
+        processed = self.preprocessor.preprocess_batch(texts)
+        probabilities = self.cache.get_many(processed)
+        missing = list(dict.fromkeys(text for text, p in zip(processed, probabilities) if p is None))
+        if missing:
+            scored = dict(zip(missing, self._score_processed(missing)))
+            self.cache.put_many(missing, scored.values())
+            probabilities = [scored[text] if p is None else p for text, p in zip(processed, probabilities)]
+        return probabilities
+
+    def _score_processed(self, processed):
+        """Probabilities for already preprocessed texts, in input order"""
+        ids, lengths = self.vocab.encode_batch(processed, max_length=self.max_length)
+        order = np.argsort(-lengths, kind='stable')
+        probabilities = np.empty(len(lengths), dtype=np.float32)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), self.max_batch_size):
+                chunk = order[start:start + self.max_batch_size]
+                # Pad to the longest post in this chunk only
+                chunk_lengths = lengths[chunk]
+                text_tensor = torch.from_numpy(ids[chunk, :chunk_lengths[0]]).to(self.device)
+                length_tensor = torch.from_numpy(chunk_lengths)
+                # Already sorted longest first, so packing needs no sort/unsort
+                probabilities[chunk] = self.model.predict(text_tensor, length_tensor, enforce_sorted=True).numpy()
+
+        return probabilities.tolist()
+
+    def classify_batch(self, texts):
+        """(is_hate, probability) for each text"""
+        return [(p > self.threshold, p) for p in self.score_batch(texts)]
+
+
+class MicroBatcher:
+    """
+    Collect concurrent requests into micro-batches for one worker thread
+
+    The first request of a batch waits at most max_wait_ms for others to
+    arrive; a batch is dispatched as soon as it has max_batch_size items or
+    the deadline passes. submit() returns a concurrent.futures.Future.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_fn, max_batch_size=64, max_wait_ms=10):
+        """
+        Args:
+            batch_fn: Function mapping a list of items to a list of results
+            max_batch_size: Maximum items per batch
+            max_wait_ms: Maximum time the oldest item waits for a batch to fill
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.worker = threading.Thread(target=self._run, name='MicroBatcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, item):
+        """Queue an item and return a Future for its result"""
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def submit_many(self, items):
+        """Queue several items, returning one Future per item"""
+        return [self.submit(item) for item in items]
+
+    def _collect(self):
+        """Block for the first item, then gather more until full or the deadline"""
+        first = self.queue.get()
+        if first is self._STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is self._STOP:
+                # Finish this batch, then stop
+                self.queue.put(self._STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            # Skip requests whose caller already gave up
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        """Number of batches and items processed so far"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0
+        }
+
+    def close(self):
+        """Stop the worker after queued items are processed"""
+        self.queue.put(self._STOP)
+        self.worker.join()
+
+
+def make_handler(batcher, threshold, timeout=30.0, cache=None):
+    """HTTP request handler class bound to a MicroBatcher of probabilities"""
+
+    class ModerationHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', **batcher.stats(), **(cache.stats() if cache else {})})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path != '/moderate':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                texts = payload['texts'] if 'texts' in payload else [payload['text']]
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {'error': 'Expected JSON {"text": str} or {"texts": [str, ...]}'})
+                return
+
+            try:
+                futures = batcher.submit_many(texts)
+                probabilities = [future.result(timeout=timeout) for future in futures]
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+
+            self._send_json(200, {'results': [
+                {'probability': p, 'is_hate': p > threshold} for p in probabilities
+            ]})
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate at high request rates
+            pass
+
+    return ModerationHandler
+
+
+def test_micro_batching(vocab_path=VOCAB_PATH, n_requests=512, n_clients=32):
+    """Check batched scores match single-post scores and compare throughput"""
+    print("=" * 60)
+    print("TESTING MICRO-BATCHED MODERATION")
+    print("=" * 60)
+
+    torch.manual_seed(0)
+    vocab = Vocabulary.load(vocab_path)
+    model = BiLSTMHateSpeechClassifier(vocab_size=len(vocab), pad_idx=vocab.word2idx[vocab.PAD_TOKEN])
+    scorer = HateSpeechScorer(model, vocab)
+
+    words = list(vocab.word2idx)[4:2000]
+    texts = [' '.join(words[(i * 7 + j * 13) % len(words)] for j in range(1 + (i * 37) % 60))
+             for i in range(n_requests)]
+    texts[0] = ''
+
+    # Parity with the app's one-post-at-a-time path
+    single = []
+    start = time.perf_counter()
+    for text in texts:
+        sequence = vocab.text_to_sequence(scorer.preprocessor.preprocess(text), max_length=MAX_LENGTH)
+        if len(sequence) == 0:
+            sequence = [vocab.word2idx[vocab.UNK_TOKEN]]
+        padded, length = pad_sequences([sequence], max_length=MAX_LENGTH)
+        with torch.no_grad():
+            output = model(torch.LongTensor(padded), torch.LongTensor(length))
+        single.append(torch.sigmoid(output).item())
+    single_time = time.perf_counter() - start
+
+    batched = scorer.score_batch(texts)
+    max_diff = max(abs(a - b) for a, b in zip(single, batched))
+    print(f"Max |single - batched| probability: {max_diff:.2e}")
+    assert max_diff < 1e-4, "batched scores differ from single-post scores"
+
+    # Cached scores match, and reposts (same text after preprocessing) are hits
+    cached_scorer = HateSpeechScorer(model, vocab, cache=ScoreCache('test'))
+    reposts = texts + [text.upper() + ' @someone' for text in texts]
+    cached = cached_scorer.score_batch(reposts)
+    assert cached == batched + batched, "cached scores differ from uncached scores"
+    # Each text is scored once; its repost in the same batch is already a hit
+    assert cached_scorer.cache.stats()['cache_misses'] == len(set(cached_scorer.preprocessor.preprocess_batch(texts)))
+    assert cached_scorer.score_batch(texts[:10]) == batched[:10]
+    print(f"✓ Cached scores match: {cached_scorer.cache.stats()}")
+
+    # Concurrent clients through the micro-batcher
+    batcher = MicroBatcher(scorer.score_batch, max_batch_size=64, max_wait_ms=5)
+    latencies = []
+
+    def client(chunk):
+        for text in chunk:
+            t0 = time.perf_counter()
+            batcher.submit(text).result()
+            latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(texts[i::n_clients],)) for i in range(n_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batched_time = time.perf_counter() - start
+    batcher.close()
+
+    latencies.sort()
+    print(f"Single-post:   {n_requests / single_time:8.1f} posts/s")
+    print(f"Micro-batched: {n_requests / batched_time:8.1f} posts/s "
+          f"({n_clients} clients, mean batch {batcher.stats()['mean_batch_size']:.1f}, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms)")
+
+    print("\n✓ Micro-batching test passed!")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-batched hate speech moderation service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--vocab', default=VOCAB_PATH)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=10.0)
+    parser.add_argument('--threads', type=int, default=None, help='torch intra-op threads')
+    parser.add_argument('--cache-size', type=int, default=10000, help='Cached scores in memory (0 disables)')
+    parser.add_argument('--cache-db', default=None, help='SQLite file to persist cached scores')
+    parser.add_argument('--self-test', action='store_true',
+                        help='Run the batching test with random weights and exit')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    if args.self_test:
+        test_micro_batching(args.vocab)
+        return
+
+    cache = None
+    if args.cache_size > 0:
+        # A retrained model or rebuilt vocabulary gets a new version, so old scores are never served
+        cache = ScoreCache(model_version(args.model, args.vocab), max_size=args.cache_size,
+                           db_path=args.cache_db)
+    scorer = HateSpeechScorer.from_files(args.model, args.vocab, max_batch_size=args.max_batch_size,
+                                         cache=cache)
+    batcher = MicroBatcher(scorer.score_batch, max_batch_size=args.max_batch_size,
+                           max_wait_ms=args.max_wait_ms)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher, scorer.threshold, cache=cache))
+
+    print(f"✓ Moderation service listening on http://{args.host}:{args.port}/moderate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if cache:
+            cache.close()
+
+
+if __name__ == '__main__':
+    main()
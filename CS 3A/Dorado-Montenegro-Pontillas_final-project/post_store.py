@@ -0,0 +1,174 @@
+"""
+Post Storage for the HateShield Feed
+Compact post records with old posts paged out to disk
+
+The feed only needs the handful of posts on screen at once, so the store
+keeps the newest posts in memory and moves older ones to a SQLite file in
+pages. Reading an old post back loads its whole page, so scrolling through
+old posts reads the disk once per page rather than once per post.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
+
+
+class PostRecord:
+    """One accepted post; __slots__ keeps per-post memory small"""
+
+    __slots__ = ('post_id', 'content', 'timestamp', 'probability')
+
+    def __init__(self, post_id, content, timestamp, probability=None):
+        self.post_id = post_id
+        self.content = content
+        self.timestamp = timestamp      # seconds since the epoch
+        self.probability = probability  # hate speech probability when posted
+
+    def as_row(self):
+        return (self.post_id, self.content, self.timestamp, self.probability)
+
+    def __repr__(self):
+        return f"PostRecord({self.post_id}, {self.content[:30]!r})"
+
+
+class PostStore:
+    """
+    Append-only post list, newest posts in memory and older pages on disk
+
+    Posts are numbered in order of arrival (post_id 0 is the oldest). The
+    feed shows them newest first, so index 0 of get_newest() is the latest.
+    """
+
+    def __init__(self, db_path=None, max_in_memory=1000, page_size=200, cached_pages=8):
+        """
+        Args:
+            db_path: SQLite file for paged-out posts (default: a temporary
+                file removed by close())
+            max_in_memory: Newest posts kept in memory
+            page_size: Posts moved to or read from disk at a time
+            cached_pages: Pages of old posts kept in memory after reading
+        """
+        self._owns_db = db_path is None
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(prefix='hateshield_posts_', suffix='.sqlite')
+            os.close(fd)
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS posts (post_id INTEGER PRIMARY KEY, content TEXT, '
+                        'timestamp REAL, probability REAL)')
+
+        self.max_in_memory = max(max_in_memory, page_size)
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.recent = []                 # post_ids paged_count .. count-1
+        self.page_cache = OrderedDict()  # page number -> list of PostRecord
+
+        # Continue numbering after posts already in the file
+        self.paged_count = self.db.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+
+    def __len__(self):
+        return self.paged_count + len(self.recent)
+
+    def append(self, content, timestamp=None, probability=None):
+        """Add a post and return its record"""
+        record = PostRecord(len(self), content, time.time() if timestamp is None else timestamp, probability)
+        self.recent.append(record)
+        if len(self.recent) > self.max_in_memory:
+            self._page_out()
+        return record
+
+    def _page_out(self):
+        # Move the oldest whole pages to disk
+        n_pages = (len(self.recent) - self.max_in_memory + self.page_size - 1) // self.page_size
+        moving = self.recent[:n_pages * self.page_size]
+        self.db.executemany('INSERT INTO posts VALUES (?, ?, ?, ?)', [r.as_row() for r in moving])
+        self.db.commit()
+        del self.recent[:len(moving)]
+        self.paged_count += len(moving)
+
+    def get(self, post_id):
+        """Record by post_id, from memory or from its page on disk"""
+        if not 0 <= post_id < len(self):
+            raise IndexError(f"post_id {post_id} out of range for {len(self)} posts")
+        if post_id >= self.paged_count:
+            return self.recent[post_id - self.paged_count]
+
+        page_number = post_id // self.page_size
+        page = self.page_cache.get(page_number)
+        if page is None:
+            start = page_number * self.page_size
+            rows = self.db.execute('SELECT * FROM posts WHERE post_id >= ? AND post_id < ? ORDER BY post_id',
+                                   (start, start + self.page_size)).fetchall()
+            page = [PostRecord(*row) for row in rows]
+            self.page_cache[page_number] = page
+            while len(self.page_cache) > self.cached_pages:
+                self.page_cache.popitem(last=False)
+        else:
+            self.page_cache.move_to_end(page_number)
+        return page[post_id - page_number * self.page_size]
+
+    def get_newest(self, start, stop):
+        """Records at display positions start..stop-1, where position 0 is the newest post"""
+        count = len(self)
+        return [self.get(count - 1 - i) for i in range(max(start, 0), min(stop, count))]
+
+    def close(self):
+        """Close the database, deleting it if it was a temporary file"""
+        if self.db is not None:
+            if not self._owns_db and self.recent:
+                # Keep the whole session in a file the caller chose
+                self.db.executemany('INSERT INTO posts VALUES (?, ?, ?, ?)', [r.as_row() for r in self.recent])
+                self.db.commit()
+            self.db.close()
+            self.db = None
+            if self._owns_db and os.path.exists(self.db_path):
+                os.remove(self.db_path)
+
+
+def test_post_store(n_posts=20000):
+    """Test paging posts to disk and reading them back in display order"""
+    import tracemalloc
+
+    print("=" * 60)
+    print("TESTING POST STORE")
+    print("=" * 60)
+
+    tracemalloc.start()
+    store = PostStore(max_in_memory=500, page_size=100)
+    start = time.perf_counter()
+    for i in range(n_posts):
+        store.append(f"post number {i} " + "text " * (i % 40), timestamp=1000.0 + i, probability=0.1)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(store) == n_posts and len(store.recent) <= 500
+    assert store.get(0).content.startswith('post number 0 ')
+    assert store.get(n_posts - 1).timestamp == 1000.0 + n_posts - 1
+    newest = store.get_newest(0, 3)
+    assert [r.post_id for r in newest] == [n_posts - 1, n_posts - 2, n_posts - 3]
+    middle = store.get_newest(n_posts // 2, n_posts // 2 + 50)
+    assert [r.post_id for r in middle] == list(range(n_posts // 2 - 1, n_posts // 2 - 51, -1))
+    assert store.get(12345).timestamp == 1000.0 + 12345 and store.get(12345).probability == 0.1
+
+    start = time.perf_counter()
+    for position in range(0, n_posts, 7):
+        store.get_newest(position, position + 10)
+    scroll_time = time.perf_counter() - start
+
+    print(f"{n_posts:,} posts: {len(store.recent)} in memory, {store.paged_count:,} on disk, "
+          f"{retained / 2**20:.1f} MB retained")
+    print(f"Append: {elapsed / n_posts * 1e6:.1f} µs/post, scroll through all: {scroll_time:.2f} s")
+
+    path = store.db_path
+    store.close()
+    assert not os.path.exists(path)
+
+    print("\n✓ Post store test passed!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_post_store()
@@ -3,6 +3,8 @@ BiLSTM Model for Bilingual Hate Speech Detection
 Supports both Filipino and English text
 """
 
+import os
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -52,13 +54,16 @@ class BiLSTMHateSpeechClassifier(nn.Module):
         self.fc1 = nn.Linear(hidden_dim * 2, 64)
         self.fc2 = nn.Linear(64, 1)
         
-    def forward(self, text, text_lengths):
+    def forward(self, text, text_lengths, enforce_sorted: bool = False):
         """
         Forward pass
         
         Args:
             text: Tensor of token indices [batch_size, seq_len]
             text_lengths: Actual lengths of sequences [batch_size]
+            enforce_sorted: True if the batch is already sorted by length,
+                longest first (see bucket_sampler.sorted_collate_fn); skips
+                the sort/unsort around the LSTM
             
         Returns:
             predictions: Tensor of predictions [batch_size, 1]
@@ -68,7 +73,7 @@ class BiLSTMHateSpeechClassifier(nn.Module):
         
         # Pack padded sequences for efficient LSTM processing
         packed_embedded = nn.utils.rnn.pack_padded_sequence(
-            embedded, text_lengths.cpu(), batch_first=True, enforce_sorted=False
+            embedded, text_lengths.cpu(), batch_first=True, enforce_sorted=enforce_sorted
         )
         
         # LSTM: [batch_size, seq_len, embedding_dim] -> [batch_size, seq_len, hidden_dim*2]
@@ -96,14 +101,15 @@ class BiLSTMHateSpeechClassifier(nn.Module):
         
         return predictions
     
-    def predict(self, text, text_lengths):
+    @torch.jit.export
+    def predict(self, text, text_lengths, enforce_sorted: bool = False):
         """
         Predict with sigmoid activation
         
         Returns:
             probabilities: Probability of hate speech [batch_size]
         """
-        logits = self.forward(text, text_lengths)
+        logits = self.forward(text, text_lengths, enforce_sorted)
         probabilities = torch.sigmoid(logits).squeeze(1)
         return probabilities
 
@@ -122,11 +128,11 @@ class SimpleBiLSTM(nn.Module):
         self.dropout = nn.Dropout(dropout)
         self.fc = nn.Linear(hidden_dim * 2, 1)
         
-    def forward(self, text, text_lengths):
+    def forward(self, text, text_lengths, enforce_sorted=False):
         embedded = self.dropout(self.embedding(text))
         
         packed_embedded = nn.utils.rnn.pack_padded_sequence(
-            embedded, text_lengths.cpu(), batch_first=True, enforce_sorted=False
+            embedded, text_lengths.cpu(), batch_first=True, enforce_sorted=enforce_sorted
         )
         
         packed_output, (hidden, cell) = self.lstm(packed_embedded)
@@ -145,6 +151,44 @@ class SimpleBiLSTM(nn.Module):
         return probabilities
 
 
+# Extension of TorchScript exports written by export_model.py
+TORCHSCRIPT_EXTENSION = '.ts'
+
+# Served in this order of preference: quantized export, float export, training checkpoint
+MODEL_FILES = ('best_bilstm_model_int8.ts', 'best_bilstm_model.ts', 'best_bilstm_model.pt')
+
+
+def find_model_file(candidates=MODEL_FILES):
+    """First candidate that exists (the last one if none do, so errors name the checkpoint)"""
+    return next((path for path in candidates if os.path.exists(path)), candidates[-1])
+
+
+def load_classifier(path, pad_idx=0, device='cpu', **model_kwargs):
+    """
+    Load a trained classifier for inference, chosen by file extension
+    
+    .ts files are TorchScript exports (optionally int8-quantized, see
+    export_model.py) and are loaded without the Python model class. Any
+    other file is a state_dict saved by the training notebook; the
+    vocabulary size is read from its embedding weights.
+    
+    Both support model(text, text_lengths) and model.predict(text, text_lengths).
+    """
+    if path.endswith(TORCHSCRIPT_EXTENSION):
+        model = torch.jit.load(path, map_location=device)
+    else:
+        checkpoint = torch.load(path, map_location=device, weights_only=False)
+        model = BiLSTMHateSpeechClassifier(
+            vocab_size=checkpoint['embedding.weight'].shape[0],
+            pad_idx=pad_idx,
+            **model_kwargs
+        )
+        model.load_state_dict(checkpoint)
+    model.to(device)
+    model.eval()
+    return model
+
+
 def count_parameters(model):
     """Count trainable parameters in the model"""
     return sum(p.numel() for p in model.parameters() if p.requires_grad)
@@ -2,12 +2,18 @@
 Facebook-Style Social Media App with Hate Speech Detection
 """
 
+import os
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import torch
 from datetime import datetime
-from rnn_model import BiLSTMHateSpeechClassifier
-from text_preprocessing import TextPreprocessor, Vocabulary, pad_sequences
+from moderation_cache import ScoreCache, model_version
+from moderation_service import HateSpeechScorer, MicroBatcher
+from post_store import PostStore
+from rnn_model import find_model_file, load_classifier
+from text_preprocessing import TextPreprocessor, Vocabulary
+from virtual_feed import VirtualFeed
 
 
 class SocialMediaApp:
@@ -46,7 +52,9 @@ class SocialMediaApp:
         
         # Load model
         self.device = torch.device('cpu')
-        self.vocab = Vocabulary.load('vocabulary.pkl')
+        # Prefer the compact memory-mapped vocabulary (see convert_vocabulary.py)
+        vocab_path = 'vocabulary.vocab' if os.path.exists('vocabulary.vocab') else 'vocabulary.pkl'
+        self.vocab = Vocabulary.load(vocab_path)
         self.preprocessor = TextPreprocessor(
             lowercase=True,
             remove_urls=True,
@@ -55,22 +63,28 @@ class SocialMediaApp:
             remove_punctuation=False
         )
         
-        # Initialize model
-        self.model = BiLSTMHateSpeechClassifier(
-            vocab_size=len(self.vocab),
-            embedding_dim=128,
-            hidden_dim=128,
-            num_layers=2,
-            dropout=0.3,
-            pad_idx=self.vocab.word2idx[self.vocab.PAD_TOKEN]
-        ).to(self.device)
+        # Load the exported TorchScript model if present (see export_model.py), else the checkpoint
+        model_path = find_model_file()
+        self.model = load_classifier(
+            model_path,
+            pad_idx=self.vocab.word2idx[self.vocab.PAD_TOKEN],
+            device=self.device
+        )
+        
+        # Score posts on a worker thread so the UI never blocks on the model;
+        # posts submitted while another is being scored share a forward pass
+        # Reposts are answered from the score cache without running the model
+        self.cache = ScoreCache(model_version(model_path, vocab_path))
+        self.scorer = HateSpeechScorer(self.model, self.vocab, self.preprocessor, device=self.device,
+                                       cache=self.cache)
+        self.batcher = MicroBatcher(self.scorer.classify_batch, max_wait_ms=10)
+        self.root.protocol('WM_DELETE_WINDOW', self.close)
         
-        checkpoint = torch.load('best_bilstm_model.pt', map_location=self.device, weights_only=False)
-        self.model.load_state_dict(checkpoint)
-        self.model.eval()
+        # Running estimate of model latency (seconds) used to pace the progress bar
+        self.expected_latency = 0.2
         
-        # Store posts
-        self.posts = []
+        # Store posts (newest in memory, older pages on disk)
+        self.posts = PostStore()
         
         # Create UI
         self.create_header()
@@ -136,32 +150,9 @@ class SocialMediaApp:
         feed_container = tk.Frame(self.root, bg='#F0F2F5')
         feed_container.pack(fill='both', expand=True, padx=20, pady=(0, 20))
 
-        # Canvas with scrollbar
-        self.feed_canvas = tk.Canvas(feed_container, bg='#F0F2F5', highlightthickness=0)
-
-        # The outer frame defines scrollregion height; inner column is centered
-        self.feed_frame = tk.Frame(self.feed_canvas, bg='#F0F2F5')
-        self.feed_frame.bind(
-            '<Configure>',
-            lambda e: self.feed_canvas.configure(scrollregion=self.feed_canvas.bbox('all'))
-        )
-
-        # Centered content column (fixed width) for cards - much wider now
-        self.feed_column_width = 1200
-        self.feed_column = tk.Frame(self.feed_frame, bg='#F0F2F5')
-        self.feed_column.pack(pady=10, anchor='center')
-
-        self._feed_window_id = self.feed_canvas.create_window((0, 0), window=self.feed_frame, anchor='n')
-
-        def _center_feed_column(event=None):
-            try:
-                canvas_width = self.feed_canvas.winfo_width()
-                x = max(0, (canvas_width - self.feed_column_width) // 2)
-                self.feed_canvas.coords(self._feed_window_id, x, 0)
-            except Exception:
-                pass
-
-        self.feed_canvas.bind('<Configure>', _center_feed_column)
+        # Virtualized feed: only the cards in view exist as widgets
+        self.feed = VirtualFeed(feed_container, self.posts, self.format_timestamp, bg='#F0F2F5')
+        self.feed_canvas = self.feed.canvas
         
         # Enable mousewheel scrolling without visible scrollbar
         def _on_mousewheel(event):
@@ -176,13 +167,9 @@ class SocialMediaApp:
         
     def show_welcome_message(self):
         """Show welcome message when no posts"""
-        # Clear existing cards/messages in the feed column
-        for child in self.feed_column.winfo_children():
-            child.destroy()
-
-        # Welcome card (packs into centered column)
-        welcome_frame = tk.Frame(self.feed_column, bg='white', relief='solid', borderwidth=1)
-        welcome_frame.pack(fill='x', pady=10)
+        # Welcome card, shown by the feed until the first post
+        welcome_frame = tk.Frame(self.feed_canvas, bg='white', relief='solid', borderwidth=1)
+        self.feed.set_placeholder(welcome_frame)
         
         welcome_text = tk.Label(
             welcome_frame,
@@ -353,29 +340,19 @@ class SocialMediaApp:
         self.show_loading_screen(content)
     
     def detect_hate_speech(self, text):
-        """Detect hate speech in text"""
-        processed = self.preprocessor.preprocess(text)
-        sequence = self.vocab.text_to_sequence(processed, max_length=100)
-        
-        if len(sequence) == 0:
-            sequence = [self.vocab.word2idx[self.vocab.UNK_TOKEN]]
-        
-        padded_seq, length = pad_sequences([sequence], max_length=100)
-        text_tensor = torch.LongTensor(padded_seq).to(self.device)
-        length_tensor = torch.LongTensor(length).to(self.device)
-        
-        with torch.no_grad():
-            output = self.model(text_tensor, length_tensor)
-            probability = torch.sigmoid(output).item()
+        """
+        Queue text for hate speech detection on the moderation worker
         
-        # Lower threshold for better detection (0.5 is more balanced)
-        threshold = 0.5
-        is_hate = probability > threshold
-        
-        # Debug: print probability for testing
-        print(f"Text: '{text}' | Probability: {probability:.4f} | Threshold: {threshold} | Is hate: {is_hate}")
-        
-        return is_hate, probability
+        Returns a Future of (is_hate, probability). Never call .result() on it
+        from the Tk thread; poll it with root.after() like show_loading_screen.
+        """
+        return self.batcher.submit(text)
+    
+    def close(self):
+        """Stop the moderation worker and close the app"""
+        self.batcher.close()
+        self.posts.close()
+        self.root.destroy()
     
     def show_loading_screen(self, content):
         """Show modern loading screen with progress bar"""
@@ -383,8 +360,8 @@ class SocialMediaApp:
         loading.title("Analyzing...")
         loading.configure(bg='white')
         loading.resizable(False, False)
+        # Not modal: the feed stays usable and more posts can be queued meanwhile
         loading.transient(self.root)
-        loading.grab_set()
         
         # Content frame
         content_frame = tk.Frame(loading, bg='white', padx=50, pady=40)
@@ -454,46 +431,51 @@ class SocialMediaApp:
         # Position after a brief delay to ensure proper layout
         loading.after(10, center_dialog)
         
-        # Animate progress bar with smooth easing
-        self.loading_cancelled = False
-        
-        def animate_progress(progress=0):
-            if loading.winfo_exists() and progress <= 100 and not self.loading_cancelled:
-                # Smooth easing function (ease-out)
-                eased_progress = 1 - (1 - progress / 100) ** 3
-                width = int(300 * eased_progress)
-                
-                # Update progress bar with smooth animation
-                progress_bg.coords(progress_bar, 0, 0, width, 10)
-                percent_label.config(text=f"{int(progress)}%")
-                # Faster animation - complete in ~1.5 seconds
-                loading.after(15, lambda: animate_progress(progress + 1))
-        
-        # Start animation immediately
-        loading.after(10, lambda: animate_progress(0))
-        
-        # Process after delay
-        def process_content():
+        # Score on the worker thread; the dialog only polls for the result
+        future = self.detect_hate_speech(content)
+        started = time.perf_counter()
+        
+        def set_progress(progress):
+            # Smooth easing function (ease-out)
+            eased_progress = 1 - (1 - progress / 100) ** 3
+            progress_bg.coords(progress_bar, 0, 0, int(300 * eased_progress), 10)
+            percent_label.config(text=f"{int(progress)}%")
+        
+        def poll_result():
+            if not loading.winfo_exists():
+                future.cancel()
+                return
+            
+            if not future.done():
+                # Approach 90% over the expected model time; only the result reaches 100%
+                elapsed = time.perf_counter() - started
+                set_progress(90 * (1 - 0.5 ** (elapsed / self.expected_latency)))
+                self.root.after(15, poll_result)
+                return
+            
+            elapsed = time.perf_counter() - started
+            self.expected_latency = 0.8 * self.expected_latency + 0.2 * elapsed
+            set_progress(100)
+            loading.destroy()
+            
             try:
-                is_hate, probability = self.detect_hate_speech(content)
-                self.loading_cancelled = True
-                
-                if loading.winfo_exists():
-                    loading.destroy()
-                
-                if is_hate:
-                    self.show_violation_dialog(probability)
-                else:
-                    self.add_post_to_feed(content)
-                    self.show_success_dialog(probability)
+                is_hate, probability = future.result()
             except Exception as e:
                 print(f"Error processing content: {e}")
-                self.loading_cancelled = True
-                if loading.winfo_exists():
-                    loading.destroy()
-        
-        # Simulate processing time (1.5 seconds)
-        loading.after(1500, process_content)
+                return
+            
+            # Debug: print probability for testing
+            print(f"Text: '{content}' | Probability: {probability:.4f} | "
+                  f"Threshold: {self.scorer.threshold} | Is hate: {is_hate} | {elapsed * 1000:.0f} ms")
+            
+            if is_hate:
+                self.show_violation_dialog(probability)
+            else:
+                self.add_post_to_feed(content, probability)
+                self.show_success_dialog(probability)
+        
+        # Polled from the root: callbacks scheduled on the dialog are deleted when it is closed
+        self.root.after(15, poll_result)
     
     def show_violation_dialog(self, probability):
         """Show modern hate speech violation dialog"""
@@ -679,92 +661,10 @@ class SocialMediaApp:
         # Auto close after 2 seconds
         success.after(2000, success.destroy)
     
-    def add_post_to_feed(self, content):
+    def add_post_to_feed(self, content, probability=None):
         """Add post to feed"""
-        # Clear welcome message if first post
-        if len(self.posts) == 0:
-            for widget in self.feed_column.winfo_children():
-                widget.destroy()
-        
-        # Add to posts list
-        timestamp = datetime.now()
-        self.posts.insert(0, {'content': content, 'timestamp': timestamp})
-        
-        # Create post card inside the centered column
-        post_frame = tk.Frame(self.feed_column, bg='white', relief='solid', borderwidth=1)
-        post_frame.pack(fill='x', pady=8)
-        
-        # Post header
-        header = tk.Frame(post_frame, bg='white')
-        header.pack(fill='x', padx=15, pady=10)
-        
-        user_icon = tk.Label(
-            header,
-            text="👤",
-            font=('Segoe UI', 20),
-            bg='white'
-        )
-        user_icon.pack(side='left', padx=(0, 10))
-        
-        user_info = tk.Frame(header, bg='white')
-        user_info.pack(side='left')
-        
-        username = tk.Label(
-            user_info,
-            text="User",
-            font=('Segoe UI', 11, 'bold'),
-            bg='white'
-        )
-        username.pack(anchor='w')
-        
-        # Time format
-        time_str = self.format_timestamp(timestamp)
-        time_label = tk.Label(
-            user_info,
-            text=f"{time_str} · 🌐",
-            font=('Segoe UI', 9),
-            bg='white',
-            fg='#65676B'
-        )
-        time_label.pack(anchor='w')
-        
-        # Post content
-        content_label = tk.Label(
-            post_frame,
-            text=content,
-            font=('Segoe UI', 12),
-            bg='white',
-            fg='#050505',
-            justify='left',
-            wraplength=1150,
-            anchor='w'
-        )
-        content_label.pack(fill='x', padx=15, pady=(0, 15))
-        
-        # Separator
-        separator = tk.Frame(post_frame, height=1, bg='#CED0D4')
-        separator.pack(fill='x', padx=15)
-        
-        # Actions (Like, Comment, Share)
-        actions_frame = tk.Frame(post_frame, bg='white')
-        actions_frame.pack(fill='x', pady=8)
-        
-        actions = [
-            ('👍', 'Like'),
-            ('💬', 'Comment'),
-            ('↗️', 'Share')
-        ]
-        
-        for icon, text in actions:
-            action_btn = tk.Label(
-                actions_frame,
-                text=f"{icon} {text}",
-                font=('Segoe UI', 10),
-                bg='white',
-                fg='#65676B',
-                cursor='hand2'
-            )
-            action_btn.pack(side='left', expand=True)
+        record = self.posts.append(content, probability=probability)
+        self.feed.add(record)
     
     def format_timestamp(self, timestamp):
         """Format timestamp for display"""
@@ -0,0 +1,291 @@
+"""
+Encoded Tensor Cache for Hate Speech Training
+Stores token ids and lengths of encoded texts as memory-mapped .npy shards
+
+Every training run and hyperparameter experiment encodes the same texts
+with the same vocabulary. The cache key covers everything that changes the
+encoding: the TextPreprocessor flags, a fingerprint of the vocabulary, the
+maximum length and a digest of the texts themselves. Later runs with the
+same inputs memory-map the shards instead of encoding again.
+
+The preprocessed corpus is cached the same way (keyed by the preprocessing
+flags and the raw texts), so a warm run skips preprocessing as well.
+
+Usage:
+    cache = TensorCache('tensor_cache')
+    processed = cache.preprocess(raw_texts, preprocessor, n_jobs=-1)
+    ids, lengths = cache.encode(texts, vocab, preprocessor)               # texts already preprocessed
+    ids, lengths = cache.encode(raw_texts, vocab, preprocessor, preprocess=True)
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from text_preprocessing import TextPreprocessor
+
+
+PREPROCESSING_FLAGS = ('lowercase', 'remove_urls', 'remove_mentions', 'remove_hashtags', 'remove_punctuation')
+
+# Bump when the stored layout or encoding rules change
+CACHE_FORMAT = 1
+
+
+def preprocessing_flags(preprocessor):
+    """The TextPreprocessor settings that affect the encoded ids"""
+    return {flag: bool(getattr(preprocessor, flag)) for flag in PREPROCESSING_FLAGS}
+
+
+def vocab_fingerprint(vocab):
+    """Digest of the word -> id mapping; changes whenever the vocabulary is rebuilt"""
+    digest = hashlib.sha256()
+    for word, idx in sorted(vocab.word2idx.items(), key=lambda item: item[1]):
+        digest.update(f'{idx}\t{word}\n'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def texts_digest(texts):
+    """Digest of a sequence of texts (order and boundaries included)"""
+    digest = hashlib.sha256()
+    for text in texts:
+        data = str(text).encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ShardedArray:
+    """Read-only row access across memory-mapped .npy shards, like one 2-D array"""
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.offsets = np.cumsum([0] + [len(shard) for shard in shards])
+        self.shape = (int(self.offsets[-1]),) + (shards[0].shape[1:] if shards else ())
+        self.dtype = shards[0].dtype if shards else np.int32
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            if idx < 0:
+                idx += len(self)
+            if not 0 <= idx < len(self):
+                raise IndexError(f"index {idx} out of range for {len(self)} rows")
+            shard = int(np.searchsorted(self.offsets, idx, side='right')) - 1
+            return self.shards[shard][idx - self.offsets[shard]]
+
+        # Slices and index arrays: gather rows shard by shard
+        rows = np.arange(len(self))[idx]
+        shard_ids = np.searchsorted(self.offsets, rows, side='right') - 1
+        out = np.empty((len(rows),) + self.shape[1:], dtype=self.dtype)
+        for shard in np.unique(shard_ids):
+            mask = shard_ids == shard
+            out[mask] = self.shards[shard][rows[mask] - self.offsets[shard]]
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        array = np.concatenate(self.shards) if self.shards else np.empty(self.shape, dtype=self.dtype)
+        return array if dtype is None else array.astype(dtype)
+
+
+class TensorCache:
+    """Directory of encoded datasets, one subdirectory of shards per key"""
+
+    def __init__(self, cache_dir='tensor_cache', shard_size=20000):
+        """
+        Args:
+            cache_dir: Directory holding the cached encodings
+            shard_size: Rows per .npy shard
+        """
+        self.cache_dir = cache_dir
+        self.shard_size = shard_size
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, texts, vocab, preprocessor, max_length=100, preprocess=False):
+        """Cache key for encoding texts with these settings"""
+        settings = {
+            'format': CACHE_FORMAT,
+            'preprocessing': preprocessing_flags(preprocessor),
+            'preprocess': preprocess,
+            'vocab': vocab_fingerprint(vocab),
+            'max_length': max_length,
+            'texts': texts_digest(texts),
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:24], settings
+
+    def encode(self, texts, vocab, preprocessor=None, max_length=100, preprocess=False):
+        """
+        Token ids (padded to max_length) and lengths of texts, from the cache when possible
+
+        Args:
+            texts: Texts to encode
+            vocab: Vocabulary to encode with
+            preprocessor: TextPreprocessor whose flags produced (or, with
+                preprocess=True, will produce) the texts
+            max_length: Maximum tokens per text
+            preprocess: Run the preprocessor before encoding on a miss
+
+        Returns:
+            ids: ShardedArray of shape (n, max_length), int32, memory-mapped
+            lengths: int64 array of shape (n,)
+        """
+        texts = list(texts)
+        preprocessor = preprocessor or TextPreprocessor()
+        key, settings = self.key(texts, vocab, preprocessor, max_length, preprocess)
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        cached = self._load(entry_dir)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        processed = preprocessor.preprocess_batch(texts) if preprocess else texts
+        ids, lengths = vocab.encode_batch(processed, max_length=max_length, pad_to_max_length=True)
+        self._save(entry_dir, ids, lengths, settings)
+        return self._load(entry_dir)
+
+    def preprocess(self, texts, preprocessor=None, n_jobs=1):
+        """
+        Preprocessed texts, from the cache when possible
+
+        Args:
+            texts: Raw texts (list or pandas Series)
+            preprocessor: TextPreprocessor to apply on a miss
+            n_jobs: Worker processes for preprocess_batch on a miss (-1 for all CPUs)
+
+        Returns:
+            List of preprocessed texts, in input order
+        """
+        texts = [str(text) for text in texts]
+        preprocessor = preprocessor or TextPreprocessor()
+        settings = {
+            'format': CACHE_FORMAT,
+            'kind': 'preprocessed',
+            'preprocessing': preprocessing_flags(preprocessor),
+            'texts': texts_digest(texts),
+        }
+        key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        if os.path.exists(os.path.join(entry_dir, 'meta.json')):
+            self.hits += 1
+            with open(os.path.join(entry_dir, 'texts.json'), encoding='utf-8') as f:
+                return json.load(f)
+
+        self.misses += 1
+        processed = preprocessor.preprocess_batch(texts, n_jobs=n_jobs)
+
+        def write(tmp_dir):
+            with open(os.path.join(tmp_dir, 'texts.json'), 'w', encoding='utf-8') as f:
+                json.dump(processed, f, ensure_ascii=False)
+            return len(processed)
+
+        self._commit(entry_dir, settings, write)
+        return processed
+
+    def _load(self, entry_dir):
+        # meta.json is written last, so its presence means the entry is complete
+        if not os.path.exists(os.path.join(entry_dir, 'meta.json')):
+            return None
+        shards = [np.load(path, mmap_mode='r') for path in sorted(glob.glob(os.path.join(entry_dir, 'ids-*.npy')))]
+        lengths = np.load(os.path.join(entry_dir, 'lengths.npy'))
+        return ShardedArray(shards), lengths
+
+    def _save(self, entry_dir, ids, lengths, settings):
+        def write(tmp_dir):
+            for shard, start in enumerate(range(0, max(len(ids), 1), self.shard_size)):
+                np.save(os.path.join(tmp_dir, f'ids-{shard:05d}.npy'), ids[start:start + self.shard_size])
+            np.save(os.path.join(tmp_dir, 'lengths.npy'), lengths)
+            return len(ids)
+
+        self._commit(entry_dir, settings, write)
+
+    def _commit(self, entry_dir, settings, write):
+        """Create an entry with write(tmp_dir) -> rows, then meta.json, and publish it atomically"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write into a temporary directory and rename, so readers never see a partial entry
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            rows = write(tmp_dir)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump({**settings, 'rows': rows}, f, indent=2)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(os.path.join(entry_dir, 'meta.json')):
+                raise
+
+    def clear(self):
+        """Delete every cached encoding"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def test_tensor_cache(vocab_path='vocabulary.pkl'):
+    """Test that cached encodings match direct encoding and that keys change with settings"""
+    import time
+    from text_preprocessing import Vocabulary
+
+    print("=" * 60)
+    print("TESTING ENCODED TENSOR CACHE")
+    print("=" * 60)
+
+    vocab = Vocabulary.load(vocab_path)
+    words = list(vocab.word2idx)[4:3000]
+    raw = [f"@user {' '.join(words[(i * 7 + j) % len(words)] for j in range(i % 120))} #Tag http://x.co"
+           for i in range(50000)]
+    preprocessor = TextPreprocessor()
+    processed = preprocessor.preprocess_batch(raw)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TensorCache(tmp, shard_size=16384)
+
+        start = time.perf_counter()
+        ids, lengths = cache.encode(raw, vocab, preprocessor, preprocess=True)
+        miss_time = time.perf_counter() - start
+        start = time.perf_counter()
+        cached_ids, cached_lengths = cache.encode(raw, vocab, preprocessor, preprocess=True)
+        hit_time = time.perf_counter() - start
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        expected_ids, expected_lengths = vocab.encode_batch(processed, max_length=100, pad_to_max_length=True)
+        assert np.array_equal(np.asarray(cached_ids), expected_ids)
+        assert np.array_equal(cached_lengths, expected_lengths)
+        assert np.array_equal(cached_ids[12345], expected_ids[12345])
+        assert np.array_equal(cached_ids[[3, 40000, 16384, 16383]], expected_ids[[3, 40000, 16384, 16383]])
+        assert np.array_equal(cached_ids[-5:], expected_ids[-5:])
+        print(f"✓ Cached ids match ({len(cached_ids.shards)} shards); "
+              f"miss {miss_time * 1000:.0f} ms, hit {hit_time * 1000:.0f} ms")
+
+        # Already-preprocessed texts, other flags and other lengths are separate entries
+        cache.encode(processed, vocab, preprocessor)
+        cache.encode(raw, vocab, TextPreprocessor(remove_punctuation=True), preprocess=True)
+        cache.encode(raw, vocab, preprocessor, max_length=50, preprocess=True)
+        assert cache.misses == 4
+        assert len([d for d in os.listdir(tmp) if not d.startswith('.')]) == 4
+
+        # Preprocessed corpus: a warm run loads it instead of preprocessing again
+        start = time.perf_counter()
+        assert cache.preprocess(raw, preprocessor) == processed
+        miss_time = time.perf_counter() - start
+        start = time.perf_counter()
+        assert cache.preprocess(raw, preprocessor) == processed
+        hit_time = time.perf_counter() - start
+        assert cache.preprocess(raw, TextPreprocessor(remove_punctuation=True)) != processed
+        assert (cache.hits, cache.misses) == (2, 6)
+        print(f"✓ Cached preprocessing matches; miss {miss_time * 1000:.0f} ms, hit {hit_time * 1000:.0f} ms")
+
+    print("\n✓ Tensor cache test passed!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_tensor_cache()
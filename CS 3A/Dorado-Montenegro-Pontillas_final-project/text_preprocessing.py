@@ -3,9 +3,15 @@ Text Preprocessing and Tokenization for Bilingual Hate Speech Detection
 Handles both Filipino and English text
 """
 
+import os
 import re
+import mmap
 import pickle
+import struct
+import multiprocessing
 from collections import Counter
+from collections.abc import Mapping
+from itertools import chain, repeat
 import numpy as np
 
 
@@ -15,8 +21,21 @@ class TextPreprocessor:
     - Lowercasing
     - Remove URLs, mentions, hashtags (or tokenize them)
     - Punctuation handling
+    
+    Patterns are compiled once and each substitution is skipped when the
+    text cannot match it (no 'http'/'www', '@' or '#'). The URL and mention
+    patterns are deliberately not fused into one alternation: they run in
+    sequence, and a fused pattern would treat text like 'a@http://x'
+    differently.
     """
     
+    URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+')
+    MENTION_PATTERN = re.compile(r'@\w+')
+    HASHTAG_PATTERN = re.compile(r'#\w+')
+    # Same result as substituting '#(\w+)' with its word: drop '#' before a word character
+    HASHTAG_MARK_PATTERN = re.compile(r'#(?=\w)')
+    PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+    
     def __init__(self, lowercase=True, remove_urls=True, remove_mentions=True, 
                  remove_hashtags=False, remove_punctuation=False):
         self.lowercase = lowercase
@@ -25,6 +44,20 @@ class TextPreprocessor:
         self.remove_hashtags = remove_hashtags
         self.remove_punctuation = remove_punctuation
         
+        # Substitution steps in order: (trigger substrings or None, pattern, replacement)
+        self._steps = []
+        if remove_urls:
+            self._steps.append((('http', 'www'), self.URL_PATTERN, ''))
+        if remove_mentions:
+            self._steps.append((('@',), self.MENTION_PATTERN, ''))
+        if remove_hashtags:
+            self._steps.append((('#',), self.HASHTAG_PATTERN, ''))
+        else:
+            # Keep hashtag content but remove #
+            self._steps.append((('#',), self.HASHTAG_MARK_PATTERN, ''))
+        if remove_punctuation:
+            self._steps.append((None, self.PUNCTUATION_PATTERN, ' '))
+        
     def preprocess(self, text):
         """Preprocess a single text"""
         if not isinstance(text, str):
@@ -34,33 +67,49 @@ class TextPreprocessor:
         if self.lowercase:
             text = text.lower()
         
-        # Remove URLs
-        if self.remove_urls:
-            text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-        
-        # Remove mentions
-        if self.remove_mentions:
-            text = re.sub(r'@\w+', '', text)
-        
-        # Remove hashtags
-        if self.remove_hashtags:
-            text = re.sub(r'#\w+', '', text)
-        else:
-            # Keep hashtag content but remove #
-            text = re.sub(r'#(\w+)', r'\1', text)
-        
-        # Remove punctuation
-        if self.remove_punctuation:
-            text = re.sub(r'[^\w\s]', ' ', text)
+        # URLs, mentions, hashtags and punctuation
+        for triggers, pattern, replacement in self._steps:
+            if triggers is None or any(t in text for t in triggers):
+                text = pattern.sub(replacement, text)
         
         # Remove extra whitespace
         text = ' '.join(text.split())
         
         return text
     
-    def preprocess_batch(self, texts):
-        """Preprocess a batch of texts"""
+    def _preprocess_chunk(self, texts):
         return [self.preprocess(text) for text in texts]
+    
+    def preprocess_batch(self, texts, n_jobs=1, chunksize=2000):
+        """
+        Preprocess a batch of texts
+        
+        Args:
+            texts: List of texts or a pandas Series (a Series is returned
+                with the same index)
+            n_jobs: Worker processes for corpus-scale batches (-1 for all CPUs)
+            chunksize: Texts per task sent to a worker
+        """
+        index = None
+        if hasattr(texts, 'index') and hasattr(texts, 'tolist'):
+            index, texts = texts.index, texts.tolist()
+        else:
+            texts = list(texts)
+        
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        
+        if n_jobs > 1 and len(texts) > chunksize:
+            chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+            with multiprocessing.Pool(min(n_jobs, len(chunks))) as pool:
+                processed = [text for chunk in pool.map(self._preprocess_chunk, chunks) for text in chunk]
+        else:
+            processed = self._preprocess_chunk(texts)
+        
+        if index is not None:
+            import pandas as pd
+            return pd.Series(processed, index=index, dtype=object)
+        return processed
 
 
 class Vocabulary:
@@ -68,6 +117,9 @@ class Vocabulary:
     Build vocabulary from text corpus
     """
     
+    # Texts encoded per step by encode_batch
+    ENCODE_CHUNK_SIZE = 2048
+    
     def __init__(self, max_vocab_size=10000, min_freq=2):
         self.max_vocab_size = max_vocab_size
         self.min_freq = min_freq
@@ -119,13 +171,82 @@ class Vocabulary:
     def text_to_sequence(self, text, max_length=None):
         """Convert text to sequence of indices"""
         words = text.split()
-        sequence = [self.word2idx.get(word, self.word2idx[self.UNK_TOKEN]) for word in words]
         
         # Truncate if needed
-        if max_length and len(sequence) > max_length:
-            sequence = sequence[:max_length]
+        if max_length:
+            words = words[:max_length]
+        
+        return list(map(self.word2idx.get, words, repeat(self.word2idx[self.UNK_TOKEN])))
+    
+    def encode_batch(self, texts, max_length=100, pad_to_max_length=False):
+        """
+        Encode a batch of texts into a padded id array in one call
+        
+        Tokens are looked up with one map over each flattened chunk of texts
+        and scattered into a preallocated buffer with one indexed assignment,
+        instead of one Python loop per word and per row. Texts with no tokens
+        are encoded as a single <UNK>, as the app and training dataset do.
+        
+        Args:
+            texts: Iterable of preprocessed texts
+            max_length: Maximum tokens per text
+            pad_to_max_length: Pad to max_length instead of the longest text
             
-        return sequence
+        Returns:
+            ids: int32 array [batch_size, seq_len]
+            lengths: int64 array [batch_size]
+        """
+        unk_idx = self.word2idx[self.UNK_TOKEN]
+        pad_idx = self.word2idx[self.PAD_TOKEN]
+        lookup = self.word2idx.get
+        
+        if not isinstance(texts, list):
+            texts = list(texts)
+        
+        if len(texts) == 1 and not pad_to_max_length:
+            # Serving path: skip the scatter machinery for a single post
+            ids = np.fromiter(map(lookup, texts[0].split()[:max_length], repeat(unk_idx)), dtype=np.int32)
+            if len(ids) == 0:
+                ids = np.array([unk_idx], dtype=np.int32)
+            return ids[None, :], np.array([len(ids)], dtype=np.int64)
+        
+        # Encode in chunks straight into one buffer; small working lists stay cache-friendly
+        padded = np.full((len(texts), max_length), pad_idx, dtype=np.int32)
+        lengths = np.empty(len(texts), dtype=np.int64)
+        for start in range(0, len(texts), self.ENCODE_CHUNK_SIZE):
+            end = start + self.ENCODE_CHUNK_SIZE
+            self._encode_into(texts[start:end], padded[start:end], lengths[start:end], lookup, unk_idx)
+        
+        empty = lengths == 0
+        padded[empty, 0] = unk_idx
+        lengths[empty] = 1
+        
+        if not pad_to_max_length:
+            padded = padded[:, :int(lengths.max(initial=1))]
+        
+        return padded, lengths
+    
+    @staticmethod
+    def _encode_into(texts, padded, lengths, lookup, unk_idx):
+        """Encode texts into rows of a preallocated [n, max_length] buffer"""
+        max_length = padded.shape[1]
+        tokens = [text.split() for text in texts]
+        token_counts = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        ids = np.fromiter(
+            map(lookup, chain.from_iterable(tokens), repeat(unk_idx)),
+            dtype=np.int32, count=int(token_counts.sum())
+        )
+        np.minimum(token_counts, max_length, out=lengths)
+        
+        # Flat destination of every token: row offset plus position in its text
+        starts = np.cumsum(token_counts) - token_counts
+        positions = np.arange(len(ids)) - np.repeat(starts, token_counts)
+        destinations = np.repeat(np.arange(len(tokens)) * max_length, token_counts) + positions
+        if (token_counts > max_length).any():
+            # Drop tokens beyond max_length (looked up anyway; slicing every row costs more)
+            keep = positions < max_length
+            destinations, ids = destinations[keep], ids[keep]
+        padded.reshape(-1)[destinations] = ids
     
     def sequence_to_text(self, sequence):
         """Convert sequence of indices back to text"""
@@ -133,7 +254,11 @@ class Vocabulary:
         return ' '.join(words)
     
     def save(self, filepath):
-        """Save vocabulary to file"""
+        """Save vocabulary to file (compact format for .vocab paths, pickle otherwise)"""
+        if filepath.endswith(CompactVocabulary.EXTENSION):
+            self.save_compact(filepath)
+            return
+        
         vocab_data = {
             'word2idx': self.word2idx,
             'idx2word': self.idx2word,
@@ -145,9 +270,38 @@ class Vocabulary:
             pickle.dump(vocab_data, f)
         print(f"✓ Vocabulary saved to: {filepath}")
     
+    def save_compact(self, filepath):
+        """Save the id-to-word table in the memory-mappable CompactVocabulary format"""
+        words = [None] * len(self.word2idx)
+        for word, idx in self.word2idx.items():
+            if not 0 <= idx < len(words) or words[idx] is not None:
+                raise ValueError("Compact format needs contiguous ids 0..n-1")
+            words[idx] = word
+        
+        encoded = [word.encode('utf-8') for word in words]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+        np.cumsum([len(word) for word in encoded], out=offsets[1:])
+        # Ids ordered by their word's UTF-8 bytes: the index word lookups binary-search
+        sorted_ids = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype='<u4')
+        
+        with open(filepath, 'wb') as f:
+            f.write(CompactVocabulary.HEADER.pack(
+                CompactVocabulary.MAGIC, CompactVocabulary.VERSION,
+                len(words), self.max_vocab_size, self.min_freq
+            ))
+            f.write(offsets.tobytes())
+            f.write(sorted_ids.tobytes())
+            f.write(b''.join(encoded))
+        print(f"✓ Vocabulary saved to: {filepath}")
+    
     @classmethod
     def load(cls, filepath):
-        """Load vocabulary from file"""
+        """Load vocabulary from file (.vocab files are memory-mapped)"""
+        if filepath.endswith(CompactVocabulary.EXTENSION):
+            vocab = CompactVocabulary(filepath)
+            print(f"✓ Vocabulary loaded: {len(vocab)} words")
+            return vocab
+        
         with open(filepath, 'rb') as f:
             vocab_data = pickle.load(f)
         
@@ -166,6 +320,155 @@ class Vocabulary:
         return len(self.word2idx)
 
 
+class _MappedWordIndex(Mapping):
+    """word -> id view of a CompactVocabulary, answered from the mapped file"""
+    
+    def __init__(self, vocab):
+        self._vocab = vocab
+        # Words found so far; only the words actually looked up are ever held in memory
+        self._found = {}
+    
+    def __getitem__(self, word):
+        idx = self._found.get(word)
+        if idx is None:
+            idx = self._vocab.lookup(word)
+            if idx is None:
+                raise KeyError(word)
+            self._found[word] = idx
+        return idx
+    
+    def get(self, word, default=None):
+        idx = self._found.get(word)
+        if idx is None:
+            idx = self._vocab.lookup(word)
+            if idx is None:
+                return default
+            self._found[word] = idx
+        return idx
+    
+    def __contains__(self, word):
+        return self.get(word) is not None
+    
+    def __iter__(self):
+        return iter(self._vocab.words())
+    
+    def __len__(self):
+        return len(self._vocab)
+
+
+class _MappedIdIndex(Mapping):
+    """id -> word view of a CompactVocabulary, answered from the mapped file"""
+    
+    def __init__(self, vocab):
+        self._vocab = vocab
+    
+    def __getitem__(self, idx):
+        if not isinstance(idx, (int, np.integer)) or not 0 <= idx < len(self._vocab):
+            raise KeyError(idx)
+        return self._vocab.word(int(idx))
+    
+    def __iter__(self):
+        return iter(range(len(self._vocab)))
+    
+    def __len__(self):
+        return len(self._vocab)
+
+
+class CompactVocabulary(Vocabulary):
+    """
+    Read-only vocabulary backed by a memory-mapped .vocab file
+    
+    File layout (little-endian):
+        header      magic, version, n_words, max_vocab_size, min_freq
+        offsets     uint32[n_words + 1], byte offset of each word in the blob
+        sorted_ids  uint32[n_words], ids in order of their word's UTF-8 bytes
+        blob        UTF-8 words concatenated in id order
+    
+    Word i is blob[offsets[i]:offsets[i + 1]], so ids map to words without
+    parsing the file, and a word's id is found by binary search over
+    sorted_ids. word2idx and idx2word are read-only views of the mapped
+    table; word2idx only remembers the words that were looked up. The
+    corpus frequency table is not stored (word_freq is empty), which is
+    what keeps the file small and fast to open.
+    """
+    
+    EXTENSION = '.vocab'
+    MAGIC = b'HSVOCAB\x00'
+    VERSION = 2
+    HEADER = struct.Struct('<8sIIII')
+    
+    def __init__(self, filepath):
+        with open(filepath, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, n_words, max_vocab_size, min_freq = self.HEADER.unpack_from(self._mmap)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{filepath} is not a compact vocabulary file (version {self.VERSION})")
+        
+        super().__init__(max_vocab_size=max_vocab_size, min_freq=min_freq)
+        self._n_words = n_words
+        self._offsets = np.frombuffer(self._mmap, dtype='<u4', count=n_words + 1, offset=self.HEADER.size)
+        self._sorted_ids = np.frombuffer(self._mmap, dtype='<u4', count=n_words,
+                                         offset=self.HEADER.size + self._offsets.nbytes)
+        self._blob_start = self.HEADER.size + self._offsets.nbytes + self._sorted_ids.nbytes
+        self._word2idx = _MappedWordIndex(self)
+        self._idx2word = _MappedIdIndex(self)
+    
+    @property
+    def word2idx(self):
+        return self._word2idx
+    
+    @word2idx.setter
+    def word2idx(self, value):
+        # Vocabulary.__init__ assigns empty dicts; the mapped views are set right after
+        self._word2idx = value
+    
+    @property
+    def idx2word(self):
+        return self._idx2word
+    
+    @idx2word.setter
+    def idx2word(self, value):
+        self._idx2word = value
+    
+    def _word_bytes(self, idx):
+        start = self._blob_start + int(self._offsets[idx])
+        end = self._blob_start + int(self._offsets[idx + 1])
+        return self._mmap[start:end]
+    
+    def word(self, idx):
+        """Word for an id, read directly from the mapped table"""
+        return self._word_bytes(idx).decode('utf-8')
+    
+    def lookup(self, word):
+        """Id of a word by binary search over the mapped index, or None if it is not in the vocabulary"""
+        target = word.encode('utf-8')
+        lo, hi = 0, self._n_words
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word_bytes(int(self._sorted_ids[mid])) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_words:
+            idx = int(self._sorted_ids[lo])
+            if self._word_bytes(idx) == target:
+                return idx
+        return None
+    
+    def words(self):
+        """All words in id order"""
+        blob = self._mmap[self._blob_start:]
+        offsets = self._offsets.tolist()
+        return [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+    
+    def build_vocab(self, texts):
+        raise TypeError("CompactVocabulary is read-only; build a Vocabulary and save it as .vocab")
+    
+    def __len__(self):
+        return self._n_words
+
+
 def pad_sequences(sequences, max_length=None, padding_value=0):
     """
     Pad sequences to same length
@@ -179,23 +482,21 @@ def pad_sequences(sequences, max_length=None, padding_value=0):
         padded_sequences: Numpy array of padded sequences
         lengths: Original lengths of sequences
     """
-    lengths = [len(seq) for seq in sequences]
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
     
     if max_length is None:
-        max_length = max(lengths)
+        max_length = int(lengths.max())
     
-    # Initialize padded array
+    # Truncate, then scatter all values into the preallocated array at once
+    lengths = np.minimum(lengths, max_length)
+    values = np.fromiter(
+        chain.from_iterable(seq[:max_length] for seq in sequences),
+        dtype=np.int64, count=int(lengths.sum())
+    )
     padded_sequences = np.full((len(sequences), max_length), padding_value, dtype=np.int64)
+    padded_sequences[np.arange(max_length) < lengths[:, None]] = values
     
-    # Fill with sequences
-    for i, (seq, length) in enumerate(zip(sequences, lengths)):
-        if length > max_length:
-            padded_sequences[i] = seq[:max_length]
-            lengths[i] = max_length
-        else:
-            padded_sequences[i, :length] = seq
-    
-    return padded_sequences, np.array(lengths, dtype=np.int64)
+    return padded_sequences, lengths
 
 
 def test_preprocessing():
@@ -0,0 +1,239 @@
+"""
+Virtualized Feed for the HateShield App
+Draws only the post cards that are on screen and recycles them while scrolling
+
+Every post gets a card height computed once from its text, so the position
+of any post is a prefix sum and the scroll region covers the whole feed
+without creating its widgets. A small pool of card widgets is rebound to
+whichever posts are visible, so the widget count stays constant however
+many posts the session has.
+"""
+
+import math
+import tkinter as tk
+import tkinter.font as tkfont
+from datetime import datetime
+
+import numpy as np
+
+
+class PostCard:
+    """One reusable post card, embedded in the feed canvas as a window item"""
+
+    def __init__(self, canvas, format_timestamp):
+        self.canvas = canvas
+        self.format_timestamp = format_timestamp
+        self.post_id = None
+
+        self.frame = tk.Frame(canvas, bg='white', relief='solid', borderwidth=1)
+        # Fixed height set by the feed, so layout never depends on the widgets
+        self.frame.pack_propagate(False)
+
+        # Post header
+        header = tk.Frame(self.frame, bg='white')
+        header.pack(fill='x', padx=15, pady=10)
+
+        tk.Label(header, text="👤", font=('Segoe UI', 20), bg='white').pack(side='left', padx=(0, 10))
+
+        user_info = tk.Frame(header, bg='white')
+        user_info.pack(side='left')
+        tk.Label(user_info, text="User", font=('Segoe UI', 11, 'bold'), bg='white').pack(anchor='w')
+        self.time_label = tk.Label(user_info, font=('Segoe UI', 9), bg='white', fg='#65676B')
+        self.time_label.pack(anchor='w')
+
+        # Post content
+        self.content_label = tk.Label(
+            self.frame,
+            font=('Segoe UI', 12),
+            bg='white',
+            fg='#050505',
+            justify='left',
+            anchor='nw'
+        )
+        self.content_label.pack(fill='x', padx=15, pady=(0, 15))
+
+        # Separator
+        tk.Frame(self.frame, height=1, bg='#CED0D4').pack(fill='x', padx=15)
+
+        # Actions (Like, Comment, Share)
+        actions_frame = tk.Frame(self.frame, bg='white')
+        actions_frame.pack(fill='x', pady=8)
+        for icon, text in [('👍', 'Like'), ('💬', 'Comment'), ('↗️', 'Share')]:
+            tk.Label(actions_frame, text=f"{icon} {text}", font=('Segoe UI', 10),
+                     bg='white', fg='#65676B', cursor='hand2').pack(side='left', expand=True)
+
+        self.window = canvas.create_window(0, VirtualFeed.OFFSCREEN, window=self.frame, anchor='nw')
+
+    def bind(self, record, x, y, width, height, wraplength):
+        """Show record at (x, y) with the given size"""
+        if record.post_id != self.post_id:
+            self.post_id = record.post_id
+            self.content_label.config(text=record.content)
+        self.time_label.config(text=f"{self.format_timestamp(datetime.fromtimestamp(record.timestamp))} · 🌐")
+        self.content_label.config(wraplength=wraplength)
+        self.canvas.itemconfigure(self.window, width=width, height=height)
+        self.canvas.coords(self.window, x, y)
+
+    def hide(self):
+        self.post_id = None
+        self.canvas.coords(self.window, 0, VirtualFeed.OFFSCREEN)
+
+
+class VirtualFeed:
+    """
+    Scrollable, newest-first feed of a PostStore
+
+    Call add(record) after appending to the store. Only the cards in view
+    (plus `overscan` on each side) exist as widgets.
+    """
+
+    CARD_GAP = 16
+    MARGIN = 10
+    MAX_WIDTH = 1200
+    OFFSCREEN = -100000
+
+    def __init__(self, parent, store, format_timestamp, bg='#F0F2F5', overscan=2):
+        """
+        Args:
+            parent: Widget to pack the feed canvas into
+            store: PostStore holding the posts
+            format_timestamp: Function turning a datetime into display text
+            bg: Feed background colour
+            overscan: Extra cards kept ready above and below the view
+        """
+        self.store = store
+        self.format_timestamp = format_timestamp
+        self.overscan = overscan
+
+        self.canvas = tk.Canvas(parent, bg=bg, highlightthickness=0)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.bind('<Configure>', self._on_configure)
+
+        self.content_font = tkfont.Font(family='Segoe UI', size=12)
+        self.linespace = self.content_font.metrics('linespace')
+
+        # Per post (oldest first): pixel width of each paragraph, and the card height
+        self.paragraph_widths = []
+        self.heights = np.zeros(0, dtype=np.int32)
+        self.tops = np.zeros(1, dtype=np.int64)  # display order, plus the total at the end
+
+        self.width = None
+        self.base_height = None
+        self.cards = []      # every card widget ever created
+        self.free = []       # cards not bound to a post
+        self.visible = {}    # post_id -> card
+        self.placeholder = None
+
+    # Layout
+
+    def _card_geometry(self):
+        canvas_width = max(self.canvas.winfo_width(), 1)
+        width = min(self.MAX_WIDTH, max(canvas_width - 2 * self.MARGIN, 200))
+        x = (canvas_width - width) // 2
+        # 15 px padding and a 1 px border on each side of the content label
+        return x, width, width - 32
+
+    def _measure_base_height(self):
+        # Height of a card minus its one line of text, measured on a real card
+        card = self._new_card()
+        card.content_label.config(text='x')
+        card.frame.pack_propagate(True)
+        card.frame.update_idletasks()
+        self.base_height = card.frame.winfo_reqheight() - self.linespace
+        card.frame.pack_propagate(False)
+        self.free.append(card)
+
+    def _height(self, paragraph_widths, wraplength):
+        # Leave some slack for word wrapping breaking lines early
+        lines = sum(max(1, math.ceil(w / (wraplength * 0.92))) for w in paragraph_widths)
+        return self.base_height + lines * self.linespace
+
+    def _relayout(self):
+        """Recompute display positions and the scroll region"""
+        heights = self.heights[::-1] + self.CARD_GAP
+        self.tops = np.concatenate(([0], np.cumsum(heights, dtype=np.int64)))
+        total = int(self.tops[-1])
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), max(total, 1)))
+        self._refresh()
+
+    def _on_configure(self, event=None):
+        x, width, wraplength = self._card_geometry()
+        if self.base_height is None:
+            self._measure_base_height()
+        if width != self.width:
+            # Text wraps differently at the new width
+            self.width = width
+            self.heights = np.array([self._height(widths, wraplength) for widths in self.paragraph_widths],
+                                    dtype=np.int32)
+        if self.placeholder is not None:
+            self.canvas.coords(self.placeholder, x, self.CARD_GAP // 2)
+            self.canvas.itemconfigure(self.placeholder, width=width)
+        self._relayout()
+
+    def _on_scroll(self, first, last):
+        self._refresh()
+
+    # Cards
+
+    def _new_card(self):
+        card = PostCard(self.canvas, self.format_timestamp)
+        self.cards.append(card)
+        return card
+
+    def _refresh(self):
+        """Bind cards to the posts in view and release the rest"""
+        n = len(self.heights)
+        if n == 0 or self.width is None:
+            return
+        x, width, wraplength = self._card_geometry()
+
+        view_top = self.canvas.canvasy(0)
+        view_bottom = view_top + self.canvas.winfo_height()
+        first = max(0, int(np.searchsorted(self.tops, view_top, side='right')) - 1 - self.overscan)
+        last = min(n, int(np.searchsorted(self.tops, view_bottom, side='left')) + self.overscan)
+        wanted = {n - 1 - position: position for position in range(first, last)}
+
+        for post_id in [post_id for post_id in self.visible if post_id not in wanted]:
+            card = self.visible.pop(post_id)
+            card.hide()
+            self.free.append(card)
+
+        for post_id, position in wanted.items():
+            card = self.visible.get(post_id)
+            if card is None:
+                card = self.free.pop() if self.free else self._new_card()
+                self.visible[post_id] = card
+            card.bind(self.store.get(post_id), x, int(self.tops[position]) + self.CARD_GAP // 2,
+                      width, int(self.heights[post_id]), wraplength)
+
+    # Public API
+
+    def set_placeholder(self, widget):
+        """Show widget (e.g. a welcome card) while the feed is empty"""
+        self.placeholder = self.canvas.create_window(0, self.CARD_GAP // 2, window=widget, anchor='nw')
+        if self.width is not None:
+            self._on_configure()
+
+    def add(self, record):
+        """Lay out a post just appended to the store"""
+        if self.placeholder is not None:
+            self.canvas.delete(self.placeholder)
+            self.placeholder = None
+        if self.base_height is None:
+            self._measure_base_height()
+        if self.width is None:
+            self.width = self._card_geometry()[1]
+
+        widths = tuple(self.content_font.measure(paragraph) for paragraph in record.content.split('\n'))
+        height = self._height(widths, self._card_geometry()[2])
+        self.paragraph_widths.append(widths)
+        self.heights = np.append(self.heights, np.int32(height))
+
+        # The new post goes on top; keep a scrolled-down view on the same posts
+        view_top = self.canvas.canvasy(0)
+        self._relayout()
+        if view_top > 0:
+            self.canvas.yview_moveto((view_top + height + self.CARD_GAP) / self.tops[-1])
+
+    def __len__(self):
+        return len(self.heights)
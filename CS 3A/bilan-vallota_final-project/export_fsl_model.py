@@ -0,0 +1,215 @@
+"""
+Export LandmarkLSTM for CPU inference.
+
+Folds both BatchNorm layers into the neighbouring weights, optionally applies
+int8 dynamic quantization to the LSTM and Linear layers, and saves the result
+as TorchScript. It then compares the export with the eager checkpoint
+(top-1 agreement, probability error and, if cached test clips are
+available, accuracy), compares zero-padded with variable-length (packed)
+inference, and measures per-window latency against the webcam frame budget.
+
+Usage:
+    python export_fsl_model.py                               # fsl_video_model_best.pth -> fsl_video_model_best.ts
+    python export_fsl_model.py --quantize                    # -> fsl_video_model_best_int8.ts
+    python export_fsl_model.py --quantize --threads 2 --data-root path/to/FSL-105
+
+Set MODEL_PATH in webcam_video_inference.py (or --model of fsl_pipeline.py)
+to the .ts file to use the export.
+"""
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from fsl_model import TORCHSCRIPT_EXTENSION, fold_batchnorm, load_classifier, sequence_lengths
+
+SEQUENCE_LENGTH = 120
+INPUT_SIZE = 126
+NUM_CLASSES = 105
+FRAME_BUDGET_MS = 1000 / 30    # one webcam frame at 30 FPS
+
+# Smallest top-1 agreement with the eager model, and largest accuracy drop, for a passing export
+MIN_AGREEMENT = 0.99
+MAX_ACCURACY_DROP = 0.005
+
+
+def export(model, output_path, fold=True, quantize=False):
+    """Fold BatchNorm, quantize if requested, script and save; returns the reloaded export"""
+    if fold:
+        model = fold_batchnorm(model)
+    if quantize:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        scripted = torch.jit.script(model)
+    torch.jit.save(scripted, output_path)
+    return load_classifier(output_path)
+
+
+def load_test_clips(data_root, cache_dir):
+    """Landmarks and labels of the test clips already in the landmark cache (see extract_landmarks.py)"""
+    import pandas as pd
+    from extract_landmarks import LandmarkCache
+
+    cache = LandmarkCache(cache_dir)
+    df = pd.read_csv(os.path.join(data_root, 'test.csv'))
+    sequences, labels = [], []
+    for vid_path, label in zip(df['vid_path'], df['id_label']):
+        path = os.path.join(data_root, vid_path)
+        landmarks = cache.load(path) if os.path.exists(path) else None
+        if landmarks is not None:
+            sequences.append(landmarks)
+            labels.append(label)
+    if not sequences:
+        return None, None
+    return np.stack(sequences), np.array(labels)
+
+
+def synthetic_clips(n=256, seed=0):
+    """Random-walk hand landmarks with a random number of trailing zero frames, like padded clips"""
+    rng = np.random.default_rng(seed)
+    clips = np.cumsum(rng.normal(0, 0.01, (n, SEQUENCE_LENGTH, INPUT_SIZE)), axis=1).astype(np.float32)
+    lengths = rng.integers(30, SEQUENCE_LENGTH + 1, size=n)
+    clips[np.arange(SEQUENCE_LENGTH) >= lengths[:, None]] = 0
+    return clips
+
+
+def with_lengths(model):
+    """Call model with the true length of every clip (packed LSTM, masked attention)"""
+    return lambda x: model(x, sequence_lengths(x))
+
+
+def predict_proba(model, clips, batch_size=64):
+    probabilities = []
+    with torch.inference_mode():
+        for start in range(0, len(clips), batch_size):
+            outputs = model(torch.from_numpy(clips[start:start + batch_size]))
+            probabilities.append(torch.softmax(outputs, dim=1).numpy())
+    return np.concatenate(probabilities)
+
+
+def parity_report(models, clips, labels=None, min_agreement=MIN_AGREEMENT):
+    """Top-1 agreement and max probability error of each model against the first (reference) model"""
+    header = f"\n{'Model':<32} {'Max |Δp|':<10} {'Agreement':<10}"
+    print(header + (f" {'Accuracy':<10}" if labels is not None else ""))
+    print("-" * 70)
+    reference = None
+    passed = True
+    for name, model in models:
+        probabilities = predict_proba(model, clips)
+        predictions = probabilities.argmax(axis=1)
+        accuracy = (predictions == labels).mean() if labels is not None else None
+        if reference is None:
+            reference = (probabilities, predictions, accuracy)
+        diff = np.abs(probabilities - reference[0]).max()
+        agreement = (predictions == reference[1]).mean()
+        line = f"{name:<32} {diff:<10.2e} {agreement:<10.2%}"
+        print(line + (f" {accuracy:<10.2%}" if accuracy is not None else ""))
+        if agreement < min_agreement or (accuracy is not None and reference[2] - accuracy > MAX_ACCURACY_DROP):
+            passed = False
+    return passed
+
+
+def latency_report(models, clips, batch_sizes=(1, 8), repeats=50):
+    """p50/p95 latency per forward pass on full 120-frame windows"""
+    print(f"\n{'Model':<32} {'Batch':<7} {'p50 (ms)':<10} {'p95 (ms)':<10} {'Windows/s':<10}")
+    print("-" * 70)
+    results = {}
+    for batch_size in batch_sizes:
+        batches = [torch.from_numpy(clips[i % len(clips):i % len(clips) + batch_size])
+                   for i in range(0, repeats * batch_size, batch_size)]
+        batches = [batch for batch in batches if len(batch) == batch_size] or [torch.from_numpy(clips[:batch_size])]
+        for name, model in models:
+            with torch.inference_mode():
+                for batch in batches[:5]:
+                    model(batch)
+                times = []
+                for batch in batches:
+                    start = time.perf_counter()
+                    model(batch)
+                    times.append(time.perf_counter() - start)
+            times = np.array(times) * 1000
+            results[name, batch_size] = np.percentile(times, 95)
+            print(f"{name:<32} {batch_size:<7} {np.percentile(times, 50):<10.2f} "
+                  f"{np.percentile(times, 95):<10.2f} {batch_size * 1000 / times.mean():<10,.1f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export LandmarkLSTM to TorchScript for CPU inference')
+    parser.add_argument('--model', default='fsl_video_model_best.pth', help='Training checkpoint (state_dict)')
+    parser.add_argument('--output', default=None,
+                        help='Output path (default: the checkpoint name with [_int8].ts)')
+    parser.add_argument('--quantize', action='store_true', help='int8 dynamic quantization of LSTM and Linear')
+    parser.add_argument('--no-fold', action='store_true', help='Keep the BatchNorm layers')
+    parser.add_argument('--data-root', default=None,
+                        help='FSL-105 folder; cached test clips are used for the parity check')
+    parser.add_argument('--cache-dir', default='landmark_cache')
+    parser.add_argument('--threads', type=int, default=None, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    suffix = '_int8' if args.quantize else ''
+    output = args.output or os.path.splitext(args.model)[0] + suffix + TORCHSCRIPT_EXTENSION
+
+    print("=" * 60)
+    print("EXPORTING LandmarkLSTM")
+    print("=" * 60)
+    eager = load_classifier(args.model, input_size=INPUT_SIZE, num_classes=NUM_CLASSES)
+    exported = export(eager, output, fold=not args.no_fold, quantize=args.quantize)
+    print(f"✓ Saved {output}")
+    print(f"  Checkpoint: {os.path.getsize(args.model) / 2**20:.2f} MB")
+    print(f"  Export:     {os.path.getsize(output) / 2**20:.2f} MB")
+
+    name = 'torchscript' + ('' if args.no_fold else ' folded') + (' int8' if args.quantize else '')
+    models = [('eager float32', eager), (name, exported)]
+
+    clips, labels = (None, None)
+    if args.data_root:
+        clips, labels = load_test_clips(args.data_root, args.cache_dir)
+        if clips is None:
+            print(f"No cached test clips in {args.cache_dir}; run extract_landmarks.py first")
+        else:
+            print(f"✓ Test clips: {len(clips)}")
+    if clips is None:
+        print("Checking parity on synthetic landmark sequences")
+        clips = synthetic_clips()
+
+    passed = parity_report(models, clips, labels)
+    print(f"\n{'✓' if passed else '✗'} Top-1 agreement >= {MIN_AGREEMENT:.0%}"
+          + (f" and accuracy within {MAX_ACCURACY_DROP:.1%}" if labels is not None else ""))
+
+    # The model was trained on zero-padded clips: packed inference should match or beat it
+    print("\nZero-padded vs variable-length (packed) inference")
+    packed_models = [('eager padded', eager), ('eager packed', with_lengths(eager)),
+                     (name + ' packed', with_lengths(exported))]
+    packed_passed = parity_report(packed_models, clips, labels, min_agreement=0)
+    if labels is not None:
+        print(f"\n{'✓' if packed_passed else '✗'} Packed accuracy within {MAX_ACCURACY_DROP:.1%} of padded")
+
+    latency = latency_report(models, clips)
+    p95 = latency[name, 1]
+
+    print(f"\nOne window every frame at 30 FPS leaves {FRAME_BUDGET_MS:.1f} ms; the export's p95 is {p95:.1f} ms "
+          f"({'fits' if p95 <= FRAME_BUDGET_MS else 'use a STRIDE of at least ' + str(int(np.ceil(p95 / FRAME_BUDGET_MS)))})")
+
+    short = clips[:, :40].copy()
+    short[np.abs(short).sum(axis=2) == 0] = 1e-3  # a 40-frame sign with a hand in every frame
+    print(f"\nShort sign: 40 frames, padded to {SEQUENCE_LENGTH} vs packed")
+    padded_short = np.zeros_like(clips)
+    padded_short[:, :40] = short
+    latency_report([('eager padded', eager), ('eager packed', with_lengths(eager)),
+                    (name + ' packed', with_lengths(exported))], padded_short, batch_sizes=(1,))
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
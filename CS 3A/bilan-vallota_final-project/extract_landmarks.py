@@ -0,0 +1,248 @@
+"""
+Parallel, cached landmark extraction for the FSL-105 clips.
+
+Runs MediaPipe Hands over every clip in train.csv / test.csv on a process
+pool, one Hands instance per worker, and stores each clip's (120, 126)
+landmark array as a .npy file. The file name is a hash of the clip's path,
+size and modification time and of the extractor settings, so an edited
+clip or a change of settings is extracted again while everything else is
+loaded from disk. Files are written atomically, so an interrupted run just
+continues with the clips that are missing.
+
+Usage:
+    python extract_landmarks.py                                # train.csv + test.csv of DATA_ROOT
+    python extract_landmarks.py --workers 4 --cache-dir landmark_cache
+    python extract_landmarks.py --data-root path/to/FSL-105 --csv train.csv
+
+In the notebook:
+    cache = LandmarkCache('landmark_cache')
+    extract_all(video_paths, cache)     # only missing clips are decoded
+    landmarks = cache.load(video_path)
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from fsl_landmarks import FRAME_SIZE, extract_landmarks_from_video
+
+DATA_ROOT = r"FSL-105 A dataset for recognizing 105 Filipino sign language videos\FSL-105 A dataset for recognizing 105 Filipino sign language videos"
+CACHE_DIR = 'landmark_cache'
+
+# Bump when fsl_landmarks changes what it writes for a frame
+FEATURE_VERSION = 1
+
+# Same settings as the notebook's MediaPipe setup
+DEFAULT_SETTINGS = {
+    'max_frames': 120,
+    'static_image_mode': False,
+    'max_num_hands': 2,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5,
+}
+
+
+class LandmarkCache:
+    """Directory of per-clip landmark arrays keyed by clip path, mtime and extractor settings."""
+
+    def __init__(self, cache_dir=CACHE_DIR, **settings):
+        self.cache_dir = cache_dir
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+
+    def key(self, video_path):
+        stat = os.stat(video_path)
+        identity = {
+            'path': os.path.abspath(video_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'settings': self.settings,
+            'version': FEATURE_VERSION,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+    def path_for(self, video_path):
+        return os.path.join(self.cache_dir, self.key(video_path) + '.npy')
+
+    def contains(self, video_path):
+        return os.path.exists(self.path_for(video_path))
+
+    def load(self, video_path):
+        """Cached (max_frames, 126) float32 landmarks of a clip, or None if not extracted yet."""
+        path = self.path_for(video_path)
+        if not os.path.exists(path):
+            return None
+        return np.load(path)
+
+    def save(self, video_path, landmarks):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path_for(video_path)
+        # Write to a temporary file and rename, so an interrupted run never leaves a partial .npy
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, landmarks)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+# Set in each worker process by _init_worker
+_hands = None
+_cache = None
+
+
+def _init_worker(cache_dir, settings):
+    """Create this worker's MediaPipe Hands once; it is reused for every clip the worker gets"""
+    global _hands, _cache
+    import mediapipe as mp_lib
+
+    _cache = LandmarkCache(cache_dir, **settings)
+    _hands = mp_lib.solutions.hands.Hands(
+        static_image_mode=settings['static_image_mode'],
+        max_num_hands=settings['max_num_hands'],
+        min_detection_confidence=settings['min_detection_confidence'],
+        min_tracking_confidence=settings['min_tracking_confidence']
+    )
+
+
+def _extract_clip(video_path):
+    """Extract and cache one clip; returns (video_path, error or None)"""
+    try:
+        landmarks = extract_landmarks_from_video(video_path, _hands, max_frames=_cache.settings['max_frames'])
+        _cache.save(video_path, landmarks)
+        return video_path, None
+    except Exception as e:
+        return video_path, f"{type(e).__name__}: {e}"
+
+
+def extract_all(video_paths, cache, workers=None, report_every=50):
+    """
+    Extract every clip that is not cached yet.
+
+    Returns (clips extracted in this run, list of (path, error) for clips that failed).
+    Failed clips are not cached, so the next run tries them again.
+    """
+    video_paths = list(dict.fromkeys(video_paths))
+    missing = [path for path in video_paths if not cache.contains(path)]
+    print(f"{len(video_paths) - len(missing)}/{len(video_paths)} clips cached, {len(missing)} to extract")
+    if not missing:
+        return 0, []
+
+    workers = min(workers or os.cpu_count() or 1, len(missing))
+    print(f"Extracting with {workers} worker(s)...")
+    errors = []
+    start = time.perf_counter()
+    init_args = (cache.cache_dir, cache.settings)
+
+    if workers > 1:
+        # spawn: every worker starts clean and builds its own MediaPipe graph
+        with mp.get_context('spawn').Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = pool.imap_unordered(_extract_clip, missing)
+            errors = _report(results, len(missing), start, report_every)
+    else:
+        _init_worker(*init_args)
+        errors = _report(map(_extract_clip, missing), len(missing), start, report_every)
+
+    elapsed = time.perf_counter() - start
+    done = len(missing) - len(errors)
+    print(f"Extracted {done} clips in {elapsed:.1f} s ({done / max(elapsed, 1e-9):.2f} clips/s)")
+    for path, error in errors:
+        print(f"  Failed: {path}: {error}")
+    return done, errors
+
+
+def _report(results, total, start, report_every):
+    errors = []
+    for i, (path, error) in enumerate(results, 1):
+        if error is not None:
+            errors.append((path, error))
+        if i % report_every == 0 or i == total:
+            elapsed = time.perf_counter() - start
+            rate = i / max(elapsed, 1e-9)
+            print(f"  {i}/{total} clips ({rate:.2f} clips/s, ETA {(total - i) / rate:.0f} s)", flush=True)
+    return errors
+
+
+def clip_paths(data_root, csv_names):
+    """Clip paths listed in the given CSVs of the dataset, skipping missing files"""
+    paths = []
+    for name in csv_names:
+        df = pd.read_csv(os.path.join(data_root, name))
+        for vid_path in df['vid_path']:
+            path = os.path.join(data_root, vid_path)
+            if os.path.exists(path):
+                paths.append(path)
+            else:
+                print(f"Warning: File not found {path}")
+    return paths
+
+
+def test_landmark_cache():
+    """Check cache keys, atomic saves and the resume logic (no video decoding)."""
+    print("=" * 60)
+    print("TESTING LANDMARK CACHE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, 'clip.mp4')
+        with open(clip, 'wb') as f:
+            f.write(b'not really a video')
+
+        cache = LandmarkCache(os.path.join(tmp, 'cache'))
+        assert cache.load(clip) is None
+        landmarks = np.random.default_rng(0).random((120, FRAME_SIZE), dtype=np.float32)
+        cache.save(clip, landmarks)
+        assert np.array_equal(cache.load(clip), landmarks)
+        assert [name for name in os.listdir(cache.cache_dir) if name.endswith('.tmp')] == []
+
+        # Other settings, or a modified clip, are different entries
+        assert LandmarkCache(cache.cache_dir, max_frames=60).load(clip) is None
+        assert LandmarkCache(cache.cache_dir).load(clip) is not None
+        os.utime(clip, ns=(0, 12345))
+        assert cache.load(clip) is None
+
+        # Everything cached: nothing to extract and no pool started
+        cache.save(clip, landmarks)
+        assert extract_all([clip, clip], cache) == (0, [])
+
+    print("\n✓ Landmark cache test passed!")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract and cache MediaPipe hand landmarks for FSL-105 clips')
+    parser.add_argument('--data-root', default=DATA_ROOT)
+    parser.add_argument('--csv', nargs='+', default=['train.csv', 'test.csv'], help='Clip lists inside --data-root')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--max-frames', type=int, default=DEFAULT_SETTINGS['max_frames'])
+    parser.add_argument('--self-test', action='store_true', help='Run the cache self-test and exit')
+    args = parser.parse_args()
+
+    if args.self_test:
+        test_landmark_cache()
+        return
+
+    print("=" * 60)
+    print("FSL-105 LANDMARK EXTRACTION")
+    print("=" * 60)
+    cache = LandmarkCache(args.cache_dir, max_frames=args.max_frames)
+    paths = clip_paths(args.data_root, args.csv)
+    _, errors = extract_all(paths, cache, workers=args.workers)
+    print(f"Cache: {os.path.abspath(args.cache_dir)}")
+    print("=" * 60)
+    if errors:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""
+Batched keypoint augmentations and motion features for FSL training.
+
+The same augmentations as the training notebook, rewritten to work on a
+whole batch of (B, T, 126) landmark sequences with tensor operations
+instead of Python loops over frames, landmarks and channels:
+
+- landmark dropout is a masked forward fill (cummax over kept frame indices),
+- frame dropout, temporal resampling and time warping are linear
+  interpolation by index math (gather the two neighbouring frames and blend),
+- rotation is one matrix multiply per batch,
+- exponential smoothing is one (T, T) matrix multiply.
+
+Every function accepts NumPy arrays or torch tensors, (T, C) or (B, T, C),
+and returns the same type and rank. Each sequence of a batch draws its own
+random parameters, so augmenting a batch is equivalent to augmenting its
+sequences one by one. AugmentCollate applies the pipeline per batch inside
+DataLoader workers.
+"""
+import math
+
+import numpy as np
+import torch
+
+def _as_batch(x):
+    """(tensor of shape (B, T, C), restore function) for any accepted input"""
+    is_numpy = isinstance(x, np.ndarray)
+    t = torch.from_numpy(x) if is_numpy else x
+    if not t.is_floating_point():
+        t = t.float()
+    single = t.dim() == 2
+    if single:
+        t = t.unsqueeze(0)
+
+    def restore(out):
+        if single:
+            out = out[0]
+        return out.numpy() if is_numpy else out
+
+    return t, restore
+
+
+def _uniform(low, high, size, generator, device):
+    return low + (high - low) * torch.rand(size, generator=generator, device=device)
+
+
+def _gather_frames(x, index):
+    """x[b, index[b, t], :] for x (B, T, C) and integer index (B, T_out)"""
+    return x.gather(1, index.unsqueeze(-1).expand(-1, -1, x.shape[-1]))
+
+
+def interpolate_frames(x, positions):
+    """
+    Sample x (B, T, C) at fractional frame positions (B, T_out) by linear interpolation.
+
+    Positions are clamped to [0, T - 1], like np.interp at the ends.
+    """
+    T = x.shape[1]
+    positions = positions.clamp(0, T - 1)
+    lower = positions.floor().long().clamp(max=T - 2) if T > 1 else positions.long()
+    upper = (lower + 1).clamp(max=T - 1)
+    weight = (positions - lower.to(positions.dtype)).unsqueeze(-1).to(x.dtype)
+    return _gather_frames(x, lower) * (1 - weight) + _gather_frames(x, upper) * weight
+
+
+# --- Deterministic batched operations ---
+
+def drop_landmarks(x, mask):
+    """
+    Replace dropped landmarks by their last kept value (zero before the first one).
+
+    x: (B, T, C); mask: bool (B, T, C // 3), True where a landmark is dropped.
+    """
+    x, restore = _as_batch(x)
+    B, T, C = x.shape
+    points = x.reshape(B, T, C // 3, 3)
+    frame = torch.arange(T, device=x.device).view(1, T, 1).expand(B, T, C // 3)
+    # Index of the last kept frame at or before t, -1 if none
+    last_kept = torch.where(mask, torch.full_like(frame, -1), frame).cummax(dim=1).values
+    filled = points.gather(1, last_kept.clamp(min=0).unsqueeze(-1).expand(-1, -1, -1, 3))
+    filled = filled * (last_kept >= 0).unsqueeze(-1).to(x.dtype)
+    return restore(filled.reshape(B, T, C))
+
+
+def drop_frames(x, mask):
+    """
+    Replace dropped frames by linear interpolation between the nearest kept frames.
+
+    x: (B, T, C); mask: bool (B, T), True where a frame is dropped. Sequences
+    with every frame dropped are returned unchanged.
+    """
+    x, restore = _as_batch(x)
+    B, T, _ = x.shape
+    mask = mask & ~mask.all(dim=1, keepdim=True)
+    frame = torch.arange(T, device=x.device).expand(B, T)
+
+    previous = torch.where(mask, torch.full_like(frame, -1), frame).cummax(dim=1).values
+    following = torch.where(mask, torch.full_like(frame, T), frame).flip(1).cummin(dim=1).values.flip(1)
+    # Before the first / after the last kept frame, hold that frame's value
+    previous = torch.where(previous < 0, following, previous)
+    following = torch.where(following >= T, previous, following)
+
+    span = (following - previous).clamp(min=1).to(x.dtype)
+    weight = ((frame - previous).to(x.dtype) / span).unsqueeze(-1)
+    out = _gather_frames(x, previous) * (1 - weight) + _gather_frames(x, following) * weight
+    return restore(out)
+
+
+def resample(x, new_lengths):
+    """
+    Resample each sequence to new_lengths[b] frames and back to T (speed change with blur).
+
+    x: (B, T, C); new_lengths: int (B,), each at least 2.
+    """
+    x, restore = _as_batch(x)
+    B, T, _ = x.shape
+    dtype = torch.float64
+    new_lengths = torch.as_tensor(new_lengths, device=x.device).view(B, 1).to(dtype)
+    # Position of every output frame in the shortened/stretched sequence ...
+    up = torch.arange(T, device=x.device, dtype=dtype).expand(B, T) * (new_lengths - 1) / (T - 1)
+    lower = up.floor().clamp(max=new_lengths - 2)
+    weight = (up - lower).unsqueeze(-1).to(x.dtype)
+    upper = (lower + 1).clamp(max=new_lengths - 1)
+    # ... whose two neighbours are themselves interpolated from the original frames
+    step = (T - 1) / (new_lengths - 1)
+    out = interpolate_frames(x, lower * step) * (1 - weight) + interpolate_frames(x, upper * step) * weight
+    return restore(out)
+
+
+def warp_time(x, warp):
+    """
+    Resample x so that frame warp[b, t] of the output comes from frame t of the input.
+
+    Equivalent to np.interp(arange(T), warp, x[:, c]) per channel; warp (B, T)
+    must be increasing from 0 to T - 1.
+    """
+    x, restore = _as_batch(x)
+    B, T, _ = x.shape
+    warp = warp.to(torch.float64).contiguous()
+    grid = torch.arange(T, device=x.device, dtype=torch.float64).expand(B, T).contiguous()
+    lower = (torch.searchsorted(warp, grid, right=True) - 1).clamp(0, T - 2)
+    start = warp.gather(1, lower)
+    end = warp.gather(1, lower + 1)
+    weight = ((grid - start) / (end - start).clamp(min=1e-12)).clamp(0, 1)
+    return restore(interpolate_frames(x, lower.to(torch.float64) + weight))
+
+
+def rotate(x, angles):
+    """Rotate every landmark's (x, y) by angles[b] radians; z is unchanged. One batched matmul."""
+    x, restore = _as_batch(x)
+    B, T, C = x.shape
+    angles = torch.as_tensor(angles, device=x.device, dtype=x.dtype).view(B)
+    cos_a, sin_a = angles.cos(), angles.sin()
+    rotation = torch.zeros(B, 3, 3, device=x.device, dtype=x.dtype)
+    rotation[:, 0, 0], rotation[:, 0, 1] = cos_a, -sin_a
+    rotation[:, 1, 0], rotation[:, 1, 1] = sin_a, cos_a
+    rotation[:, 2, 2] = 1
+    points = x.reshape(B, T * C // 3, 3)
+    return restore(torch.bmm(points, rotation.transpose(1, 2)).reshape(B, T, C))
+
+
+# --- Random augmentations (per-sequence parameters) ---
+
+def add_gaussian_jitter(x, sigma=0.01, generator=None):
+    x, restore = _as_batch(x)
+    sigma = torch.as_tensor(sigma, device=x.device, dtype=x.dtype).reshape(-1, 1, 1)
+    noise = torch.randn(x.shape, generator=generator, device=x.device, dtype=x.dtype)
+    return restore(x + noise * sigma)
+
+
+def random_landmark_dropout(x, p_drop=0.05, generator=None):
+    x, restore = _as_batch(x)
+    B, T, C = x.shape
+    p_drop = torch.as_tensor(p_drop, device=x.device).reshape(-1, 1, 1)
+    mask = torch.rand((B, T, C // 3), generator=generator, device=x.device) < p_drop
+    return restore(drop_landmarks(x, mask))
+
+
+def random_frame_dropout(x, p_frame=0.03, generator=None):
+    x, restore = _as_batch(x)
+    B, T, _ = x.shape
+    p_frame = torch.as_tensor(p_frame, device=x.device).reshape(-1, 1)
+    mask = torch.rand((B, T), generator=generator, device=x.device) < p_frame
+    return restore(drop_frames(x, mask))
+
+
+def temporal_resample_and_jitter(x, min_ratio=0.85, max_ratio=1.15, generator=None):
+    """Gentler temporal augmentation"""
+    x, restore = _as_batch(x)
+    B, T, _ = x.shape
+    ratio = _uniform(min_ratio, max_ratio, B, generator, x.device)
+    new_lengths = (T * ratio.double()).floor().long().clamp(min=3)
+    return restore(resample(x, new_lengths))
+
+
+def scale_augmentation(x, scale_range=(0.9, 1.1), generator=None):
+    """Scale landmarks uniformly - helps with different hand sizes"""
+    x, restore = _as_batch(x)
+    scale = _uniform(scale_range[0], scale_range[1], x.shape[0], generator, x.device).to(x.dtype)
+    return restore(x * scale.view(-1, 1, 1))
+
+
+def rotation_augmentation(x, max_angle=15, generator=None):
+    """Rotate landmarks in 2D plane (x, y) - simulates camera angle differences"""
+    x, restore = _as_batch(x)
+    angles = _uniform(-max_angle, max_angle, x.shape[0], generator, x.device) * math.pi / 180
+    return restore(rotate(x, angles))
+
+
+def time_warp(x, sigma=0.1, generator=None):
+    """Smooth time warping - simulates speed variations"""
+    x, restore = _as_batch(x)
+    B, T, _ = x.shape
+    steps = 1 + sigma * torch.randn((B, T), generator=generator, device=x.device, dtype=torch.float64)
+    warp = steps.cumsum(dim=1)
+    warp = warp - warp[:, :1]
+    warp = (warp / warp[:, -1:] * (T - 1)).clamp(0, T - 1)
+    return restore(warp_time(x, warp))
+
+
+def _apply_some(x, probability, augment, generator, **params):
+    """Apply augment to a random subset of the batch, each sequence with the given probability"""
+    chosen = (torch.rand(x.shape[0], generator=generator, device=x.device) < probability).nonzero().flatten()
+    if len(chosen):
+        params = {name: value[chosen] if torch.is_tensor(value) else value for name, value in params.items()}
+        x[chosen] = augment(x[chosen], generator=generator, **params)
+    return x
+
+
+def simulate_webcam_keypoint_aug(x, generator=None):
+    """Balanced augmentation pipeline - not too aggressive"""
+    x, restore = _as_batch(x)
+    B = x.shape[0]
+    device = x.device
+
+    # Always apply light jitter
+    x = add_gaussian_jitter(x, sigma=_uniform(0.003, 0.01, B, generator, device), generator=generator)
+
+    # Randomly apply other augmentations
+    x = _apply_some(x, 0.3, random_landmark_dropout, generator,
+                    p_drop=_uniform(0.02, 0.08, B, generator, device))
+    x = _apply_some(x, 0.2, random_frame_dropout, generator,
+                    p_frame=_uniform(0.01, 0.04, B, generator, device))
+    x = _apply_some(x, 0.5, scale_augmentation, generator, scale_range=(0.9, 1.1))
+    x = _apply_some(x, 0.4, rotation_augmentation, generator, max_angle=10)
+    x = _apply_some(x, 0.3, time_warp, generator, sigma=0.08)
+    x = _apply_some(x, 0.2, temporal_resample_and_jitter, generator, min_ratio=0.9, max_ratio=1.1)
+    return restore(x)
+
+
+# --- Motion Features ---
+
+def add_velocity_accel(x):
+    """(B, T, C) -> (B, T, 3 * C): positions, velocity and acceleration (zero at the start)"""
+    x, restore = _as_batch(x)
+    vel = torch.zeros_like(x)
+    vel[:, 1:] = x[:, 1:] - x[:, :-1]
+    accel = torch.zeros_like(x)
+    accel[:, 1:] = vel[:, 1:] - vel[:, :-1]
+    return restore(torch.cat([x, vel, accel], dim=-1))
+
+
+def exp_smooth(x, alpha=0.3):
+    """Exponential smoothing along time, out[t] = alpha * x[t] + (1 - alpha) * out[t - 1], as one matmul"""
+    x, restore = _as_batch(x)
+    T = x.shape[1]
+    t = torch.arange(T, device=x.device, dtype=torch.float64)
+    lag = t.view(-1, 1) - t.view(1, -1)
+    weights = torch.where(lag >= 0, alpha * (1 - alpha) ** lag.clamp(min=0), torch.zeros_like(lag))
+    # out[0] = x[0], so frame 0 keeps the weight alpha would have given the frames before it
+    weights[:, 0] = (1 - alpha) ** t
+    return restore(torch.matmul(weights.to(x.dtype), x))
+
+
+def motion_features(x):
+    """Smoothing and velocity/acceleration features used by the model (126 -> 378 channels)"""
+    x = exp_smooth(x, alpha=0.2)
+    x = add_velocity_accel(x)
+    return exp_smooth(x, alpha=0.1)
+
+
+class AugmentCollate:
+    """
+    DataLoader collate_fn: stack (landmarks, label) items, augment the batch and add motion features.
+
+    Runs in the DataLoader worker processes, so augmentation overlaps with training.
+    """
+
+    def __init__(self, augment=False, seed=None):
+        self.augment = augment
+        self.seed = seed
+        self.generator = None
+
+    def __call__(self, batch):
+        landmarks, labels = zip(*batch)
+        x = torch.stack([torch.as_tensor(np.asarray(lm), dtype=torch.float32) for lm in landmarks])
+        if self.augment:
+            generator = None
+            # DataLoader reseeds the global RNG of every worker each epoch, so
+            # workers use it; only the main process needs its own stream
+            if torch.utils.data.get_worker_info() is None and self.seed is not None:
+                if self.generator is None:
+                    self.generator = torch.Generator().manual_seed(self.seed)
+                generator = self.generator
+            x = simulate_webcam_keypoint_aug(x, generator=generator)
+        return motion_features(x), torch.as_tensor(labels, dtype=torch.long)
+
+
+def test_augment():
+    """Compare the batched operations with the notebook's loop versions and time both."""
+    import time
+
+    print("=" * 60)
+    print("TESTING BATCHED KEYPOINT AUGMENTATION")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    B, T, C = 32, 120, 126
+    seqs = rng.standard_normal((B, T, C)).astype(np.float32)
+
+    # Loop versions from the notebook, with the random draws passed in
+    def ref_landmark_dropout(seq, mask):
+        seq = seq.copy()
+        for t in range(seq.shape[0]):
+            for i, m in enumerate(mask[t]):
+                if m:
+                    seq[t, i*3:i*3+3] = seq[t-1, i*3:i*3+3] if t > 0 else 0.0
+        return seq
+
+    def ref_frame_dropout(seq, drop_mask):
+        seq = seq.copy()
+        kept_idx = np.where(~drop_mask)[0]
+        if not drop_mask.any() or len(kept_idx) == 0:
+            return seq
+        for c in range(seq.shape[1]):
+            seq[:, c] = np.interp(np.arange(len(seq)), kept_idx, seq[kept_idx, c])
+        return seq
+
+    def ref_resample(seq, new_T):
+        T, C = seq.shape
+        old_idx = np.linspace(0, T - 1, new_T)
+        new_seq = np.stack([np.interp(old_idx, np.arange(T), seq[:, c]) for c in range(C)], axis=1)
+        up_idx = np.linspace(0, new_T - 1, T)
+        return np.stack([np.interp(up_idx, np.arange(new_T), new_seq[:, c]) for c in range(C)], axis=1)
+
+    def ref_rotation(seq, angle):
+        seq = seq.copy()
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        for i in range(0, seq.shape[1], 3):
+            x, y = seq[:, i].copy(), seq[:, i+1].copy()
+            seq[:, i] = cos_a * x - sin_a * y
+            seq[:, i+1] = sin_a * x + cos_a * y
+        return seq
+
+    def ref_time_warp(seq, warp):
+        return np.stack([np.interp(np.arange(len(seq)), warp, seq[:, c]) for c in range(seq.shape[1])], axis=1)
+
+    def ref_exp_smooth(seq, alpha):
+        out = np.zeros_like(seq)
+        out[0] = seq[0]
+        for t in range(1, len(seq)):
+            out[t] = alpha * seq[t] + (1 - alpha) * out[t-1]
+        return out
+
+    def ref_velocity_accel(seq):
+        vel = np.vstack([np.zeros((1, seq.shape[1])), seq[1:] - seq[:-1]])
+        accel = np.vstack([np.zeros((1, seq.shape[1])), vel[1:] - vel[:-1]])
+        return np.concatenate([seq, vel, accel], axis=1)
+
+    landmark_mask = rng.random((B, T, C // 3)) < 0.3
+    frame_mask = rng.random((B, T)) < 0.2
+    frame_mask[0] = True    # every frame dropped: unchanged
+    frame_mask[1, :5] = True
+    frame_mask[1, -5:] = True
+    new_lengths = rng.integers(3, 140, size=B)
+    angles = rng.uniform(-0.3, 0.3, size=B)
+    warps = np.cumsum(rng.normal(1, 0.1, (B, T)), axis=1)
+    warps = np.clip((warps - warps[:, :1]) / (warps[:, -1:] - warps[:, :1]) * (T - 1), 0, T - 1)
+
+    checks = [
+        ('landmark dropout', drop_landmarks(seqs, torch.from_numpy(landmark_mask)),
+         [ref_landmark_dropout(s, m) for s, m in zip(seqs, landmark_mask)]),
+        ('frame dropout', drop_frames(seqs, torch.from_numpy(frame_mask)),
+         [ref_frame_dropout(s, m) for s, m in zip(seqs, frame_mask)]),
+        ('resample', resample(seqs, torch.from_numpy(new_lengths)),
+         [ref_resample(s, n) for s, n in zip(seqs, new_lengths)]),
+        ('rotation', rotate(seqs, torch.from_numpy(angles)),
+         [ref_rotation(s, a) for s, a in zip(seqs, angles)]),
+        ('time warp', warp_time(seqs, torch.from_numpy(warps)),
+         [ref_time_warp(s, w) for s, w in zip(seqs, warps)]),
+        ('exp smooth', exp_smooth(seqs, 0.2), [ref_exp_smooth(s, 0.2) for s in seqs]),
+        ('velocity/accel', add_velocity_accel(seqs), [ref_velocity_accel(s) for s in seqs]),
+    ]
+    for name, batched, expected in checks:
+        assert isinstance(batched, np.ndarray) and batched.dtype == np.float32, name
+        error = np.abs(batched - np.stack(expected)).max()
+        assert error < 1e-4, f"{name}: max error {error}"
+        print(f"✓ {name:<17} matches the loop version (max error {error:.1e})")
+
+    # Single sequences and torch tensors keep their type and shape
+    assert rotate(seqs[0], torch.tensor([0.1])).shape == (T, C)
+    out = simulate_webcam_keypoint_aug(torch.from_numpy(seqs), generator=torch.Generator().manual_seed(0))
+    assert torch.is_tensor(out) and out.shape == (B, T, C) and torch.isfinite(out).all()
+    again = simulate_webcam_keypoint_aug(torch.from_numpy(seqs), generator=torch.Generator().manual_seed(0))
+    assert torch.equal(out, again)
+
+    collate = AugmentCollate(augment=True, seed=0)
+    inputs, labels = collate([(s, i) for i, s in enumerate(seqs)])
+    assert inputs.shape == (B, T, 3 * C) and labels.tolist() == list(range(B))
+
+    start = time.perf_counter()
+    for s, m in zip(seqs, landmark_mask):
+        ref_landmark_dropout(s, m)
+        ref_resample(s, 100)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    drop_landmarks(seqs, torch.from_numpy(landmark_mask))
+    resample(seqs, torch.full((B,), 100))
+    batched_time = time.perf_counter() - start
+    print(f"\nLandmark dropout + resample of {B} sequences: loops {loop_time * 1000:.0f} ms, "
+          f"batched {batched_time * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    collate([(s, i) for i, s in enumerate(seqs)])
+    print(f"Full augmentation + motion features per batch of {B}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print("\n✓ Augmentation test passed!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_augment()
@@ -0,0 +1,153 @@
+"""
+LandmarkLSTM, the FSL-105 sign classifier used for inference.
+
+Shared by the webcam scripts and the export script. load_classifier()
+loads either a training checkpoint (state_dict) or a TorchScript export
+(.ts, see export_fsl_model.py).
+
+forward() takes optional true sequence lengths: the LSTM then runs on packed
+sequences and attention ignores the padding, so a short sign costs only its
+own frames instead of a full 120-frame window.
+"""
+import copy
+from typing import Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+TORCHSCRIPT_EXTENSION = '.ts'
+
+
+# Must match the training architecture exactly
+class LandmarkLSTM(nn.Module):
+    def __init__(self, input_size=126, hidden_size=512, num_layers=2, num_classes=105):
+        super(LandmarkLSTM, self).__init__()
+        
+        # Input embedding layer to learn better representations
+        self.embedding = nn.Sequential(
+            nn.Linear(input_size, 256),
+            nn.ReLU(),
+            nn.BatchNorm1d(256),
+            nn.Dropout(0.2)
+        )
+        
+        # Bidirectional LSTM for temporal context
+        self.lstm = nn.LSTM(
+            256, hidden_size, num_layers, 
+            batch_first=True, 
+            dropout=0.3, 
+            bidirectional=True
+        )
+        
+        # Attention mechanism to focus on important frames
+        self.attention = nn.Linear(hidden_size * 2, 1)
+        
+        # Classifier
+        self.fc = nn.Sequential(
+            nn.Linear(hidden_size * 2, 256),
+            nn.ReLU(),
+            nn.BatchNorm1d(256),
+            nn.Dropout(0.5),
+            nn.Linear(256, num_classes)
+        )
+        
+    def forward(self, x, lengths: Optional[torch.Tensor] = None):
+        # x shape: (batch, seq_len, input_size); lengths: valid frames of each sequence
+        if lengths is not None:
+            # Frames past the longest sequence are padding in every row
+            x = x[:, :int(lengths.max())]
+        batch_size, seq_len, features = x.size()
+        
+        # Embed each frame
+        x = x.reshape(batch_size * seq_len, features)
+        x = self.embedding(x)
+        x = x.reshape(batch_size, seq_len, -1)
+        
+        # LSTM
+        if lengths is None:
+            lstm_out, _ = self.lstm(x)  # (batch, seq_len, hidden*2)
+        else:
+            # Packed: no LSTM steps on padding, and the backward direction starts at the last real frame
+            packed = pack_padded_sequence(x, lengths.cpu(), batch_first=True, enforce_sorted=False)
+            packed_out, _ = self.lstm(packed)
+            lstm_out, _ = pad_packed_sequence(packed_out, batch_first=True, total_length=seq_len)
+        
+        # Attention: Learn which frames are most important
+        scores = self.attention(lstm_out)  # (batch, seq_len, 1)
+        if lengths is not None:
+            padding = torch.arange(seq_len, device=x.device).unsqueeze(0) >= lengths.to(x.device).unsqueeze(1)
+            scores = scores.masked_fill(padding.unsqueeze(-1), float('-inf'))
+        attention_weights = torch.softmax(scores, dim=1)
+        attended = torch.sum(attention_weights * lstm_out, dim=1)  # (batch, hidden*2)
+        
+        # Classify
+        out = self.fc(attended)
+        return out
+
+
+def sequence_lengths(clips):
+    """
+    Frames up to the last one with any hand, for zero-padded clips of shape (batch, T, features).
+
+    Works on NumPy arrays and tensors; at least 1 so empty clips stay valid.
+    """
+    if isinstance(clips, np.ndarray):
+        clips = torch.from_numpy(clips)
+    has_hand = clips.abs().sum(dim=-1) > 0
+    frame = torch.arange(1, clips.shape[1] + 1, device=clips.device)
+    return (has_hand * frame).max(dim=1).values.clamp(min=1)
+
+
+def load_classifier(path, device='cpu', **model_kwargs):
+    """
+    Load a trained LandmarkLSTM for inference, chosen by file extension.
+
+    .ts files are TorchScript exports (BatchNorm folded, optionally int8)
+    and are loaded without the Python class; any other file is a state_dict
+    saved by the training notebook.
+    """
+    if str(path).endswith(TORCHSCRIPT_EXTENSION):
+        model = torch.jit.load(path, map_location=device)
+    else:
+        model = LandmarkLSTM(**model_kwargs)
+        model.load_state_dict(torch.load(path, map_location=device))
+    model.to(device)
+    model.eval()
+    return model
+
+
+def _batchnorm_affine(bn):
+    """Scale and shift that the eval-mode BatchNorm applies to each channel."""
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    return scale, bn.bias - bn.running_mean * scale
+
+
+def fold_batchnorm(model):
+    """
+    Copy of an eval-mode LandmarkLSTM with both BatchNorm layers folded away.
+
+    Each BatchNorm sits after a ReLU, so it is folded into the layer that
+    consumes its output: the LSTM input weights of both directions (embedding)
+    and the last Linear layer (classifier). Dropout is a no-op in eval mode,
+    so the folded model gives the same outputs with two fewer layers.
+    """
+    folded = copy.deepcopy(model).eval()
+    with torch.no_grad():
+        # embedding: Linear -> ReLU -> BatchNorm -> Dropout -> lstm
+        scale, shift = _batchnorm_affine(folded.embedding[2])
+        for suffix in ('', '_reverse') if folded.lstm.bidirectional else ('',):
+            weight = getattr(folded.lstm, 'weight_ih_l0' + suffix)
+            bias = getattr(folded.lstm, 'bias_ih_l0' + suffix)
+            bias += weight @ shift
+            weight *= scale
+        folded.embedding[2] = nn.Identity()
+
+        # fc: Linear -> ReLU -> BatchNorm -> Dropout -> Linear
+        scale, shift = _batchnorm_affine(folded.fc[2])
+        last = folded.fc[4]
+        last.bias += last.weight @ shift
+        last.weight *= scale
+        folded.fc[2] = nn.Identity()
+    return folded
@@ -0,0 +1,422 @@
+"""
+Pipelined real-time FSL recognition.
+
+Capture, MediaPipe landmarking and LSTM inference each run on their own
+thread, connected by small bounded queues. A stage that falls behind drops
+the oldest queued frames instead of stalling the stages before it, so the
+camera keeps its frame rate and predictions are made on fresh frames.
+OpenCV, MediaPipe and PyTorch release the GIL while they work, so the
+stages really overlap.
+
+Per-stage FPS and latency are drawn on the overlay (or printed with
+--headless), and --source accepts a video file, so the pipeline can be
+benchmarked without a camera or a display:
+
+    python fsl_pipeline.py                                  # webcam 0, continuous recognition
+    python fsl_pipeline.py --source clip.mp4 --headless     # benchmark on a file
+    python fsl_pipeline.py --source clip.mp4 --headless --no-pace
+"""
+import argparse
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import mediapipe as mp
+import torch
+
+from fsl_landmarks import frame_landmarks
+from fsl_streaming import SignDecoder, SlidingWindowRecognizer
+from webcam_video_inference import (
+    CONFIDENCE_THRESHOLD, INPUT_SIZE, LABELS_PATH, MODEL_PATH, SEQUENCE_LENGTH, STRIDE,
+    load_labels, load_model
+)
+
+# Items passed between the stages
+CapturedFrame = namedtuple('CapturedFrame', ['frame_id', 'captured', 'image'])
+LandmarkFrame = namedtuple('LandmarkFrame', ['frame_id', 'captured', 'frame_data'])
+Prediction = namedtuple('Prediction', ['label', 'confidence', 'accepted', 'frame_id', 'latency'])
+
+# Marks the end of the source; passed down the pipeline so every stage stops
+END = None
+
+
+class LatestQueue(queue.Queue):
+    """Bounded queue that drops its oldest item rather than block the producer."""
+
+    def __init__(self, maxsize=1):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put_latest(self, item):
+        while True:
+            try:
+                self.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class StageStats:
+    """Throughput and processing latency of one stage over its last `window` items."""
+
+    def __init__(self, name, window=60):
+        self.name = name
+        self.lock = threading.Lock()
+        self.finished = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+        self.total_latency = 0.0
+
+    def record(self, latency):
+        with self.lock:
+            self.finished.append(time.perf_counter())
+            self.latencies.append(latency)
+            self.count += 1
+            self.total_latency += latency
+
+    def fps(self):
+        with self.lock:
+            if len(self.finished) < 2:
+                return 0.0
+            return (len(self.finished) - 1) / max(self.finished[-1] - self.finished[0], 1e-9)
+
+    def latency_ms(self):
+        with self.lock:
+            return 1000 * sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.fps():5.1f} FPS {self.latency_ms():6.1f} ms"
+
+
+class FSLPipeline:
+    """
+    Capture -> landmarks -> inference on three threads.
+
+    The calling thread only displays frames (run()) or waits (run_headless()).
+    """
+
+    def __init__(self, source, model, id_to_label, device='cpu', stride=STRIDE,
+                 confidence_threshold=CONFIDENCE_THRESHOLD, flip=None, pace=True, draw=True):
+        """
+        Args:
+            source: Camera index or video file path
+            model: LandmarkLSTM in eval mode
+            id_to_label: Class index -> label name
+            device: Device the model lives on
+            stride: Classify every `stride` frames
+            confidence_threshold: Minimum smoothed confidence to show a label
+            flip: Mirror frames before landmarking (default: only for cameras)
+            pace: Read video files at their own frame rate, like a camera
+            draw: Draw the hand skeleton on displayed frames
+        """
+        self.source = source
+        self.is_camera = isinstance(source, int)
+        self.flip = self.is_camera if flip is None else flip
+        self.pace = pace and not self.is_camera
+        self.draw = draw
+        self.id_to_label = id_to_label
+
+        self.recognizer = SlidingWindowRecognizer(
+            model, device=device,
+            window_size=SEQUENCE_LENGTH,
+            num_features=INPUT_SIZE,
+            stride=stride,
+            confidence_threshold=confidence_threshold,
+            decoder=SignDecoder(enter_threshold=confidence_threshold)
+        )
+
+        # Landmarking is the slow stage: keep one frame waiting so it never idles
+        self.capture_queue = LatestQueue(2)
+        # Inference consumes every landmark frame it can, so allow a full window
+        self.landmark_queue = LatestQueue(SEQUENCE_LENGTH)
+        # The display only wants the newest annotated frame
+        self.display_queue = LatestQueue(1)
+
+        self.stats = {name: StageStats(name) for name in ('capture', 'landmarks', 'inference')}
+        self.end_to_end = StageStats('end-to-end')
+        self.prediction = None
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.cap = None
+        self.started = None
+
+    # --- Stages ---
+
+    def _capture(self):
+        try:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) if self.pace else 0
+            interval = 1.0 / fps if fps and fps > 0 else 0.0
+            next_frame = time.perf_counter()
+            frame_id = 0
+
+            while not self.stop_event.is_set():
+                if interval:
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_frame += interval
+
+                start = time.perf_counter()
+                ret, image = self.cap.read()
+                if not ret:
+                    break
+                self.stats['capture'].record(time.perf_counter() - start)
+                self.capture_queue.put_latest(CapturedFrame(frame_id, start, image))
+                frame_id += 1
+        finally:
+            # Always end the stream, so the later stages stop even if the source fails
+            self.capture_queue.put_latest(END)
+
+    def _landmarks(self):
+        mp_hands = mp.solutions.hands
+        mp_drawing = mp.solutions.drawing_utils
+        # MediaPipe graphs are not shared between threads, so this stage owns its Hands
+        hands = mp_hands.Hands(
+            static_image_mode=False,
+            max_num_hands=2,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    item = self.capture_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is END:
+                    break
+
+                start = time.perf_counter()
+                image = cv2.flip(item.image, 1) if self.flip else item.image
+                results = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+                frame_data = frame_landmarks(results)
+
+                if self.draw and results.multi_hand_landmarks:
+                    for hand_landmarks in results.multi_hand_landmarks:
+                        mp_drawing.draw_landmarks(image, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+                self.stats['landmarks'].record(time.perf_counter() - start)
+                self.landmark_queue.put_latest(LandmarkFrame(item.frame_id, item.captured, frame_data))
+                self.display_queue.put_latest(image)
+        finally:
+            hands.close()
+            self.landmark_queue.put_latest(END)
+            self.display_queue.put_latest(END)
+
+    def _inference(self):
+        while not self.stop_event.is_set():
+            try:
+                items = [self.landmark_queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            # Take everything that queued up while the model was busy and classify once
+            while items[-1] is not END:
+                try:
+                    items.append(self.landmark_queue.get_nowait())
+                except queue.Empty:
+                    break
+            ended = items[-1] is END
+            frames = [item for item in items if item is not END]
+
+            if frames:
+                start = time.perf_counter()
+                result = self.recognizer.push_many([item.frame_data for item in frames])
+                if result is not None:
+                    done = time.perf_counter()
+                    self.stats['inference'].record(done - start)
+                    self.end_to_end.record(done - frames[-1].captured)
+                    self.prediction = Prediction(
+                        self.id_to_label.get(result.label_idx, "Unknown"), result.confidence,
+                        result.accepted, frames[-1].frame_id, done - frames[-1].captured
+                    )
+                    if result.sign is not None:
+                        print(f"Sign: {self.id_to_label.get(result.sign.label_idx, 'Unknown')} "
+                              f"({result.sign.confidence:.2f}) at frame {frames[-1].frame_id}", flush=True)
+                elif self.recognizer.latest is None:
+                    self.prediction = None
+            if ended:
+                break
+
+    # --- Control ---
+
+    def start(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video source {self.source!r}")
+
+        self.stop_event.clear()
+        self.started = time.perf_counter()
+        self.threads = [
+            threading.Thread(target=target, name=f"fsl-{name}", daemon=True)
+            for name, target in (('capture', self._capture), ('landmarks', self._landmarks),
+                                 ('inference', self._inference))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, drain=False):
+        """Stop every stage; with drain, first let inference finish the frames already landmarked"""
+        if drain:
+            # The source has ended and END is on its way down the queues: stages exit on their own
+            for thread in self.threads:
+                thread.join()
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def stats_lines(self):
+        lines = [str(stats) for stats in self.stats.values()]
+        lines.append(f"end-to-end: {self.end_to_end.latency_ms():6.1f} ms, dropped "
+                     f"{self.capture_queue.dropped}/{self.landmark_queue.dropped}")
+        return lines
+
+    def transcript(self, last=None):
+        """Signs decoded so far, as label text"""
+        return self.recognizer.decoder.text(self.id_to_label, last=last)
+
+    def draw_overlay(self, frame):
+        prediction = self.prediction
+        if prediction is not None and prediction.accepted:
+            text = f"Live: {prediction.label} ({prediction.confidence:.2f})"
+        else:
+            text = "Live: ..."
+        cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        for i, line in enumerate(self.stats_lines()):
+            cv2.putText(frame, line, (10, 60 + 22 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        cv2.putText(frame, f"Signs: {self.transcript(last=6)}", (10, frame.shape[0] - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+
+    def run(self, window_name='FSL Pipelined Inference'):
+        """Show annotated frames until 'q' is pressed or the source ends."""
+        self.start()
+        ended = False
+        try:
+            while True:
+                try:
+                    frame = self.display_queue.get(timeout=0.1)
+                except queue.Empty:
+                    if not self.is_running():
+                        break
+                    frame = None
+                if frame is END:
+                    ended = True
+                    break
+                if frame is not None:
+                    self.draw_overlay(frame)
+                    cv2.imshow(window_name, frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            self.stop(drain=ended)
+            cv2.destroyAllWindows()
+
+    def run_headless(self, duration=None, report_every=1.0):
+        """Run without a window until the source ends or `duration` seconds pass; print stats."""
+        self.start()
+        last_report = time.perf_counter()
+        try:
+            while self.is_running():
+                time.sleep(0.05)
+                # Nobody displays frames, so keep the display queue from holding them
+                try:
+                    self.display_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+                now = time.perf_counter()
+                if duration is not None and now - self.started >= duration:
+                    break
+                if now - last_report >= report_every:
+                    last_report = now
+                    prediction = self.prediction
+                    label = f"{prediction.label} ({prediction.confidence:.2f})" if prediction else "..."
+                    print(" | ".join(self.stats_lines()) + f" | {label}", flush=True)
+        finally:
+            self.stop()
+        return self.summary()
+
+    def summary(self):
+        """Whole-run counts and mean latencies of every stage."""
+        elapsed = time.perf_counter() - self.started
+        summary = {'seconds': elapsed}
+        for name, stats in list(self.stats.items()) + [('end-to-end', self.end_to_end)]:
+            summary[name] = {
+                'items': stats.count,
+                'fps': stats.count / elapsed if elapsed > 0 else 0.0,
+                'mean_latency_ms': 1000 * stats.total_latency / stats.count if stats.count else 0.0,
+            }
+        summary['dropped'] = {
+            'before_landmarks': self.capture_queue.dropped,
+            'before_inference': self.landmark_queue.dropped,
+        }
+        summary['transcript'] = self.transcript()
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipelined real-time FSL recognition')
+    parser.add_argument('--source', default='0', help='Camera index or video file (default: 0)')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--labels', default=LABELS_PATH)
+    parser.add_argument('--stride', type=int, default=STRIDE, help='Classify every N frames')
+    parser.add_argument('--threshold', type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument('--headless', action='store_true', help='No window; print stats instead')
+    parser.add_argument('--duration', type=float, default=None, help='Stop after this many seconds')
+    parser.add_argument('--no-pace', action='store_true',
+                        help='Read video files as fast as possible instead of at their frame rate')
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+
+    print("Loading labels...")
+    id_to_label = load_labels(args.labels)
+    if id_to_label is None:
+        return
+
+    print("Loading model...")
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model = load_model(args.model, device)
+    if model is None:
+        return
+
+    pipeline = FSLPipeline(source, model, id_to_label, device=device, stride=args.stride,
+                           confidence_threshold=args.threshold, pace=not args.no_pace,
+                           draw=not args.headless)
+    try:
+        if args.headless:
+            summary = pipeline.run_headless(duration=args.duration)
+        else:
+            print("Starting pipelined inference. Press 'q' to quit.")
+            pipeline.run()
+            summary = pipeline.summary()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+
+    print("\n" + "=" * 60)
+    print(f"Ran for {summary['seconds']:.1f} s")
+    for name in ('capture', 'landmarks', 'inference', 'end-to-end'):
+        stage = summary[name]
+        print(f"  {name:<11} {stage['items']:6d} items  {stage['fps']:6.1f} /s  "
+              f"{stage['mean_latency_ms']:7.1f} ms")
+    print(f"  Dropped: {summary['dropped']['before_landmarks']} frames before landmarks, "
+          f"{summary['dropped']['before_inference']} before inference")
+    print(f"  Transcript: {summary['transcript'] or '(no signs)'}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
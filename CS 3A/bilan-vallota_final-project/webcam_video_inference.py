@@ -1,64 +1,23 @@
 import cv2
 import numpy as np
 import torch
-import torch.nn as nn
 import mediapipe as mp
 import pandas as pd
 from collections import deque
 import os
 
-# 1. Define the Model Class (Must match the training architecture exactly)
-class LandmarkLSTM(nn.Module):
-    def __init__(self, input_size=126, hidden_size=512, num_layers=2, num_classes=105):
-        super(LandmarkLSTM, self).__init__()
-        
-        # Input embedding layer to learn better representations
-        self.embedding = nn.Sequential(
-            nn.Linear(input_size, 256),
-            nn.ReLU(),
-            nn.BatchNorm1d(256),
-            nn.Dropout(0.2)
-        )
-        
-        # Bidirectional LSTM for temporal context
-        self.lstm = nn.LSTM(
-            256, hidden_size, num_layers, 
-            batch_first=True, 
-            dropout=0.3, 
-            bidirectional=True
-        )
-        
-        # Attention mechanism to focus on important frames
-        self.attention = nn.Linear(hidden_size * 2, 1)
-        
-        # Classifier
-        self.fc = nn.Sequential(
-            nn.Linear(hidden_size * 2, 256),
-            nn.ReLU(),
-            nn.BatchNorm1d(256),
-            nn.Dropout(0.5),
-            nn.Linear(256, num_classes)
-        )
-        
-    def forward(self, x):
-        # x shape: (batch, seq_len, input_size)
-        batch_size, seq_len, features = x.size()
-        
-        # Embed each frame
-        x = x.reshape(batch_size * seq_len, features)
-        x = self.embedding(x)
-        x = x.reshape(batch_size, seq_len, -1)
-        
-        # LSTM
-        lstm_out, _ = self.lstm(x)  # (batch, seq_len, hidden*2)
-        
-        # Attention: Learn which frames are most important
-        attention_weights = torch.softmax(self.attention(lstm_out), dim=1)  # (batch, seq_len, 1)
-        attended = torch.sum(attention_weights * lstm_out, dim=1)  # (batch, hidden*2)
-        
-        # Classify
-        out = self.fc(attended)
-        return out
+from fsl_landmarks import frame_landmarks
+from fsl_model import LandmarkLSTM, load_classifier  # LandmarkLSTM re-exported for older imports
+from fsl_streaming import SignDecoder, SlidingWindowRecognizer
+
+# --- Configuration ---
+MODEL_PATH = 'fsl_video_model_best.pth'
+LABELS_PATH = r"FSL-105 A dataset for recognizing 105 Filipino sign language videos\FSL-105 A dataset for recognizing 105 Filipino sign language videos\labels.csv"
+SEQUENCE_LENGTH = 120  # Must match max_frames from training
+INPUT_SIZE = 126       # 2 hands * 21 landmarks * 3 coords
+NUM_CLASSES = 105      # Number of classes in FSL-105
+CONFIDENCE_THRESHOLD = 0.7 # Only show prediction if confidence is high
+STRIDE = 10            # Continuous mode: classify the last SEQUENCE_LENGTH frames every STRIDE frames
 
 def load_labels(csv_path):
     try:
@@ -69,15 +28,19 @@ def load_labels(csv_path):
         print(f"Error loading labels: {e}")
         return None
 
-def main():
-    # --- Configuration ---
-    MODEL_PATH = 'fsl_video_model_best.pth'
-    LABELS_PATH = r"FSL-105 A dataset for recognizing 105 Filipino sign language videos\FSL-105 A dataset for recognizing 105 Filipino sign language videos\labels.csv"
-    SEQUENCE_LENGTH = 120  # Must match max_frames from training
-    INPUT_SIZE = 126       # 2 hands * 21 landmarks * 3 coords
-    NUM_CLASSES = 105      # Number of classes in FSL-105
-    CONFIDENCE_THRESHOLD = 0.7 # Only show prediction if confidence is high
+def load_model(model_path, device, input_size=INPUT_SIZE, num_classes=NUM_CLASSES):
+    # A .ts file is a TorchScript export from export_fsl_model.py (faster on CPU)
+    try:
+        model = load_classifier(model_path, device, input_size=input_size, num_classes=num_classes)
+        print("Model loaded successfully.")
+        return model
+    except FileNotFoundError:
+        print(f"Error: Model file '{model_path}' not found. Please train the model first.")
+    except Exception as e:
+        print(f"Error loading model: {e}")
+    return None
 
+def main():
     # --- Load Resources ---
     print("Loading labels...")
     id_to_label = load_labels(LABELS_PATH)
@@ -91,17 +54,8 @@ def main():
 
     print("Loading model...")
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    model = LandmarkLSTM(input_size=INPUT_SIZE, num_classes=NUM_CLASSES).to(device)
-    
-    try:
-        model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-        model.eval()
-        print("Model loaded successfully.")
-    except FileNotFoundError:
-        print(f"Error: Model file '{MODEL_PATH}' not found. Please train the model first.")
-        return
-    except Exception as e:
-        print(f"Error loading model: {e}")
+    model = load_model(MODEL_PATH, device)
+    if model is None:
         return
 
     # --- Initialize MediaPipe ---
@@ -125,8 +79,20 @@ def main():
     is_recording = False
     prediction_text = "Press SPACE to record"
     confidence_text = ""
+
+    # Continuous mode: sliding window over the live stream instead of SPACE recordings
+    is_continuous = False
+    recognizer = SlidingWindowRecognizer(
+        model, device=device,
+        window_size=SEQUENCE_LENGTH,
+        num_features=INPUT_SIZE,
+        stride=STRIDE,
+        confidence_threshold=CONFIDENCE_THRESHOLD,
+        decoder=SignDecoder(enter_threshold=CONFIDENCE_THRESHOLD)
+    )
+    decoder = recognizer.decoder
     
-    print(f"Starting inference. Press 'SPACE' to start/stop recording. Press 'q' to quit.")
+    print(f"Starting inference. Press 'SPACE' to start/stop recording, 'c' to toggle continuous mode. Press 'q' to quit.")
 
     while True:
         ret, frame = cap.read()
@@ -141,41 +107,38 @@ def main():
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = hands.process(frame_rgb)
 
-        # Extract Landmarks with normalization
-        frame_data = np.zeros(INPUT_SIZE, dtype=np.float32)
+        frame_data = frame_landmarks(results)
         
-        if results.multi_hand_landmarks and results.multi_handedness:
-            for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                # Draw landmarks
+        # Draw landmarks
+        if results.multi_hand_landmarks:
+            for hand_landmarks in results.multi_hand_landmarks:
                 mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-                
-                # Get handedness label
-                label = results.multi_handedness[idx].classification[0].label
-                
-                # Flatten landmarks (x, y, z)
-                landmarks = []
-                for lm in hand_landmarks.landmark:
-                    landmarks.extend([lm.x, lm.y, lm.z])
-                
-                landmarks = np.array(landmarks, dtype=np.float32)
-                
-                # CRITICAL: Normalize relative to wrist (landmark 0)
-                wrist_x, wrist_y, wrist_z = landmarks[0], landmarks[1], landmarks[2]
-                for i in range(0, len(landmarks), 3):
-                    landmarks[i] -= wrist_x
-                    landmarks[i+1] -= wrist_y
-                    landmarks[i+2] -= wrist_z
-                
-                # Assign to specific slice based on label
-                if label == 'Left':
-                    frame_data[0:63] = landmarks
-                else:  # Right
-                    frame_data[63:126] = landmarks
 
         # Handle Recording
         should_predict = False
         
-        if is_recording:
+        if is_continuous:
+            result = recognizer.push(frame_data)
+            if result is not None and result.sign is not None:
+                print(f"Sign: {id_to_label.get(result.sign.label_idx, 'Unknown')} ({result.sign.confidence:.2f})"
+                      f" -> {decoder.text(id_to_label)}")
+            if result is not None and result.accepted:
+                prediction_text = id_to_label.get(result.label_idx, "Unknown")
+                confidence_text = f"({result.confidence:.2f})"
+            elif recognizer.latest is None or not recognizer.latest.accepted:
+                prediction_text = "..."
+                confidence_text = ""
+
+            cv2.putText(frame, f"Live: {prediction_text} {confidence_text}", (10, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+            cv2.putText(frame, f"Continuous mode (window {len(recognizer.buffer)}/{SEQUENCE_LENGTH}) - press 'c' to stop", (10, 60),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+            if recognizer.latest is not None:
+                top_k = "  ".join(f"{id_to_label.get(i, '?')} {p:.2f}" for i, p in decoder.top)
+                cv2.putText(frame, top_k, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+            cv2.putText(frame, f"Signs: {decoder.text(id_to_label, last=6)}", (10, h - 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        elif is_recording:
             recorded_frames.append(frame_data)
             # Visual indicator
             cv2.circle(frame, (30, 30), 10, (0, 0, 255), -1)
@@ -196,7 +159,17 @@ def main():
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q'):
             break
-        elif key == 32: # Spacebar
+        elif key == ord('c'):
+            if is_continuous and decoder.transcript:
+                print(f"Transcript: {decoder.text(id_to_label)}")
+            is_continuous = not is_continuous
+            is_recording = False
+            recorded_frames = []
+            recognizer.reset()
+            prediction_text = "..." if is_continuous else "Press SPACE to record"
+            confidence_text = ""
+            print(f"Continuous mode {'on' if is_continuous else 'off'}")
+        elif key == 32 and not is_continuous: # Spacebar
             if is_recording:
                 # Stop recording manually
                 is_recording = False
@@ -212,14 +185,10 @@ def main():
         if should_predict and len(recorded_frames) > 0:
             print(f"Predicting on {len(recorded_frames)} frames...")
             
-            # Pad with zeros if shorter than sequence length
-            if len(recorded_frames) < SEQUENCE_LENGTH:
-                padding = [np.zeros(INPUT_SIZE, dtype=np.float32) for _ in range(SEQUENCE_LENGTH - len(recorded_frames))]
-                recorded_frames.extend(padding)
-            
-            # Prepare input
-            input_sequence = np.array(recorded_frames, dtype=np.float32)
-            input_tensor = torch.FloatTensor(input_sequence).unsqueeze(0).to(device)
+            # Prepare input: only the recorded frames, no zero padding to SEQUENCE_LENGTH,
+            # so the LSTM and attention run on real frames only (see LandmarkLSTM.forward)
+            input_sequence = np.stack(recorded_frames)
+            input_tensor = torch.from_numpy(input_sequence).unsqueeze(0).to(device)
             
             with torch.no_grad():
                 outputs = model(input_tensor)